@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from urllib.request import Request, urlopen
+
+import numpy as np
+import pandas as pd
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# 預測方向轉為數值，規則可以用 changed / cross_above 偵測多空翻轉
+PREDICTION_CODES = {"看多": 1.0, "觀望": 0.0, "看空": -1.0}
+# 預測模型 (PredictionEngine) 的趨勢標籤
+TREND_CODES = {"Up": 1.0, "Bullish": 1.0, "Neutral": 0.0, "Down": -1.0, "Bearish": -1.0}
+
+COMPARE_OPS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+# 事件型條件：需要前一次的數值，本身即代表「剛發生」
+EVENT_OPS = ("cross_above", "cross_below", "sign_change", "changed")
+
+
+def flatten_result(result):
+    """
+    將單檔股票的分析結果攤平為 {欄位: 數值}，供規則引用：
+    score / price / final_trend (Up 1 / Down -1) 為綜合結果，<分析師 key>.score、<分析師 key>.prediction
+    與 <分析師 key>.<指標名稱> 為各分析師的輸出。
+    """
+    features = {
+        "score": result['consensus']['score'],
+        "price": result['current_price'],
+        "final_trend": TREND_CODES.get(result['prediction'].get('final_trend'), np.nan),
+    }
+    for analysis in result['analysis']:
+        key = analysis.get('key')
+        if not key or analysis.get('status', 'ok') != 'ok':
+            continue
+        features[f"{key}.score"] = analysis['score']
+        features[f"{key}.prediction"] = PREDICTION_CODES.get(analysis['prediction'], np.nan)
+        for name, indicator in analysis.get('indicators', {}).items():
+            value = getattr(indicator, 'value', indicator)
+            if isinstance(value, (int, float, np.number)):
+                features[f"{key}.{name}"] = value
+    return {k: float(v) for k, v in features.items()}
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    單一警示條件：field 與 value 比較，value 可為常數或另一個欄位名稱。
+    比較型條件 (>, <, ...) 只在由不成立轉為成立時觸發一次；
+    cross_above / cross_below / sign_change / changed 以前一次的數值判斷是否剛發生。
+    """
+    name: str
+    field: str
+    op: str
+    value: object = 0.0
+    message: str = ""
+    severity: str = "info"
+
+    @classmethod
+    def from_dict(cls, d):
+        rule = cls(name=d['name'], field=d['field'], op=d.get('op', '>'), value=d.get('value', 0.0),
+                   message=d.get('message', ""), severity=d.get('severity', 'info'))
+        if rule.op not in COMPARE_OPS and rule.op not in EVENT_OPS:
+            raise ValueError(f"警示規則 {rule.name} 的運算子不支援: {rule.op}")
+        return rule
+
+    @property
+    def fields(self):
+        return [self.field, self.value] if isinstance(self.value, str) else [self.field]
+
+
+class OutboxSink:
+    """將警示逐行附加到本地 JSONL 檔 (outbox)，由其他程序或人工後續處理"""
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alerts):
+        if not alerts:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    """
+    以單一 POST 送出整批警示；失敗時寫入 fallback outbox，不會遺失。
+    """
+    def __init__(self, url, fallback=None, timeout=10):
+        self.url = url
+        self.fallback = fallback
+        self.timeout = timeout
+
+    def send(self, alerts):
+        if not alerts:
+            return
+        body = json.dumps({"alerts": alerts}, ensure_ascii=False).encode("utf-8")
+        request = Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(request, timeout=self.timeout):
+                pass
+        except Exception as e:
+            logger.warning(f"警示 webhook 發送失敗 ({e})，改寫入 outbox")
+            if self.fallback is not None:
+                self.fallback.send(alerts)
+
+
+class AlertEngine:
+    """
+    對整個觀察清單評估警示規則。
+
+    狀態 (state_path, .npz) 保存每檔股票上次評估的資料日期、規則引用欄位的數值與各規則是否成立；
+    每次只評估資料日期比狀態新的股票，其餘股票不重新計算也不會重複發送。
+    評估以 (股票 × 欄位) 矩陣逐規則向量化進行。
+    """
+    def __init__(self, rules, state_path=None, sinks=None):
+        self.rules = list(rules)
+        self.state_path = state_path
+        self.sinks = list(sinks or [])
+        self.fields = list(dict.fromkeys(f for rule in self.rules for f in rule.fields))
+        self._load_state()
+
+    @classmethod
+    def from_config(cls, config_path="config.yaml"):
+        with open(config_path, 'r') as f:
+            alert_config = (yaml.safe_load(f) or {}).get('alerts') or {}
+        rules = [AlertRule.from_dict(d) for d in alert_config.get('rules') or []]
+        outbox = OutboxSink(alert_config.get('outbox', "reports/alerts.jsonl"))
+        sink = WebhookSink(alert_config['webhook'], fallback=outbox) if alert_config.get('webhook') else outbox
+        return cls(rules, alert_config.get('state', "reports/alert_state.npz"), [sink])
+
+    def _load_state(self):
+        self.tickers = {}
+        self.as_of = np.array([], dtype=object)
+        self.values = np.empty((0, len(self.fields)))
+        self.active = np.zeros((0, len(self.rules)), dtype=bool)
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        state = np.load(self.state_path, allow_pickle=False)
+        tickers = state['tickers'].tolist()
+        self.tickers = {t: i for i, t in enumerate(tickers)}
+        self.as_of = state['as_of'].astype(object)
+        # 規則或欄位增減後按名稱重新對齊，新增的欄位與規則從空白狀態開始
+        self.values = self._align(state['values'], state['fields'].tolist(), self.fields, np.nan)
+        self.active = self._align(state['active'], state['rules'].tolist(), [r.name for r in self.rules], False)
+
+    @staticmethod
+    def _align(matrix, old_names, new_names, fill):
+        aligned = np.full((matrix.shape[0], len(new_names)), fill, dtype=matrix.dtype)
+        position = {name: i for i, name in enumerate(old_names)}
+        for j, name in enumerate(new_names):
+            if name in position:
+                aligned[:, j] = matrix[:, position[name]]
+        return aligned
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp.npz"
+        np.savez(tmp_path, tickers=np.array(list(self.tickers), dtype=str), as_of=self.as_of.astype(str),
+                 fields=np.array(self.fields, dtype=str), values=self.values,
+                 rules=np.array([r.name for r in self.rules], dtype=str), active=self.active)
+        os.replace(tmp_path, self.state_path)
+
+    def _rows(self, stock_ids):
+        """取得 (或新增) 股票在狀態矩陣中的列號"""
+        new = [s for s in stock_ids if s not in self.tickers]
+        if new:
+            start = len(self.tickers)
+            self.tickers.update({s: start + i for i, s in enumerate(new)})
+            self.as_of = np.concatenate([self.as_of, np.full(len(new), "", dtype=object)])
+            self.values = np.vstack([self.values, np.full((len(new), len(self.fields)), np.nan)])
+            self.active = np.vstack([self.active, np.zeros((len(new), len(self.rules)), dtype=bool)])
+        return np.array([self.tickers[s] for s in stock_ids], dtype=int)
+
+    def _condition(self, rule, current, previous):
+        x, px = current[rule.field], previous[rule.field]
+        if isinstance(rule.value, str):
+            y, py = current[rule.value], previous[rule.value]
+        else:
+            y = py = float(rule.value)
+        with np.errstate(invalid='ignore'):
+            if rule.op in COMPARE_OPS:
+                return COMPARE_OPS[rule.op](x, y)
+            if rule.op == "cross_above":
+                return (px <= py) & (x > y)
+            if rule.op == "cross_below":
+                return (px >= py) & (x < y)
+            if rule.op == "sign_change":
+                return np.sign(px) * np.sign(x) < 0
+            return ~np.isnan(px) & ~np.isnan(x) & (x != px)
+
+    def evaluate_frame(self, features, as_of):
+        """
+        features 為 (股票 × 欄位) 的 DataFrame，as_of 為各股票最新資料日期 (Series 或單一日期)。
+        回傳本次觸發的警示 list，並更新狀態與送出到 sinks。
+        """
+        features = features.reindex(columns=self.fields)
+        as_of = pd.Series(as_of, index=features.index).astype(str)
+        rows = self._rows(features.index.astype(str).tolist())
+
+        # 只處理資料日期比上次評估更新的股票
+        changed = as_of.to_numpy(dtype=object) > self.as_of[rows]
+        if not changed.any():
+            return []
+        rows = rows[changed]
+        stock_ids = features.index[changed].astype(str).to_numpy()
+        dates = as_of.to_numpy()[changed]
+        X = features.to_numpy(dtype=float)[changed]
+        P = self.values[rows]
+        current = {f: X[:, j] for j, f in enumerate(self.fields)}
+        previous = {f: P[:, j] for j, f in enumerate(self.fields)}
+
+        created_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        alerts = []
+        active = np.zeros((len(rows), len(self.rules)), dtype=bool)
+        for k, rule in enumerate(self.rules):
+            active[:, k] = self._condition(rule, current, previous)
+            fired = active[:, k] if rule.op in EVENT_OPS else active[:, k] & ~self.active[rows, k]
+            x, px = current[rule.field], previous[rule.field]
+            for i in np.flatnonzero(fired):
+                alerts.append({
+                    "rule": rule.name,
+                    "stock_id": stock_ids[i],
+                    "as_of": dates[i],
+                    "field": rule.field,
+                    "value": float(x[i]),
+                    "previous": None if np.isnan(px[i]) else float(px[i]),
+                    "severity": rule.severity,
+                    "message": rule.message,
+                    "created_at": created_at,
+                })
+
+        # 缺值的欄位 (例如分析師逾時) 保留上一次的數值，避免下次誤判穿越
+        self.values[rows] = np.where(np.isnan(X), P, X)
+        self.active[rows] = active
+        self.as_of[rows] = dates
+        self._save_state()
+        for sink in self.sinks:
+            sink.send(alerts)
+        return alerts
+
+    def evaluate(self, features_by_stock, as_of_by_stock):
+        """
+        features_by_stock: {股票代號: flatten_result(...)}；as_of_by_stock: {股票代號: 最新資料日期}
+        """
+        if not features_by_stock:
+            return []
+        features = pd.DataFrame.from_dict(features_by_stock, orient='index')
+        return self.evaluate_frame(features, pd.Series(as_of_by_stock).reindex(features.index))
@@ -4,13 +4,27 @@ class BaseAnalyst(ABC):
     """
     所有分析師模型的基本類別。
     """
+    # 是否需要三大法人數據 (由協調器決定傳入哪些資料)
+    requires_institutional = False
+    # 所需的歷史長度 (交易日)：lookback_bars 為分析直接讀取的 K 線數，
+    # warmup_bars 為其前方讓均線、RSI 等滾動指標暖身所需的額外 K 線數
+    lookback_bars = 245
+    warmup_bars = 0
+
     def __init__(self, name):
         self.name = name
+        # 由 AnalystRegistry 建立時設定的設定檔鍵值與權重
+        self.key = None
+        self.weight = 1.0
+
+    @property
+    def required_bars(self):
+        return self.lookback_bars + self.warmup_bars
 
     @abstractmethod
     def analyze(self, data):
         """
         對提供的數據進行分析。
-        返回包含分析結果、預測和說明的字典。
+        返回包含評分、預測與規則命中代碼 (signals) 的字典；說明文字由 analysts.explain 需要時才產生。
         """
         pass
@@ -1,7 +1,13 @@
 import pandas as pd
 from .base_analyst import BaseAnalyst
+from .indicator import percent, price
+from . import kernels
 
 class BuffettAnalyst(BaseAnalyst):
+    # 52 週高低點與年化波動率需要一整年的 K 線，MA120 與 6 個月漲跌都包含在內
+    lookback_bars = 252
+    warmup_bars = 0
+
     def __init__(self):
         super().__init__("價值投資分析師 (巴菲特風格)")
 
@@ -14,7 +20,7 @@ class BuffettAnalyst(BaseAnalyst):
                 "analyst": self.name,
                 "score": 50,
                 "prediction": "觀望",
-                "explanation": "數據不足，無法進行價值分析。",
+                "signals": [("buffett.insufficient_data", {})],
                 "indicators": {}
             }
 
@@ -29,9 +35,10 @@ class BuffettAnalyst(BaseAnalyst):
         volatility = returns.std() * (252 ** 0.5)  # 年化波動率
         
         # 2. 趨勢強度分析
-        ma20 = df['close'].rolling(20).mean()
-        ma60 = df['close'].rolling(60).mean()
-        ma120 = df['close'].rolling(120).mean()
+        close = df['close'].to_numpy(dtype=float)
+        ma20 = kernels.sma(close, 20)
+        ma60 = kernels.sma(close, 60)
+        ma120 = kernels.sma(close, 120)
         
         # 3. 價值評估 - 相對歷史價格
         price_52w_high = df['close'].tail(252).max()
@@ -50,57 +57,57 @@ class BuffettAnalyst(BaseAnalyst):
         
         # 評分系統
         score = 50
-        reasons = []
+        signals = []
         
         # 波動率評估 (低波動加分)
         if volatility < 0.25:
             score += 15
-            reasons.append(f"股價波動穩定(年化波動率{volatility*100:.1f}%)，符合價值投資標準")
+            signals.append(("buffett.volatility_low", {"volatility": volatility * 100}))
         elif volatility > 0.5:
             score -= 10
-            reasons.append(f"股價波動較大(年化波動率{volatility*100:.1f}%)，風險偏高")
+            signals.append(("buffett.volatility_high", {"volatility": volatility * 100}))
         
         # 價格位置評估 (低位加分)
         if price_position < 0.3:
             score += 20
-            reasons.append(f"目前價格位於52週低檔區({price_position*100:.1f}%)，具安全邊際")
+            signals.append(("buffett.price_low", {"position": price_position * 100}))
         elif price_position > 0.8:
             score -= 15
-            reasons.append(f"目前價格接近52週高點({price_position*100:.1f}%)，估值偏高")
+            signals.append(("buffett.price_high", {"position": price_position * 100}))
         else:
-            reasons.append(f"價格位於52週區間中段({price_position*100:.1f}%)")
+            signals.append(("buffett.price_mid", {"position": price_position * 100}))
         
         # 均線趨勢評估
         if len(ma20) > 0 and len(ma60) > 0 and len(ma120) > 0:
-            ma20_val = ma20.iloc[-1]
-            ma60_val = ma60.iloc[-1]
-            ma120_val = ma120.iloc[-1]
+            ma20_val = ma20[-1]
+            ma60_val = ma60[-1]
+            ma120_val = ma120[-1]
             
             if current_price > ma20_val > ma60_val > ma120_val:
                 score += 15
-                reasons.append("多頭排列確立，長期趨勢向上")
+                signals.append(("buffett.ma_bullish", {}))
             elif current_price < ma20_val < ma60_val < ma120_val:
                 score -= 15
-                reasons.append("空頭排列，長期趨勢向下，建議觀望")
+                signals.append(("buffett.ma_bearish", {}))
             elif current_price > ma60_val:
                 score += 5
-                reasons.append("價格站穩季線之上，中期趨勢良好")
+                signals.append(("buffett.above_ma60", {}))
         
         # 成交量趨勢
         if volume_trend > 20:
             score += 10
-            reasons.append(f"成交量放大{volume_trend:.1f}%，市場關注度提升")
+            signals.append(("buffett.volume_up", {"volume_trend": volume_trend}))
         elif volume_trend < -20:
             score -= 5
-            reasons.append(f"成交量萎縮{abs(volume_trend):.1f}%，市場興趣降低")
+            signals.append(("buffett.volume_down", {"volume_trend": abs(volume_trend)}))
         
         # 價格動能評估
         if price_change_3m > 10 and price_change_6m > 15:
             score += 10
-            reasons.append(f"中長期表現優異(3M:{price_change_3m:.1f}%, 6M:{price_change_6m:.1f}%)")
+            signals.append(("buffett.momentum_strong", {"change_3m": price_change_3m, "change_6m": price_change_6m}))
         elif price_change_3m < -10 and price_change_6m < -15:
             score -= 10
-            reasons.append(f"中長期表現疲弱(3M:{price_change_3m:.1f}%, 6M:{price_change_6m:.1f}%)")
+            signals.append(("buffett.momentum_weak", {"change_3m": price_change_3m, "change_6m": price_change_6m}))
         
         # 限制分數範圍
         score = max(0, min(100, score))
@@ -108,30 +115,30 @@ class BuffettAnalyst(BaseAnalyst):
         # 生成專業建議
         if score >= 70:
             prediction = "看多"
-            summary = "綜合評估顯示該股票具備良好的價值投資特質，建議逢低布局。"
+            summary = "buffett.summary_bullish"
         elif score <= 40:
             prediction = "看空"
-            summary = "目前估值偏高或趨勢不佳，建議暫時觀望或減碼。"
+            summary = "buffett.summary_bearish"
         else:
             prediction = "觀望"
-            summary = "股票表現中性，建議持續觀察基本面變化。"
+            summary = "buffett.summary_neutral"
         
-        explanation = summary + " " + " ".join(reasons)
+        signals.insert(0, (summary, {}))
         
         return {
             "analyst": self.name,
             "score": score,
             "prediction": prediction,
-            "explanation": explanation,
+            "signals": signals,
             "indicators": {
-                "目前價格": round(current_price, 2),
-                "52週高點": round(price_52w_high, 2),
-                "52週低點": round(price_52w_low, 2),
-                "價格位置": f"{price_position*100:.1f}%",
-                "年化波動率": f"{volatility*100:.1f}%",
-                "1個月漲跌": f"{price_change_1m:+.2f}%",
-                "3個月漲跌": f"{price_change_3m:+.2f}%",
-                "6個月漲跌": f"{price_change_6m:+.2f}%",
-                "成交量變化": f"{volume_trend:+.1f}%"
+                "目前價格": price(current_price),
+                "52週高點": price(price_52w_high),
+                "52週低點": price(price_52w_low),
+                "價格位置": percent(price_position * 100),
+                "年化波動率": percent(volatility * 100),
+                "1個月漲跌": percent(price_change_1m, signed=True, precision=2),
+                "3個月漲跌": percent(price_change_3m, signed=True, precision=2),
+                "6個月漲跌": percent(price_change_6m, signed=True, precision=2),
+                "成交量變化": percent(volume_trend, signed=True)
             }
         }
@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 from .base_analyst import BaseAnalyst
+from .indicator import price, ratio
+from . import kernels
 
 class ChenMingxianAnalyst(BaseAnalyst):
+    # 只看最新一根 K 線的 MA5 / MA20 / RSI14
+    lookback_bars = 1
+    warmup_bars = 19
+
     def __init__(self):
         super().__init__("陳明憲")
 
@@ -10,49 +16,55 @@ class ChenMingxianAnalyst(BaseAnalyst):
         """
         技術指標分析：MA, RSI, MACD
         """
+        if data is None or data.empty or len(data) < 20:
+            return {
+                "analyst": self.name,
+                "score": 50,
+                "prediction": "觀望",
+                "signals": [("chen.insufficient_data", {})],
+                "indicators": {}
+            }
+
         df = data.copy()
         
         # 計算 MA
-        df['MA5'] = df['close'].rolling(window=5).mean()
-        df['MA20'] = df['close'].rolling(window=20).mean()
+        close = df['close'].to_numpy(dtype=float)
+        df['MA5'] = kernels.sma(close, 5)
+        df['MA20'] = kernels.sma(close, 20)
         
         # 計算 RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
+        df['RSI'] = kernels.rsi(close, 14, method="sma")
         
         last_close = df['close'].iloc[-1]
         last_ma5 = df['MA5'].iloc[-1]
         last_rsi = df['RSI'].iloc[-1]
         
         score = 0
-        explanation = []
+        signals = []
         
         if last_close > last_ma5:
             score += 30
-            explanation.append("股價站在 5 日均線之上，短期走勢強勁。")
+            signals.append(("chen.above_ma5", {}))
         else:
-            explanation.append("股價在 5 日均線之下，需觀察支撐。")
+            signals.append(("chen.below_ma5", {}))
             
         if 30 < last_rsi < 70:
             score += 40
-            explanation.append(f"RSI 為 {last_rsi:.2f}，處於中性區間。")
+            signals.append(("chen.rsi_neutral", {"rsi": last_rsi}))
         elif last_rsi <= 30:
             score += 60
-            explanation.append(f"RSI 為 {last_rsi:.2f}，進入超賣區，可能有反彈機會。")
+            signals.append(("chen.rsi_oversold", {"rsi": last_rsi}))
         else:
             score += 20
-            explanation.append(f"RSI 為 {last_rsi:.2f}，進入超買區，需特別留意回檔。")
+            signals.append(("chen.rsi_overbought", {"rsi": last_rsi}))
             
         return {
             "analyst": self.name,
             "score": score,
             "prediction": "看多" if score > 50 else "觀望",
-            "explanation": " ".join(explanation),
+            "signals": signals,
             "indicators": {
-                "MA5": last_ma5,
-                "RSI": last_rsi
+                "MA5": price(last_ma5),
+                "RSI": ratio(last_rsi)
             }
         }
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def weighted_consensus(results, weights):
+    """
+    以分析師權重計算加權共識分數。
+
+    results 為分析師結果字典清單，weights 為對應的權重序列；
+    權重總和為 0 時退回簡單平均。
+    """
+    if not results:
+        return {
+            "score": None,
+            "bullish": 0,
+            "bearish": 0,
+            "analyst_count": 0
+        }
+
+    scores = np.fromiter((r['score'] for r in results), dtype=float, count=len(results))
+    w = np.asarray(weights, dtype=float)
+    predictions = np.array([r['prediction'] for r in results])
+
+    total_weight = w.sum()
+    score = float(scores @ w / total_weight) if total_weight > 0 else float(scores.mean())
+
+    return {
+        "score": round(score, 2),
+        "bullish": int((predictions == "看多").sum()),
+        "bearish": int((predictions == "看空").sum()),
+        "analyst_count": len(results)
+    }
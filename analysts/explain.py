@@ -0,0 +1,155 @@
+"""
+分析說明的文字格式化。
+
+分析師只回傳規則命中代碼與參數 (result["signals"] = [(代碼, {參數}), ...])，
+評分過程不做任何字串格式化；需要顯示時才由 explain() 依訊息目錄組成說明文字。
+批次評分、回測與匯總表格只讀 score / prediction，完全不會產生文字。
+新增語系時在 CATALOGS 加入同樣代碼的訊息目錄即可，不必修改分析師。
+"""
+
+MESSAGES = {
+    # 共用
+    "runner.timeout": "分析逾時，本次未納入共識評分。",
+    "runner.error": "分析執行出錯 ({error})，本次未納入共識評分。",
+
+    # 陳明憲
+    "chen.insufficient_data": "數據不足，無法進行技術指標分析。",
+    "chen.above_ma5": "股價站在 5 日均線之上，短期走勢強勁。",
+    "chen.below_ma5": "股價在 5 日均線之下，需觀察支撐。",
+    "chen.rsi_neutral": "RSI 為 {rsi:.2f}，處於中性區間。",
+    "chen.rsi_oversold": "RSI 為 {rsi:.2f}，進入超賣區，可能有反彈機會。",
+    "chen.rsi_overbought": "RSI 為 {rsi:.2f}，進入超買區，需特別留意回檔。",
+
+    # 徐小萍
+    "xu.insufficient_data": "數據不足，無法進行量化風險分析。",
+    "xu.sharpe": "基於量化回測，夏普比率為 {sharpe:.2f}。",
+    "xu.drawdown_low": "最大回撤僅 {max_drawdown:.1f}%，風險控制極佳。",
+    "xu.drawdown_high": "最大回撤達 {max_drawdown:.1f}%，波動風險較大。",
+
+    # 巴菲特
+    "buffett.insufficient_data": "數據不足，無法進行價值分析。",
+    "buffett.summary_bullish": "綜合評估顯示該股票具備良好的價值投資特質，建議逢低布局。",
+    "buffett.summary_bearish": "目前估值偏高或趨勢不佳，建議暫時觀望或減碼。",
+    "buffett.summary_neutral": "股票表現中性，建議持續觀察基本面變化。",
+    "buffett.volatility_low": "股價波動穩定(年化波動率{volatility:.1f}%)，符合價值投資標準",
+    "buffett.volatility_high": "股價波動較大(年化波動率{volatility:.1f}%)，風險偏高",
+    "buffett.price_low": "目前價格位於52週低檔區({position:.1f}%)，具安全邊際",
+    "buffett.price_high": "目前價格接近52週高點({position:.1f}%)，估值偏高",
+    "buffett.price_mid": "價格位於52週區間中段({position:.1f}%)",
+    "buffett.ma_bullish": "多頭排列確立，長期趨勢向上",
+    "buffett.ma_bearish": "空頭排列，長期趨勢向下，建議觀望",
+    "buffett.above_ma60": "價格站穩季線之上，中期趨勢良好",
+    "buffett.volume_up": "成交量放大{volume_trend:.1f}%，市場關注度提升",
+    "buffett.volume_down": "成交量萎縮{volume_trend:.1f}%，市場興趣降低",
+    "buffett.momentum_strong": "中長期表現優異(3M:{change_3m:.1f}%, 6M:{change_6m:.1f}%)",
+    "buffett.momentum_weak": "中長期表現疲弱(3M:{change_3m:.1f}%, 6M:{change_6m:.1f}%)",
+
+    # 林奇
+    "lin_chi.insufficient_data": "數據不足，無法進行趨勢分析。",
+    "lin_chi.summary_bullish": "趨勢分析顯示多頭格局明確，動能強勁，建議順勢做多。",
+    "lin_chi.summary_bearish": "趨勢分析顯示空頭格局，動能疲弱，建議迴避或做空。",
+    "lin_chi.summary_neutral": "趨勢方向不明確，建議等待趨勢確立後再進場。",
+    "lin_chi.ma_bullish": "均線呈現完美多頭排列，趨勢強勁向上",
+    "lin_chi.ma_spread_up": "均線發散度{spread:.1f}%，上升動能強勁",
+    "lin_chi.ma_bearish": "均線呈現完美空頭排列，趨勢明顯向下",
+    "lin_chi.ma_spread_down": "均線發散度{spread:.1f}%，下跌動能強勁",
+    "lin_chi.above_ma20": "價格站穩月線，中期趨勢偏多",
+    "lin_chi.below_ma20": "價格跌破月線，中期趨勢偏空",
+    "lin_chi.momentum_strong": "短中期動能強勁(5日:{momentum_5:.1f}%, 20日:{momentum_20:.1f}%)",
+    "lin_chi.momentum_weak": "短中期動能疲弱(5日:{momentum_5:.1f}%, 20日:{momentum_20:.1f}%)",
+    "lin_chi.long_strong": "長期趨勢強勁(60日漲幅{momentum_60:.1f}%)",
+    "lin_chi.long_weak": "長期趨勢疲弱(60日跌幅{momentum_60:.1f}%)",
+    "lin_chi.volatility_low": "波動率低({volatility:.1f}%)，趨勢穩定",
+    "lin_chi.volatility_high": "波動率高({volatility:.1f}%)，市場不穩定",
+    "lin_chi.channel_top": "價格位於通道頂部({channel:.1f}%)，強勢格局",
+    "lin_chi.channel_bottom": "價格位於通道底部({channel:.1f}%)，弱勢格局",
+    "lin_chi.channel_mid": "價格位於通道中段({channel:.1f}%)",
+    "lin_chi.volume_price_up": "量價齊揚(量增{volume_trend:.1f}%)，多頭氣盛",
+    "lin_chi.volume_price_down": "量增價跌(量增{volume_trend:.1f}%)，賣壓沉重",
+    "lin_chi.volume_shrink": "成交量萎縮({volume_trend:.1f}%)，市場觀望",
+    "lin_chi.trend_all_up": "短中長期趨勢一致向上，趨勢可靠度高",
+    "lin_chi.trend_all_down": "短中長期趨勢一致向下，跌勢明確",
+    "lin_chi.trend_mixed": "多週期趨勢不一致，方向尚未明朗",
+
+    # 張天豪
+    "zhang.insufficient_data": "數據不足，無法進行完整技術分析。",
+    "zhang.summary_bullish": "技術面呈現多頭格局，多項指標支持上漲，建議順勢操作。",
+    "zhang.summary_bearish": "技術面轉弱，多項指標顯示下跌風險，建議謹慎觀望。",
+    "zhang.summary_neutral": "技術面訊號混雜，建議等待明確方向再進場。",
+    "zhang.rsi_oversold": "RSI超賣({rsi:.1f})，反彈機會大",
+    "zhang.rsi_overbought": "RSI超買({rsi:.1f})，回檔風險高",
+    "zhang.rsi_neutral": "RSI中性({rsi:.1f})，市場平衡",
+    "zhang.rsi": "RSI為{rsi:.1f}",
+    "zhang.macd_golden": "MACD黃金交叉，多頭訊號",
+    "zhang.macd_death": "MACD死亡交叉，空頭訊號",
+    "zhang.hist_expand_up": "MACD柱狀圖擴大，動能增強",
+    "zhang.hist_expand_down": "MACD柱狀圖擴大，下跌動能增強",
+    "zhang.bb_lower": "價格觸及布林下軌(${lower:.2f})，超賣訊號",
+    "zhang.bb_upper": "價格觸及布林上軌(${upper:.2f})，超買訊號",
+    "zhang.bb_squeeze": "布林通道收斂({width:.1f}%)，醞釀突破",
+    "zhang.bb_expand": "布林通道擴張({width:.1f}%)，波動加劇",
+    "zhang.ma_bullish": "完美多頭排列，強勢上漲格局",
+    "zhang.ma_bearish": "完美空頭排列，弱勢下跌格局",
+    "zhang.above_ma20": "站穩月線之上，中期偏多",
+    "zhang.below_ma20": "跌破月線，中期偏空",
+    "zhang.volume_spike_up": "爆量上漲，買盤積極",
+    "zhang.volume_spike_down": "爆量下跌，賣壓沉重",
+    "zhang.volume_shrink": "成交量萎縮，觀望氣氛濃厚",
+    "zhang.near_support": "接近支撐位${support:.2f}，反彈機會高",
+    "zhang.near_resistance": "接近壓力位${resistance:.2f}，突破不易",
+
+    # 三大法人
+    "institutional.no_data": "缺乏三大法人數據，無法進行籌碼分析。",
+    "institutional.summary_bullish": "三大法人籌碼面呈現多頭格局，主力積極布局，建議跟隨法人腳步。",
+    "institutional.summary_bearish": "三大法人籌碼面轉弱，主力持續調節，建議謹慎觀望。",
+    "institutional.summary_neutral": "三大法人籌碼面中性，建議等待明確訊號。",
+    "institutional.foreign_buy_streak": "外資連續買超(5日:{d5:.0f}張, 10日:{d10:.0f}張, 20日:{d20:.0f}張)，多頭主力明確",
+    "institutional.foreign_turn_buy": "外資近期轉為買超(5日:{d5:.0f}張)，籌碼面改善",
+    "institutional.foreign_sell_streak": "外資持續賣超(5日:{d5:.0f}張, 10日:{d10:.0f}張, 20日:{d20:.0f}張)，籌碼面疲弱",
+    "institutional.foreign_turn_sell": "外資近期轉為賣超(5日:{d5:.0f}張)，需觀察後續動向",
+    "institutional.foreign_flat": "外資近期無明顯買賣動作",
+    "institutional.trust_accumulate": "投信積極布局(5日:{d5:.0f}張, 10日:{d10:.0f}張)，中期看好",
+    "institutional.trust_turn_buy": "投信開始買超(5日:{d5:.0f}張)，籌碼轉強",
+    "institutional.trust_sell_streak": "投信持續賣超(5日:{d5:.0f}張, 10日:{d10:.0f}張)，中期偏空",
+    "institutional.trust_sell": "投信近期賣超(5日:{d5:.0f}張)",
+    "institutional.dealer_buy": "自營商買超(5日:{d5:.0f}張)，短線偏多",
+    "institutional.dealer_sell": "自營商賣超(5日:{d5:.0f}張)，短線偏空",
+    "institutional.total_buy_streak": "三大法人合力買超(5日:{d5:.0f}張, 10日:{d10:.0f}張, 20日:{d20:.0f}張)，籌碼面極佳",
+    "institutional.total_buy": "三大法人合計買超(5日:{d5:.0f}張)，籌碼面轉強",
+    "institutional.total_sell_streak": "三大法人合計賣超(5日:{d5:.0f}張, 10日:{d10:.0f}張, 20日:{d20:.0f}張)，賣壓沉重",
+    "institutional.total_sell": "三大法人合計賣超(5日:{d5:.0f}張)",
+    "institutional.all_buy": "三大法人買盤一致，籌碼面高度樂觀",
+    "institutional.all_sell": "三大法人賣盤一致，籌碼面高度悲觀",
+    "institutional.divergent": "法人動向分歧，籌碼面中性",
+    "institutional.heavy_buy": "大量買超({total:.0f}張)，籌碼集中度提升",
+    "institutional.heavy_sell": "大量賣超({total:.0f}張)，籌碼鬆動",
+}
+
+# 語系 -> 訊息目錄；缺少的代碼退回預設語系
+CATALOGS = {"zh-TW": MESSAGES}
+DEFAULT_LOCALE = "zh-TW"
+
+
+def render_signal(code, params=None, locale=DEFAULT_LOCALE):
+    """單一規則命中 -> 文字；目錄中沒有的代碼直接顯示代碼，不會中斷報告"""
+    template = CATALOGS.get(locale, MESSAGES).get(code) or MESSAGES.get(code)
+    if template is None:
+        return code
+    return template.format(**(params or {}))
+
+
+def explain(analysis, locale=DEFAULT_LOCALE):
+    """
+    單一分析師結果的說明文字 (各命中訊息以空白串接，第一則為結論)。
+    已含 explanation 字串的舊版結果 (例如舊的 result_*.json) 直接回傳。
+    """
+    if 'signals' not in analysis:
+        return analysis.get('explanation', "")
+    return " ".join(render_signal(code, params, locale) for code, params in analysis['signals'])
+
+
+def with_explanations(result, locale=DEFAULT_LOCALE):
+    """替完整分析結果中的每位分析師補上 explanation 欄位 (就地修改並回傳)，供輸出給人閱讀的格式使用"""
+    for analysis in result.get('analysis', []):
+        analysis['explanation'] = explain(analysis, locale)
+    return result
@@ -0,0 +1,37 @@
+from dataclasses import dataclass, asdict
+
+
+@dataclass(slots=True, frozen=True)
+class Indicator:
+    """
+    分析師輸出的單一指標。
+    value 保留原始浮點數值，unit 為單位；signed 與 precision 僅為呈現層的格式提示，
+    實際的字串格式化由 utils.formatting 負責。
+    """
+    value: float
+    unit: str = ""
+    signed: bool = False
+    precision: int = 2
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def percent(value, signed=False, precision=1):
+    """百分比指標 (value 以百分比數值表示，例如 12.5 代表 12.5%)"""
+    return Indicator(float(value), "%", signed, precision)
+
+
+def price(value):
+    """價格類指標 (新台幣)"""
+    return Indicator(float(value), "元", False, 2)
+
+
+def lots(value):
+    """張數類指標 (買賣超)"""
+    return Indicator(float(value), "張", True, 0)
+
+
+def ratio(value, precision=2):
+    """無單位的比率或指數"""
+    return Indicator(float(value), "", False, precision)
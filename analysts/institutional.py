@@ -1,7 +1,13 @@
 import pandas as pd
 from .base_analyst import BaseAnalyst
+from .indicator import lots
 
 class InstitutionalAnalyst(BaseAnalyst):
+    requires_institutional = True
+    # 只分析法人買賣超，不讀取股價歷史
+    lookback_bars = 1
+    warmup_bars = 0
+
     def __init__(self):
         super().__init__("三大法人籌碼分析師")
 
@@ -14,7 +20,7 @@ class InstitutionalAnalyst(BaseAnalyst):
                 "analyst": self.name,
                 "score": 50,
                 "prediction": "觀望",
-                "explanation": "缺乏三大法人數據，無法進行籌碼分析。",
+                "signals": [("institutional.no_data", {})],
                 "indicators": {}
             }
 
@@ -45,65 +51,65 @@ class InstitutionalAnalyst(BaseAnalyst):
         
         # 評分系統
         score = 50
-        insights = []
+        signals = []
         
         # 1. 外資分析 (權重最高)
         if foreign_5 > 0:
             if foreign_10 > 0 and foreign_20 > 0:
                 score += 25
-                insights.append(f"外資連續買超(5日:{foreign_5:.0f}張, 10日:{foreign_10:.0f}張, 20日:{foreign_20:.0f}張)，多頭主力明確")
+                signals.append(("institutional.foreign_buy_streak", {"d5": foreign_5, "d10": foreign_10, "d20": foreign_20}))
             else:
                 score += 15
-                insights.append(f"外資近期轉為買超(5日:{foreign_5:.0f}張)，籌碼面改善")
+                signals.append(("institutional.foreign_turn_buy", {"d5": foreign_5}))
         elif foreign_5 < 0:
             if foreign_10 < 0 and foreign_20 < 0:
                 score -= 20
-                insights.append(f"外資持續賣超(5日:{foreign_5:.0f}張, 10日:{foreign_10:.0f}張, 20日:{foreign_20:.0f}張)，籌碼面疲弱")
+                signals.append(("institutional.foreign_sell_streak", {"d5": foreign_5, "d10": foreign_10, "d20": foreign_20}))
             else:
                 score -= 10
-                insights.append(f"外資近期轉為賣超(5日:{foreign_5:.0f}張)，需觀察後續動向")
+                signals.append(("institutional.foreign_turn_sell", {"d5": foreign_5}))
         else:
-            insights.append("外資近期無明顯買賣動作")
+            signals.append(("institutional.foreign_flat", {}))
         
         # 2. 投信分析 (中期指標)
         if it_5 > 0:
             if it_10 > 0:
                 score += 20
-                insights.append(f"投信積極布局(5日:{it_5:.0f}張, 10日:{it_10:.0f}張)，中期看好")
+                signals.append(("institutional.trust_accumulate", {"d5": it_5, "d10": it_10}))
             else:
                 score += 10
-                insights.append(f"投信開始買超(5日:{it_5:.0f}張)，籌碼轉強")
+                signals.append(("institutional.trust_turn_buy", {"d5": it_5}))
         elif it_5 < 0:
             if it_10 < 0:
                 score -= 15
-                insights.append(f"投信持續賣超(5日:{it_5:.0f}張, 10日:{it_10:.0f}張)，中期偏空")
+                signals.append(("institutional.trust_sell_streak", {"d5": it_5, "d10": it_10}))
             else:
                 score -= 5
-                insights.append(f"投信近期賣超(5日:{it_5:.0f}張)")
+                signals.append(("institutional.trust_sell", {"d5": it_5}))
         
         # 3. 自營商分析 (短期指標)
         if dealer_5 > 0:
             score += 10
-            insights.append(f"自營商買超(5日:{dealer_5:.0f}張)，短線偏多")
+            signals.append(("institutional.dealer_buy", {"d5": dealer_5}))
         elif dealer_5 < 0:
             score -= 5
-            insights.append(f"自營商賣超(5日:{dealer_5:.0f}張)，短線偏空")
+            signals.append(("institutional.dealer_sell", {"d5": dealer_5}))
         
         # 4. 三大法人合計分析
         if total_5 > 0:
             if total_10 > 0 and total_20 > 0:
                 score += 20
-                insights.append(f"三大法人合力買超(5日:{total_5:.0f}張, 10日:{total_10:.0f}張, 20日:{total_20:.0f}張)，籌碼面極佳")
+                signals.append(("institutional.total_buy_streak", {"d5": total_5, "d10": total_10, "d20": total_20}))
             else:
                 score += 10
-                insights.append(f"三大法人合計買超(5日:{total_5:.0f}張)，籌碼面轉強")
+                signals.append(("institutional.total_buy", {"d5": total_5}))
         elif total_5 < 0:
             if total_10 < 0 and total_20 < 0:
                 score -= 15
-                insights.append(f"三大法人合計賣超(5日:{total_5:.0f}張, 10日:{total_10:.0f}張, 20日:{total_20:.0f}張)，賣壓沉重")
+                signals.append(("institutional.total_sell_streak", {"d5": total_5, "d10": total_10, "d20": total_20}))
             else:
                 score -= 8
-                insights.append(f"三大法人合計賣超(5日:{total_5:.0f}張)")
+                signals.append(("institutional.total_sell", {"d5": total_5}))
         
         # 5. 籌碼趨勢一致性
         consistency_score = 0
@@ -116,21 +122,21 @@ class InstitutionalAnalyst(BaseAnalyst):
         
         if consistency_score == 3:
             score += 15
-            insights.append("三大法人買盤一致，籌碼面高度樂觀")
+            signals.append(("institutional.all_buy", {}))
         elif consistency_score == 0:
             score -= 10
-            insights.append("三大法人賣盤一致，籌碼面高度悲觀")
+            signals.append(("institutional.all_sell", {}))
         else:
-            insights.append("法人動向分歧，籌碼面中性")
+            signals.append(("institutional.divergent", {}))
         
         # 6. 買賣超強度分析
         if abs(total_5) > 1000:
             if total_5 > 0:
                 score += 10
-                insights.append(f"大量買超({total_5:.0f}張)，籌碼集中度提升")
+                signals.append(("institutional.heavy_buy", {"total": total_5}))
             else:
                 score -= 10
-                insights.append(f"大量賣超({abs(total_5):.0f}張)，籌碼鬆動")
+                signals.append(("institutional.heavy_sell", {"total": abs(total_5)}))
         
         # 限制分數範圍
         score = max(0, min(100, score))
@@ -138,70 +144,30 @@ class InstitutionalAnalyst(BaseAnalyst):
         # 生成專業建議
         if score >= 70:
             prediction = "看多"
-            summary = "三大法人籌碼面呈現多頭格局，主力積極布局，建議跟隨法人腳步。"
+            summary = "institutional.summary_bullish"
         elif score <= 40:
             prediction = "看空"
-            summary = "三大法人籌碼面轉弱，主力持續調節，建議謹慎觀望。"
+            summary = "institutional.summary_bearish"
         else:
             prediction = "觀望"
-            summary = "三大法人籌碼面中性，建議等待明確訊號。"
+            summary = "institutional.summary_neutral"
         
-        explanation = summary + " " + " ".join(insights)
+        signals.insert(0, (summary, {}))
         
         return {
             "analyst": self.name,
             "score": score,
             "prediction": prediction,
-            "explanation": explanation,
-            "indicators": {
-                "外資5日": f"{foreign_5:+.0f}張",
-                "外資10日": f"{foreign_10:+.0f}張",
-                "外資20日": f"{foreign_20:+.0f}張",
-                "投信5日": f"{it_5:+.0f}張",
-                "投信10日": f"{it_10:+.0f}張",
-                "自營商5日": f"{dealer_5:+.0f}張",
-                "合計5日": f"{total_5:+.0f}張",
-                "合計10日": f"{total_10:+.0f}張",
-                "合計20日": f"{total_20:+.0f}張"
-            }
-        }
-        
-        total_buy = foreign_buy + it_buy + dealer_buy
-        
-        score = 50
-        explanation = []
-        
-        if foreign_buy > 0:
-            score += 15
-            explanation.append("外資近期呈現買超趨勢。")
-        else:
-            score -= 10
-            explanation.append("外資近期呈現賣超，需留意。")
-            
-        if it_buy > 0:
-            score += 15
-            explanation.append("投信積極加碼，籌碼面看好。")
-        else:
-            explanation.append("投信動向不明。")
-            
-        if total_buy > 0:
-            score += 20
-            explanation.append("整體三大法人合力買超，支撐強勁。")
-        else:
-            score -= 10
-            explanation.append("法人整體賣壓較重。")
-            
-        # 限制分數在 0-100 之間
-        score = max(0, min(100, score))
-        
-        return {
-            "analyst": self.name,
-            "score": score,
-            "prediction": "看多" if score > 60 else ("看空" if score < 40 else "觀望"),
-            "explanation": " ".join(explanation),
+            "signals": signals,
             "indicators": {
-                "外資買賣": foreign_buy,
-                "投信買賣": it_buy,
-                "合計買賣": total_buy
+                "外資5日": lots(foreign_5),
+                "外資10日": lots(foreign_10),
+                "外資20日": lots(foreign_20),
+                "投信5日": lots(it_5),
+                "投信10日": lots(it_10),
+                "自營商5日": lots(dealer_5),
+                "合計5日": lots(total_5),
+                "合計10日": lots(total_10),
+                "合計20日": lots(total_20)
             }
         }
@@ -0,0 +1,252 @@
+"""
+技術指標的 NumPy 核心：輸入為 1-D (單一股票) 或 2-D (日期 × 股票面板) 的浮點陣列，
+時間軸為 axis 0，回傳相同形狀的 float64 陣列。
+
+缺值規則與 pandas 相同：
+- 滾動視窗 (sma / rolling_std / rolling_max / rolling_min) 在視窗內有效值不足 min_periods 時為 NaN；
+- ema 從每欄第一個有效值開始遞迴，中途的缺值略過並沿用前值 (等同 ewm(adjust=False, ignore_na=True))。
+以分塊的累積和或滑動視窗整段計算；欄數多的面板沿時間軸的累積改為逐列向量運算 (迴圈次數只有列數)。
+tests/test_kernels.py 會與 pandas 版本逐一比對，並涵蓋長序列與整段持平的數值。
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 區塊內 decay**-k 的上限 (e**230 ≈ 1e100)，避免長序列的指數溢位
+_MAX_EXPONENT = 230.0
+# 欄數達此值時，沿時間軸的累積 (cumsum、ema 遞迴) 改為逐列迴圈：
+# NumPy 沿 axis 0 累加寬陣列時是逐欄跨步存取，比逐列整段相加慢數倍
+_ROW_LOOP_MIN_COLUMNS = 128
+
+
+def _as_2d(x):
+    X = np.asarray(x, dtype=float)
+    if X.ndim == 1:
+        return X[:, None], True
+    return np.ascontiguousarray(X), False
+
+
+def _restore(Y, was_1d):
+    return Y[:, 0] if was_1d else Y
+
+
+def _accumulate(ufunc, A, axis=0):
+    """ufunc.accumulate(A, axis)；axis 之後的維度 (欄) 夠寬時逐列套用 ufunc，每列一次向量運算"""
+    if np.prod(A.shape[axis + 1:]) < _ROW_LOOP_MIN_COLUMNS:
+        return ufunc.accumulate(A, axis=axis)
+    A = np.moveaxis(A, axis, 0)
+    out = np.empty_like(A)
+    out[0] = A[0]
+    for t in range(1, len(A)):
+        ufunc(out[t - 1], A[t], out=out[t])
+    return np.moveaxis(out, 0, axis)
+
+
+def shift(x, periods=1):
+    """往後平移 periods 列 (前方補 NaN)，負數則往前平移 (後方補 NaN)，同 Series.shift"""
+    X, was_1d = _as_2d(x)
+    Y = np.full_like(X, np.nan)
+    if 0 <= periods < len(X):
+        Y[periods:] = X[:len(X) - periods]
+    elif -len(X) < periods < 0:
+        Y[:periods] = X[-periods:]
+    return _restore(Y, was_1d)
+
+
+def diff(x, periods=1):
+    X, was_1d = _as_2d(x)
+    return _restore(X - _as_2d(shift(X, periods))[0], was_1d)
+
+
+def _window_sums(X, window, powers=(1,)):
+    """
+    滾動視窗內有效值的個數與各次方和。先減去每欄的第一個有效值，
+    降低大數值 (股價、成交量) 相減時的精度損失。
+
+    累積和不跨越整段歷史：序列切成長度為 window 的區塊，只在區塊內累加，
+    視窗和 = 本區塊的前綴和 + (前一區塊的總和 - 前一區塊的前綴和)，
+    誤差只來自相鄰兩個區塊的值，不會隨序列長度累積。
+    """
+    valid = ~np.isnan(X)
+    moments = [valid]
+    offset = None
+    if powers:
+        first = np.argmax(valid, axis=0)
+        offset = np.where(valid.any(axis=0), X[first, np.arange(X.shape[1])], 0.0)
+        centered = np.where(valid, X - offset, 0.0)
+        moments += [centered ** p for p in powers]
+
+    T, n_columns = X.shape
+    n_blocks = -(-T // window)
+    blocks = np.zeros((len(moments), n_blocks * window, n_columns))
+    for k, m in enumerate(moments):
+        blocks[k, :T] = m
+    prefix = _accumulate(np.add, blocks.reshape(len(moments), n_blocks, window, n_columns), axis=2)
+    # 第 j 列的視窗延伸到前一區塊第 j+1 列之後
+    prefix[:, 1:, :-1] += prefix[:, :-1, -1:] - prefix[:, :-1, :-1]
+    sums = prefix.reshape(len(moments), -1, n_columns)[:, :T]
+    return sums[0], list(sums[1:]), offset
+
+
+def _flat_windows(X, window):
+    """
+    視窗內沒有缺值且全部相同的位置。以整數計數「與前一列不同」的次數 (缺值永遠算不同)，
+    不受捨入誤差影響；這些視窗的平均直接取該值、標準差為 0 (同 pandas)。
+    """
+    changed = np.ones(X.shape, dtype=np.int32)
+    changed[1:] = X[1:] != X[:-1]
+    C = _accumulate(np.add, changed)
+    # 視窗第一列與更早一列的差異不算；序列開頭的部分視窗從第 1 列起算
+    recent = C - 1
+    recent[window - 1:] = C[window - 1:] - C[:len(C) - window + 1]
+    return recent == 0
+
+
+def sma(x, window, min_periods=None):
+    """簡單移動平均，同 rolling(window, min_periods).mean()"""
+    X, was_1d = _as_2d(x)
+    min_periods = window if min_periods is None else min_periods
+    count, (s1,), offset = _window_sums(X, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s1 / count + offset
+    mean = np.where(_flat_windows(X, window), X, mean)
+    return _restore(np.where(count >= max(min_periods, 1), mean, np.nan), was_1d)
+
+
+def rolling_std(x, window, ddof=1, min_periods=None):
+    """滾動標準差 (預設樣本標準差)，同 rolling(window).std(ddof)"""
+    X, was_1d = _as_2d(x)
+    min_periods = window if min_periods is None else min_periods
+    count, (s1, s2), _ = _window_sums(X, window, powers=(1, 2))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 * s1 / count) / (count - ddof)
+    std = np.sqrt(np.maximum(var, 0.0))
+    std[_flat_windows(X, window)] = 0.0
+    return _restore(np.where((count >= max(min_periods, 1)) & (count > ddof), std, np.nan), was_1d)
+
+
+def _rolling_extreme(x, window, min_periods, reduce):
+    X, was_1d = _as_2d(x)
+    min_periods = window if min_periods is None else min_periods
+    padded = np.vstack([np.full((window - 1, X.shape[1]), np.nan), X])
+    # fmax / fmin 略過 NaN，只有整個視窗都缺值時才是 NaN
+    Y = reduce.reduce(sliding_window_view(padded, window, axis=0), axis=-1)
+    count, _, _ = _window_sums(X, window, powers=())
+    return _restore(np.where(count >= max(min_periods, 1), Y, np.nan), was_1d)
+
+
+def rolling_max(x, window, min_periods=None):
+    return _rolling_extreme(x, window, min_periods, np.fmax)
+
+
+def rolling_min(x, window, min_periods=None):
+    return _rolling_extreme(x, window, min_periods, np.fmin)
+
+
+def ema(x, span=None, alpha=None, min_periods=0):
+    """
+    指數移動平均，同 ewm(span=span 或 alpha=alpha, adjust=False, ignore_na=True).mean()。
+
+    y_t = d·y_{t-1} + α·x_t (d = 1 - α) 展開為 y_t = d^t·(y_0 + α·Σ x_k·d^-k)，
+    以累積和一次算出整段；每欄的 k 只計算有效值，因此缺值會被略過。
+    序列依 d^-k 不溢位的長度分塊，區塊之間以上一塊最後的值銜接。
+    欄數多的面板 (>= _ROW_LOOP_MIN_COLUMNS) 改為逐列套用遞迴式，迴圈次數只有列數。
+    """
+    X, was_1d = _as_2d(x)
+    alpha = 2.0 / (span + 1.0) if alpha is None else float(alpha)
+    decay = 1.0 - alpha
+    valid = ~np.isnan(X)
+
+    if decay > 0.0 and X.shape[1] >= _ROW_LOOP_MIN_COLUMNS:
+        Y = _ema_recursive(X, valid, alpha, decay)
+        # 遞迴在每欄第一個有效值之前即為 NaN，只有 min_periods > 1 才需要計數
+        if min_periods <= 1:
+            return _restore(Y, was_1d)
+    n_valid = _accumulate(np.add, valid.astype(int))
+    if decay <= 0.0:
+        Y = X.copy()
+    elif X.shape[1] < _ROW_LOOP_MIN_COLUMNS:
+        Y = _ema_blocked(X, valid, n_valid, alpha, decay)
+    return _restore(np.where(n_valid >= max(min_periods, 1), Y, np.nan), was_1d)
+
+
+def _ema_blocked(X, valid, n_valid, alpha, decay):
+    """閉式解：以每欄第一個有效值為初始狀態 (第一個輸出即等於該值)，逐塊累積和"""
+    first = np.argmax(valid, axis=0)
+    state = np.where(valid.any(axis=0), X[first, np.arange(X.shape[1])], np.nan)
+    block = max(int(_MAX_EXPONENT / -np.log(decay)), 1)
+    exponents = np.arange(min(block, len(X)) + 1)
+    grow_table, shrink_table = decay ** exponents, decay ** -exponents
+    Y = np.empty_like(X)
+    weighted = np.where(valid, X, 0.0) * alpha
+    for start in range(0, len(X), block):
+        stop = min(start + block, len(X))
+        k = n_valid[start:stop] - (n_valid[start - 1] if start else 0)
+        S = np.cumsum(weighted[start:stop] * shrink_table[k], axis=0)
+        Y[start:stop] = grow_table[k] * (state + S)
+        state = Y[stop - 1]
+    return Y
+
+
+def _ema_recursive(X, valid, alpha, decay):
+    """逐列 y = d·y + α·x；尚未有值的欄以第一個有效值起始，缺值列沿用前值"""
+    Y = np.empty_like(X)
+    state = np.full(X.shape[1], np.nan)
+    step = np.empty(X.shape[1])
+    for t in range(len(X)):
+        np.multiply(state, decay, out=step)
+        step += alpha * X[t]
+        np.copyto(step, X[t], where=np.isnan(state))
+        np.copyto(state, step, where=valid[t])
+        Y[t] = state
+    return Y
+
+
+def rsi(x, period=14, method="wilder"):
+    """
+    相對強弱指標。method="wilder" 以 Wilder 平滑 (ewm(alpha=1/period, adjust=False))；
+    method="sma" 以簡單平均，與分析師原本 rolling(period).mean() 的寫法一致。
+    第一根 K 線的漲跌視為 0 (同 delta.where(delta > 0, 0))。
+    """
+    delta = diff(x)
+    with np.errstate(invalid='ignore'):
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+    if method == "sma":
+        avg_gain, avg_loss = sma(gain, period), sma(loss, period)
+    elif method == "wilder":
+        avg_gain = ema(gain, alpha=1.0 / period, min_periods=period)
+        avg_loss = ema(loss, alpha=1.0 / period, min_periods=period)
+    else:
+        raise ValueError(f"未知的 RSI 計算方式: {method}")
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def macd(x, fast=12, slow=26, signal=9):
+    """回傳 (MACD 線, 訊號線, 柱狀體)"""
+    line = ema(x, span=fast) - ema(x, span=slow)
+    signal_line = ema(line, span=signal)
+    return line, signal_line, line - signal_line
+
+
+def true_range(high, low, close):
+    """真實波幅 max(高-低, |高-昨收|, |低-昨收|)；第一根 K 線沒有昨收時為高-低"""
+    prev_close = shift(close)
+    high, low = np.asarray(high, dtype=float), np.asarray(low, dtype=float)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period=14, method="sma"):
+    """平均真實波幅；method="sma" 為簡單平均，"wilder" 為 Wilder 平滑"""
+    tr = true_range(high, low, close)
+    if method == "wilder":
+        return ema(tr, alpha=1.0 / period, min_periods=period)
+    return sma(tr, period)
+
+
+def bollinger(x, period=20, num_std=2):
+    """回傳 (上軌, 中軌, 下軌)，標準差為樣本標準差 (同 rolling().std())"""
+    middle = sma(x, period)
+    width = rolling_std(x, period) * num_std
+    return middle + width, middle, middle - width
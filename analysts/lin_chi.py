@@ -1,10 +1,119 @@
 import pandas as pd
 import numpy as np
 from .base_analyst import BaseAnalyst
+from .indicator import percent, price
+from . import kernels
 
 class LinChiAnalyst(BaseAnalyst):
-    def __init__(self):
+    # 評分門檻 (可由 config.yaml 的 analysts.lin_chi.params 覆寫，或由參數掃描調整)
+    DEFAULT_PARAMS = {
+        "bullish_score": 70,     # 評分 >= 此值為看多
+        "bearish_score": 40,     # 評分 <= 此值為看空
+        "ma_spread": 5,          # 均線發散度門檻 (%)
+        "momentum_short": 3,     # 5 日動能門檻 (%)
+        "momentum_medium": 5,    # 20 日動能門檻 (%)
+        "momentum_long": 15,     # 60 日動能門檻 (%)
+        "volatility_low": 20,    # 低波動率門檻 (年化 %)
+        "volatility_high": 40,   # 高波動率門檻 (年化 %)
+        "channel_high": 80,      # 通道頂部門檻 (%)
+        "channel_low": 20,       # 通道底部門檻 (%)
+        "volume_trend": 20,      # 量能變化門檻 (%)
+    }
+    # 影響指標欄位本身的參數 (本分析師沒有，全部為門檻)
+    INDICATOR_PARAMS = ()
+    # 最新一根 K 線的指標；60 日動能需要往前 60 根
+    lookback_bars = 1
+    warmup_bars = 60
+
+    def __init__(self, params=None):
         super().__init__("趨勢動能分析師 (林奇)")
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
+
+    @staticmethod
+    def compute_indicators(df, params=None):
+        """
+        計算全部歷史的指標欄位 (每列對應一個交易日)，供 analyze 與回測共用。
+        """
+        close = df['close'].to_numpy(dtype=float)
+        high = df['high'].to_numpy(dtype=float)
+        low = df['low'].to_numpy(dtype=float)
+        vol = df['vol'].to_numpy(dtype=float)
+        ind = pd.DataFrame(index=df.index)
+        ind['close'] = close
+
+        # 計算多週期均線
+        ind['ma5'] = kernels.sma(close, 5)
+        ind['ma10'] = kernels.sma(close, 10)
+        ind['ma20'] = kernels.sma(close, 20)
+        ind['ma60'] = kernels.sma(close, 60)
+
+        # 計算動能指標
+        ind['momentum_5'] = (close / kernels.shift(close, 5) - 1) * 100
+        ind['momentum_20'] = (close / kernels.shift(close, 20) - 1) * 100
+        ind['momentum_60'] = (close / kernels.shift(close, 60) - 1) * 100
+
+        # 計算價格波動率
+        returns = close / kernels.shift(close) - 1
+        ind['volatility_20'] = kernels.rolling_std(returns, 20) * np.sqrt(252) * 100
+
+        # 計算趨勢強度 (ADX概念)
+        ind['atr'] = kernels.atr(high, low, close, 14)
+
+        # 計算價格通道
+        highest_20 = kernels.rolling_max(high, 20)
+        lowest_20 = kernels.rolling_min(low, 20)
+        ind['channel_position'] = (close - lowest_20) / (highest_20 - lowest_20) * 100
+
+        # 成交量趨勢
+        ind['vol_trend'] = (kernels.sma(vol, 5) / kernels.sma(vol, 20) - 1) * 100
+        return ind
+
+    @staticmethod
+    def score_series(ind, params):
+        """
+        以向量化方式計算每個交易日的評分，規則與 analyze 相同。
+        """
+        p = params
+        ma5, ma10, ma20, ma60 = (ind[c].to_numpy() for c in ('ma5', 'ma10', 'ma20', 'ma60'))
+        close = ind['close'].to_numpy()
+        m5, m20, m60 = (ind[c].to_numpy() for c in ('momentum_5', 'momentum_20', 'momentum_60'))
+        vol = ind['volatility_20'].to_numpy()
+        channel = ind['channel_position'].to_numpy()
+        vol_trend = ind['vol_trend'].to_numpy()
+
+        score = np.full(len(ind), 50.0)
+
+        # 1. 均線排列
+        bull = (ma5 > ma10) & (ma10 > ma20) & (ma20 > ma60)
+        bear = ~bull & (ma5 < ma10) & (ma10 < ma20) & (ma20 < ma60)
+        mixed = ~bull & ~bear
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread_up = (ma5 - ma60) / ma60 * 100
+            spread_down = (ma60 - ma5) / ma60 * 100
+        score += np.where(bull, 25 + np.where(spread_up > p['ma_spread'], 10, 0), 0)
+        score -= np.where(bear, 25 + np.where(spread_down > p['ma_spread'], 10, 0), 0)
+        score += np.where(mixed, np.where(close > ma20, 5, -5), 0)
+
+        # 2. 動能
+        strong = (m5 > p['momentum_short']) & (m20 > p['momentum_medium'])
+        weak = ~strong & (m5 < -p['momentum_short']) & (m20 < -p['momentum_medium'])
+        score += np.where(strong, 15, 0) - np.where(weak, 15, 0)
+        score += np.where(m60 > p['momentum_long'], 10, np.where(m60 < -p['momentum_long'], -10, 0))
+
+        # 3. 波動率
+        score += np.where(vol < p['volatility_low'], 5, np.where(vol > p['volatility_high'], -5, 0))
+
+        # 4. 價格通道位置
+        score += np.where(channel > p['channel_high'], 10, np.where(channel < p['channel_low'], -10, 0))
+
+        # 5. 成交量趨勢配合
+        score += np.where(vol_trend > p['volume_trend'], np.where(m5 > 0, 10, -5), 0)
+
+        # 6. 趨勢一致性
+        consistency = (m5 > 0).astype(int) + (m20 > 0) + (m60 > 0)
+        score += np.where(consistency == 3, 10, np.where(consistency == 0, -10, 0))
+
+        return np.clip(score, 0, 100)
 
     def analyze(self, data):
         """
@@ -15,50 +124,31 @@ class LinChiAnalyst(BaseAnalyst):
                 "analyst": self.name,
                 "score": 50,
                 "prediction": "觀望",
-                "explanation": "數據不足，無法進行趨勢分析。",
+                "signals": [("lin_chi.insufficient_data", {})],
                 "indicators": {}
             }
 
         df = data.copy()
         df = df.sort_values('date')
-        
-        current_price = df['close'].iloc[-1]
-        
-        # 計算多週期均線
-        ma5 = df['close'].rolling(5).mean()
-        ma10 = df['close'].rolling(10).mean()
-        ma20 = df['close'].rolling(20).mean()
-        ma60 = df['close'].rolling(60).mean()
-        
-        # 計算動能指標
-        momentum_5 = (df['close'] / df['close'].shift(5) - 1) * 100
-        momentum_20 = (df['close'] / df['close'].shift(20) - 1) * 100
-        momentum_60 = (df['close'] / df['close'].shift(60) - 1) * 100
-        
-        # 計算價格波動率
-        returns = df['close'].pct_change()
-        volatility_20 = returns.rolling(20).std() * np.sqrt(252) * 100
-        
-        # 計算趨勢強度 (ADX概念)
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr = true_range.rolling(14).mean()
-        
-        # 計算價格通道
-        highest_20 = df['high'].rolling(20).max()
-        lowest_20 = df['low'].rolling(20).min()
-        channel_position = (current_price - lowest_20.iloc[-1]) / (highest_20.iloc[-1] - lowest_20.iloc[-1]) * 100
-        
-        # 成交量趨勢
-        vol_ma5 = df['vol'].rolling(5).mean()
-        vol_ma20 = df['vol'].rolling(20).mean()
-        vol_trend = (vol_ma5.iloc[-1] / vol_ma20.iloc[-1] - 1) * 100
+        p = self.params
+
+        ind = self.compute_indicators(df, p)
+        last = ind.iloc[-1]
+        current_price = last['close']
+        ma5 = ind['ma5']
+        ma10 = ind['ma10']
+        ma20 = ind['ma20']
+        ma60 = ind['ma60']
+        momentum_5 = ind['momentum_5']
+        momentum_20 = ind['momentum_20']
+        momentum_60 = ind['momentum_60']
+        volatility_20 = ind['volatility_20']
+        channel_position = last['channel_position']
+        vol_trend = last['vol_trend']
         
         # 評分系統
         score = 50
-        insights = []
+        signals = []
         
         # 1. 均線趨勢評估
         ma5_val = ma5.iloc[-1]
@@ -69,79 +159,79 @@ class LinChiAnalyst(BaseAnalyst):
         # 多頭排列檢查
         if ma5_val > ma10_val > ma20_val > ma60_val:
             score += 25
-            insights.append("均線呈現完美多頭排列，趨勢強勁向上")
+            signals.append(("lin_chi.ma_bullish", {}))
             
             # 檢查均線間距（趨勢強度）
             ma_spread = (ma5_val - ma60_val) / ma60_val * 100
-            if ma_spread > 5:
+            if ma_spread > p['ma_spread']:
                 score += 10
-                insights.append(f"均線發散度{ma_spread:.1f}%，上升動能強勁")
+                signals.append(("lin_chi.ma_spread_up", {"spread": ma_spread}))
         elif ma5_val < ma10_val < ma20_val < ma60_val:
             score -= 25
-            insights.append("均線呈現完美空頭排列，趨勢明顯向下")
+            signals.append(("lin_chi.ma_bearish", {}))
             
             ma_spread = (ma60_val - ma5_val) / ma60_val * 100
-            if ma_spread > 5:
+            if ma_spread > p['ma_spread']:
                 score -= 10
-                insights.append(f"均線發散度{ma_spread:.1f}%，下跌動能強勁")
+                signals.append(("lin_chi.ma_spread_down", {"spread": ma_spread}))
         else:
             # 混亂排列
             if current_price > ma20_val:
                 score += 5
-                insights.append("價格站穩月線，中期趨勢偏多")
+                signals.append(("lin_chi.above_ma20", {}))
             else:
                 score -= 5
-                insights.append("價格跌破月線，中期趨勢偏空")
+                signals.append(("lin_chi.below_ma20", {}))
         
         # 2. 動能分析
         current_momentum_5 = momentum_5.iloc[-1]
         current_momentum_20 = momentum_20.iloc[-1]
         current_momentum_60 = momentum_60.iloc[-1]
         
-        if current_momentum_5 > 3 and current_momentum_20 > 5:
+        if current_momentum_5 > p['momentum_short'] and current_momentum_20 > p['momentum_medium']:
             score += 15
-            insights.append(f"短中期動能強勁(5日:{current_momentum_5:.1f}%, 20日:{current_momentum_20:.1f}%)")
-        elif current_momentum_5 < -3 and current_momentum_20 < -5:
+            signals.append(("lin_chi.momentum_strong", {"momentum_5": current_momentum_5, "momentum_20": current_momentum_20}))
+        elif current_momentum_5 < -p['momentum_short'] and current_momentum_20 < -p['momentum_medium']:
             score -= 15
-            insights.append(f"短中期動能疲弱(5日:{current_momentum_5:.1f}%, 20日:{current_momentum_20:.1f}%)")
+            signals.append(("lin_chi.momentum_weak", {"momentum_5": current_momentum_5, "momentum_20": current_momentum_20}))
         
         # 長期動能
-        if current_momentum_60 > 15:
+        if current_momentum_60 > p['momentum_long']:
             score += 10
-            insights.append(f"長期趨勢強勁(60日漲幅{current_momentum_60:.1f}%)")
-        elif current_momentum_60 < -15:
+            signals.append(("lin_chi.long_strong", {"momentum_60": current_momentum_60}))
+        elif current_momentum_60 < -p['momentum_long']:
             score -= 10
-            insights.append(f"長期趨勢疲弱(60日跌幅{abs(current_momentum_60):.1f}%)")
+            signals.append(("lin_chi.long_weak", {"momentum_60": abs(current_momentum_60)}))
         
         # 3. 波動率分析
         current_volatility = volatility_20.iloc[-1]
-        if current_volatility < 20:
+        if current_volatility < p['volatility_low']:
             score += 5
-            insights.append(f"波動率低({current_volatility:.1f}%)，趨勢穩定")
-        elif current_volatility > 40:
+            signals.append(("lin_chi.volatility_low", {"volatility": current_volatility}))
+        elif current_volatility > p['volatility_high']:
             score -= 5
-            insights.append(f"波動率高({current_volatility:.1f}%)，市場不穩定")
+            signals.append(("lin_chi.volatility_high", {"volatility": current_volatility}))
         
         # 4. 價格通道位置
-        if channel_position > 80:
+        if channel_position > p['channel_high']:
             score += 10
-            insights.append(f"價格位於通道頂部({channel_position:.1f}%)，強勢格局")
-        elif channel_position < 20:
+            signals.append(("lin_chi.channel_top", {"channel": channel_position}))
+        elif channel_position < p['channel_low']:
             score -= 10
-            insights.append(f"價格位於通道底部({channel_position:.1f}%)，弱勢格局")
+            signals.append(("lin_chi.channel_bottom", {"channel": channel_position}))
         else:
-            insights.append(f"價格位於通道中段({channel_position:.1f}%)")
+            signals.append(("lin_chi.channel_mid", {"channel": channel_position}))
         
         # 5. 成交量趨勢配合
-        if vol_trend > 20:
+        if vol_trend > p['volume_trend']:
             if current_momentum_5 > 0:
                 score += 10
-                insights.append(f"量價齊揚(量增{vol_trend:.1f}%)，多頭氣盛")
+                signals.append(("lin_chi.volume_price_up", {"volume_trend": vol_trend}))
             else:
                 score -= 5
-                insights.append(f"量增價跌(量增{vol_trend:.1f}%)，賣壓沉重")
-        elif vol_trend < -20:
-            insights.append(f"成交量萎縮({abs(vol_trend):.1f}%)，市場觀望")
+                signals.append(("lin_chi.volume_price_down", {"volume_trend": vol_trend}))
+        elif vol_trend < -p['volume_trend']:
+            signals.append(("lin_chi.volume_shrink", {"volume_trend": abs(vol_trend)}))
         
         # 6. 趨勢一致性檢查
         trend_consistency = 0
@@ -154,44 +244,44 @@ class LinChiAnalyst(BaseAnalyst):
         
         if trend_consistency == 3:
             score += 10
-            insights.append("短中長期趨勢一致向上，趨勢可靠度高")
+            signals.append(("lin_chi.trend_all_up", {}))
         elif trend_consistency == 0:
             score -= 10
-            insights.append("短中長期趨勢一致向下，跌勢明確")
+            signals.append(("lin_chi.trend_all_down", {}))
         else:
-            insights.append("多週期趨勢不一致，方向尚未明朗")
+            signals.append(("lin_chi.trend_mixed", {}))
         
         # 限制分數範圍
         score = max(0, min(100, score))
         
         # 生成專業建議
-        if score >= 70:
+        if score >= p['bullish_score']:
             prediction = "看多"
-            summary = "趨勢分析顯示多頭格局明確，動能強勁，建議順勢做多。"
-        elif score <= 40:
+            summary = "lin_chi.summary_bullish"
+        elif score <= p['bearish_score']:
             prediction = "看空"
-            summary = "趨勢分析顯示空頭格局，動能疲弱，建議迴避或做空。"
+            summary = "lin_chi.summary_bearish"
         else:
             prediction = "觀望"
-            summary = "趨勢方向不明確，建議等待趨勢確立後再進場。"
+            summary = "lin_chi.summary_neutral"
         
-        explanation = summary + " " + " ".join(insights)
+        signals.insert(0, (summary, {}))
         
         return {
             "analyst": self.name,
             "score": score,
             "prediction": prediction,
-            "explanation": explanation,
+            "signals": signals,
             "indicators": {
-                "5日動能": f"{current_momentum_5:+.2f}%",
-                "20日動能": f"{current_momentum_20:+.2f}%",
-                "60日動能": f"{current_momentum_60:+.2f}%",
-                "波動率": f"{current_volatility:.1f}%",
-                "通道位置": f"{channel_position:.1f}%",
-                "MA5": round(ma5_val, 2),
-                "MA10": round(ma10_val, 2),
-                "MA20": round(ma20_val, 2),
-                "MA60": round(ma60_val, 2),
-                "成交量趨勢": f"{vol_trend:+.1f}%"
+                "5日動能": percent(current_momentum_5, signed=True, precision=2),
+                "20日動能": percent(current_momentum_20, signed=True, precision=2),
+                "60日動能": percent(current_momentum_60, signed=True, precision=2),
+                "波動率": percent(current_volatility),
+                "通道位置": percent(channel_position),
+                "MA5": price(ma5_val),
+                "MA10": price(ma10_val),
+                "MA20": price(ma20_val),
+                "MA60": price(ma60_val),
+                "成交量趨勢": percent(vol_trend, signed=True)
             }
         }
@@ -0,0 +1,56 @@
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 設定檔鍵值 -> "模組:類別"，僅在分析師啟用時才匯入，停用的分析師不會產生任何匯入成本
+ANALYST_REGISTRY = {
+    "chen_mingxian": "analysts.chen_mingxian:ChenMingxianAnalyst",
+    "lin_chi": "analysts.lin_chi:LinChiAnalyst",
+    "buffett": "analysts.buffett:BuffettAnalyst",
+    "xu_xiaoping": "analysts.xu_xiaoping:XuXiaopingAnalyst",
+    "zhang_tianhao": "analysts.zhang_tianhao:ZhangTianhaoAnalyst",
+    "institutional": "analysts.institutional:InstitutionalAnalyst",
+}
+
+
+class AnalystRegistry:
+    """
+    依照 config.yaml 的 analysts 區段建立分析師。
+
+    每個分析師可設定 enabled (預設 true) 與 weight (預設 1.0)；
+    include / exclude 可在特定情境 (例如儀表板) 臨時挑選或排除分析師。
+    """
+    def __init__(self, analyst_config=None):
+        self.config = analyst_config or {}
+
+    def enabled_keys(self, include=None, exclude=None):
+        keys = []
+        for key, settings in self.config.items():
+            settings = settings or {}
+            if key not in ANALYST_REGISTRY:
+                logger.warning(f"未知的分析師設定: {key}")
+                continue
+            if not settings.get("enabled", True):
+                continue
+            if include is not None and key not in include:
+                continue
+            if exclude is not None and key in exclude:
+                continue
+            keys.append(key)
+        return keys
+
+    def weight(self, key):
+        return float((self.config.get(key) or {}).get("weight", 1.0))
+
+    def create(self, key):
+        module_name, class_name = ANALYST_REGISTRY[key].split(":")
+        analyst_cls = getattr(importlib.import_module(module_name), class_name)
+        params = (self.config.get(key) or {}).get("params")
+        analyst = analyst_cls(params=params) if hasattr(analyst_cls, "DEFAULT_PARAMS") else analyst_cls()
+        analyst.key = key
+        analyst.weight = self.weight(key)
+        return analyst
+
+    def build(self, include=None, exclude=None):
+        return [self.create(key) for key in self.enabled_keys(include, exclude)]
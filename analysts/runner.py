@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK = "ok"
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+
+class AnalystRunner:
+    """
+    以執行緒池並行執行分析師，並為每位分析師套用時間預算。
+
+    逾時或出錯的分析師會回傳中性的替代結果 (status 標示原因)，
+    其餘分析師的結果照常回傳，因此單一分析師卡住不會拖垮整個請求。
+    Python 無法強制中止執行中的執行緒，逾時的分析師會在背景自行結束，
+    但不再阻塞呼叫端。
+
+    時間預算從分析師實際開始執行時起算；max_workers 小於分析師數而需排隊時，
+    排隊時間不計入預算。排隊等候的上限為排在前面 (含自己) 的分析師預算總和，
+    超過仍未開始 (例如前面的分析師逾時後仍佔著執行緒) 則視為逾時。
+    """
+    def __init__(self, timeout=10.0, timeouts=None, max_workers=None):
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self.max_workers = max_workers
+
+    @classmethod
+    def from_config(cls, config):
+        """由 config.yaml 的 runner 區段與 analysts.<key>.timeout 建立"""
+        runner_config = config.get('runner') or {}
+        timeouts = {}
+        for key, settings in (config.get('analysts') or {}).items():
+            if (settings or {}).get('timeout') is not None:
+                timeouts[key] = float(settings['timeout'])
+        return cls(
+            timeout=float(runner_config.get('timeout', 10.0)),
+            timeouts=timeouts,
+            max_workers=runner_config.get('max_workers')
+        )
+
+    def budget(self, analyst):
+        return self.timeouts.get(analyst.key, self.timeout)
+
+    def _call(self, analyst, price_data, inst_data, on_start=None):
+        started = time.perf_counter()
+        if on_start is not None:
+            on_start(started)
+        # 每位分析師只看到自己宣告的歷史長度，結果不受其他分析師需要的資料量影響
+        if price_data is not None:
+            price_data = price_data.tail(analyst.required_bars)
+        if analyst.requires_institutional:
+            result = analyst.analyze(price_data, institutional_data=inst_data)
+        else:
+            result = analyst.analyze(price_data)
+        result['elapsed'] = round(time.perf_counter() - started, 3)
+        return result
+
+    def _fallback(self, analyst, status, signal, elapsed):
+        return {
+            "analyst": analyst.name,
+            "key": analyst.key,
+            "score": 50,
+            "prediction": "觀望",
+            "signals": [signal],
+            "indicators": {},
+            "status": status,
+            "elapsed": round(elapsed, 3)
+        }
+
+    def run(self, analysts, price_data, inst_data=None):
+        if not analysts:
+            return []
+
+        workers = self.max_workers or len(analysts)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyst")
+        start = time.perf_counter()
+        started_at = {}
+        began = [threading.Event() for _ in analysts]
+
+        def on_start(i):
+            def mark(t):
+                started_at[i] = t
+                began[i].set()
+            return mark
+
+        futures = [(analyst, executor.submit(self._call, analyst, price_data, inst_data, on_start(i)))
+                   for i, analyst in enumerate(analysts)]
+
+        results = []
+        queue_deadline = start
+        try:
+            for i, (analyst, future) in enumerate(futures):
+                budget = self.budget(analyst)
+                queue_deadline += budget
+                # 預算從實際開始執行時起算；排隊超過上限仍未開始則直接視為逾時
+                if began[i].wait(timeout=max(queue_deadline - time.perf_counter(), 0)):
+                    remaining = started_at[i] + budget - time.perf_counter()
+                else:
+                    remaining = 0
+                try:
+                    result = future.result(timeout=max(remaining, 0))
+                    result['key'] = analyst.key
+                    result['status'] = STATUS_OK
+                except FutureTimeoutError:
+                    future.cancel()
+                    elapsed = time.perf_counter() - started_at.get(i, start)
+                    logger.warning(f"分析師 {analyst.name} 執行逾時 ({budget} 秒)")
+                    result = self._fallback(analyst, STATUS_TIMEOUT, ("runner.timeout", {}), elapsed)
+                except Exception as e:
+                    elapsed = time.perf_counter() - started_at.get(i, start)
+                    logger.error(f"分析師 {analyst.name} 執行出錯: {e}")
+                    result = self._fallback(analyst, STATUS_ERROR, ("runner.error", {"error": str(e)}), elapsed)
+                results.append(result)
+        finally:
+            # 不等待逾時中的執行緒，讓呼叫端可以立即返回
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
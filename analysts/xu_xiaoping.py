@@ -1,7 +1,13 @@
 import numpy as np
 from .base_analyst import BaseAnalyst
+from .indicator import percent, ratio
+from portfolio.risk_engine import sharpe_ratio, max_drawdown
 
 class XuXiaopingAnalyst(BaseAnalyst):
+    # 夏普比率與最大回撤以近一年的日報酬計算
+    lookback_bars = 252
+    warmup_bars = 0
+
     def __init__(self):
         super().__init__("徐小萍")
 
@@ -9,35 +15,39 @@ class XuXiaopingAnalyst(BaseAnalyst):
         """
         量化分析：風險與回撤
         """
+        if data is None or data.empty or len(data) < 2:
+            return {
+                "analyst": self.name,
+                "score": 50,
+                "prediction": "觀望",
+                "signals": [("xu.insufficient_data", {})],
+                "indicators": {}
+            }
+
         df = data.copy()
         returns = df['close'].pct_change().dropna()
         
-        # 計算夏普比率 (假設無風險利率 0)
-        sharpe = (returns.mean() / returns.std()) * np.sqrt(252) if returns.std() != 0 else 0
-        
-        # 計算最大回撤
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.cummax()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min()
+        # 夏普比率 (假設無風險利率 0) 與最大回撤，與投資組合風險引擎共用計算
+        sharpe = sharpe_ratio(returns.to_numpy())
+        max_drawdown_value = max_drawdown(returns.to_numpy())
         
         score = 50
-        explanation = [f"基於量化回測，夏普比率為 {sharpe:.2f}。"]
+        signals = [("xu.sharpe", {"sharpe": sharpe})]
         
-        if max_drawdown > -0.15:
+        if max_drawdown_value > -0.15:
             score += 30
-            explanation.append(f"最大回撤僅 {max_drawdown*100:.1f}%，風險控制極佳。")
+            signals.append(("xu.drawdown_low", {"max_drawdown": max_drawdown_value * 100}))
         else:
             score -= 20
-            explanation.append(f"最大回撤達 {max_drawdown*100:.1f}%，波動風險較大。")
+            signals.append(("xu.drawdown_high", {"max_drawdown": max_drawdown_value * 100}))
             
         return {
             "analyst": self.name,
             "score": score,
             "prediction": "風險平衡" if score > 60 else "高風險低報酬",
-            "explanation": " ".join(explanation),
+            "signals": signals,
             "indicators": {
-                "Sharpe": sharpe,
-                "MaxDrawdown": max_drawdown
+                "Sharpe": ratio(sharpe),
+                "MaxDrawdown": percent(max_drawdown_value * 100)
             }
         }
@@ -1,36 +1,119 @@
 import pandas as pd
 import numpy as np
 from .base_analyst import BaseAnalyst
+from .indicator import price, ratio
+from . import kernels
 
 class ZhangTianhaoAnalyst(BaseAnalyst):
-    def __init__(self):
+    # 指標參數與評分門檻 (可由 config.yaml 的 analysts.zhang_tianhao.params 覆寫，或由參數掃描調整)
+    DEFAULT_PARAMS = {
+        "rsi_period": 14,
+        "rsi_oversold": 30,
+        "rsi_overbought": 70,
+        "bb_period": 20,
+        "bb_std": 2,
+        "volume_spike": 1.5,     # 爆量倍數 (相對 5 日均量)
+        "sr_distance": 2,        # 接近支撐/壓力的距離門檻 (%)
+        "bullish_score": 70,
+        "bearish_score": 40,
+    }
+    # 會改變指標欄位的參數；參數掃描時相同組合的指標只計算一次
+    INDICATOR_PARAMS = ("rsi_period", "bb_period", "bb_std")
+    # 比較最新與前一根 K 線；MACD 的 EMA(26) 約需 4 倍週期才會收斂
+    lookback_bars = 2
+    EMA_WARMUP_BARS = 100
+
+    def __init__(self, params=None):
         super().__init__("技術分析專家 (張天豪)")
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
+
+    @property
+    def warmup_bars(self):
+        return max(self.EMA_WARMUP_BARS, 60, self.params['bb_period'], self.params['rsi_period'] + 1)
 
     def calculate_rsi(self, prices, period=14):
-        """計算RSI指標"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        """計算RSI指標 (簡單平均版本)"""
+        return pd.Series(kernels.rsi(prices.to_numpy(), period, method="sma"), index=prices.index)
 
     def calculate_macd(self, prices):
         """計算MACD指標"""
-        ema12 = prices.ewm(span=12, adjust=False).mean()
-        ema26 = prices.ewm(span=26, adjust=False).mean()
-        macd = ema12 - ema26
-        signal = macd.ewm(span=9, adjust=False).mean()
-        histogram = macd - signal
-        return macd, signal, histogram
+        return tuple(pd.Series(a, index=prices.index) for a in kernels.macd(prices.to_numpy()))
 
     def calculate_bollinger_bands(self, prices, period=20, std_dev=2):
         """計算布林通道"""
-        sma = prices.rolling(window=period).mean()
-        std = prices.rolling(window=period).std()
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
-        return upper_band, sma, lower_band
+        return tuple(pd.Series(a, index=prices.index) for a in kernels.bollinger(prices.to_numpy(), period, std_dev))
+
+    def compute_indicators(self, df, params=None):
+        """
+        計算全部歷史的指標欄位 (每列對應一個交易日)，供 analyze 與回測共用。
+        """
+        p = {**self.DEFAULT_PARAMS, **(params or {})}
+        close = df['close'].to_numpy(dtype=float)
+        vol = df['vol'].to_numpy(dtype=float)
+        ind = pd.DataFrame(index=df.index)
+        ind['close'] = close
+        ind['prev_close'] = kernels.shift(close)
+
+        ind['rsi'] = kernels.rsi(close, p['rsi_period'], method="sma")
+        ind['macd'], ind['macd_signal'], ind['macd_hist'] = kernels.macd(close)
+        ind['prev_hist'] = np.nan_to_num(kernels.shift(ind['macd_hist'].to_numpy()))
+        ind['bb_upper'], ind['bb_middle'], ind['bb_lower'] = kernels.bollinger(close, p['bb_period'], p['bb_std'])
+
+        # 支撐壓力位 (近 20 日高低點)
+        ind['recent_high'] = kernels.rolling_max(df['high'].to_numpy(dtype=float), 20, min_periods=1)
+        ind['recent_low'] = kernels.rolling_min(df['low'].to_numpy(dtype=float), 20, min_periods=1)
+
+        # 均線系統
+        ind['ma5'] = kernels.sma(close, 5)
+        ind['ma10'] = kernels.sma(close, 10)
+        ind['ma20'] = kernels.sma(close, 20)
+        ind['ma60'] = kernels.sma(close, 60)
+
+        # 成交量
+        ind['vol'] = vol
+        ind['vol_ma5'] = kernels.sma(vol, 5)
+        ind['vol_ma20'] = kernels.sma(vol, 20)
+        return ind
+
+    def score_series(self, ind, params):
+        """
+        以向量化方式計算每個交易日的評分，規則與 analyze 相同。
+        """
+        p = params
+        close = ind['close'].to_numpy()
+        rsi = ind['rsi'].to_numpy()
+        macd, sig, hist, prev_hist = (ind[c].to_numpy() for c in ('macd', 'macd_signal', 'macd_hist', 'prev_hist'))
+        upper, lower = ind['bb_upper'].to_numpy(), ind['bb_lower'].to_numpy()
+        ma5, ma10, ma20, ma60 = (ind[c].to_numpy() for c in ('ma5', 'ma10', 'ma20', 'ma60'))
+        vol, vol_ma5 = ind['vol'].to_numpy(), ind['vol_ma5'].to_numpy()
+
+        score = np.full(len(ind), 50.0)
+
+        # 1. RSI
+        score += np.where(rsi < p['rsi_oversold'], 20, np.where(rsi > p['rsi_overbought'], -15, 0))
+
+        # 2. MACD
+        score += np.where((macd > sig) & (hist > 0), 15, np.where((macd < sig) & (hist < 0), -15, 0))
+        score += np.where((hist > prev_hist) & (hist > 0), 5, np.where((hist < prev_hist) & (hist < 0), -5, 0))
+
+        # 3. 布林通道
+        score += np.where(close < lower, 15, np.where(close > upper, -10, 0))
+
+        # 4. 均線系統
+        bull = (close > ma5) & (ma5 > ma10) & (ma10 > ma20) & (ma20 > ma60)
+        bear = (close < ma5) & (ma5 < ma10) & (ma10 < ma20) & (ma20 < ma60)
+        score += np.where(bull, 20, np.where(bear, -20, np.where(close > ma20, 10, np.where(close < ma20, -10, 0))))
+
+        # 5. 爆量
+        up_day = close > ind['prev_close'].to_numpy()
+        score += np.where(vol > vol_ma5 * p['volume_spike'], np.where(up_day, 10, -10), 0)
+
+        # 6. 支撐壓力
+        distance_to_low = (close - ind['recent_low'].to_numpy()) / close * 100
+        distance_to_high = (ind['recent_high'].to_numpy() - close) / close * 100
+        score += np.where(distance_to_low < p['sr_distance'], 10, np.where(distance_to_high < p['sr_distance'], -10, 0))
+
+        return np.clip(score, 0, 100)
 
     def analyze(self, data):
         """
@@ -41,33 +124,35 @@ class ZhangTianhaoAnalyst(BaseAnalyst):
                 "analyst": self.name,
                 "score": 50,
                 "prediction": "觀望",
-                "explanation": "數據不足，無法進行完整技術分析。",
+                "signals": [("zhang.insufficient_data", {})],
                 "indicators": {}
             }
 
         df = data.copy()
         df = df.sort_values('date')
+        p = self.params
         
         current_price = df['close'].iloc[-1]
         
         # 計算技術指標
-        rsi = self.calculate_rsi(df['close'])
-        macd, signal, histogram = self.calculate_macd(df['close'])
-        upper_bb, middle_bb, lower_bb = self.calculate_bollinger_bands(df['close'])
+        ind = self.compute_indicators(df, p)
+        rsi = ind['rsi']
+        macd, signal, histogram = ind['macd'], ind['macd_signal'], ind['macd_hist']
+        upper_bb, middle_bb, lower_bb = ind['bb_upper'], ind['bb_middle'], ind['bb_lower']
         
         # 支撐壓力位
-        recent_high = df['high'].tail(20).max()
-        recent_low = df['low'].tail(20).min()
+        recent_high = ind['recent_high'].iloc[-1]
+        recent_low = ind['recent_low'].iloc[-1]
         
         # 均線系統
-        ma5 = df['close'].rolling(5).mean()
-        ma10 = df['close'].rolling(10).mean()
-        ma20 = df['close'].rolling(20).mean()
-        ma60 = df['close'].rolling(60).mean()
+        ma5 = ind['ma5']
+        ma10 = ind['ma10']
+        ma20 = ind['ma20']
+        ma60 = ind['ma60']
         
         # 成交量分析
-        vol_ma5 = df['vol'].rolling(5).mean()
-        vol_ma20 = df['vol'].rolling(20).mean()
+        vol_ma5 = ind['vol_ma5']
+        vol_ma20 = ind['vol_ma20']
         
         # 評分系統
         score = 50
@@ -75,16 +160,16 @@ class ZhangTianhaoAnalyst(BaseAnalyst):
         
         # 1. RSI分析 (30-70為正常區間)
         current_rsi = rsi.iloc[-1]
-        if current_rsi < 30:
+        if current_rsi < p['rsi_oversold']:
             score += 20
-            signals.append(f"RSI超賣({current_rsi:.1f})，反彈機會大")
-        elif current_rsi > 70:
+            signals.append(("zhang.rsi_oversold", {"rsi": current_rsi}))
+        elif current_rsi > p['rsi_overbought']:
             score -= 15
-            signals.append(f"RSI超買({current_rsi:.1f})，回檔風險高")
+            signals.append(("zhang.rsi_overbought", {"rsi": current_rsi}))
         elif 40 <= current_rsi <= 60:
-            signals.append(f"RSI中性({current_rsi:.1f})，市場平衡")
+            signals.append(("zhang.rsi_neutral", {"rsi": current_rsi}))
         else:
-            signals.append(f"RSI為{current_rsi:.1f}")
+            signals.append(("zhang.rsi", {"rsi": current_rsi}))
         
         # 2. MACD分析
         current_macd = macd.iloc[-1]
@@ -94,17 +179,17 @@ class ZhangTianhaoAnalyst(BaseAnalyst):
         
         if current_macd > current_signal and current_hist > 0:
             score += 15
-            signals.append("MACD黃金交叉，多頭訊號")
+            signals.append(("zhang.macd_golden", {}))
         elif current_macd < current_signal and current_hist < 0:
             score -= 15
-            signals.append("MACD死亡交叉，空頭訊號")
+            signals.append(("zhang.macd_death", {}))
         
         if current_hist > prev_hist and current_hist > 0:
             score += 5
-            signals.append("MACD柱狀圖擴大，動能增強")
+            signals.append(("zhang.hist_expand_up", {}))
         elif current_hist < prev_hist and current_hist < 0:
             score -= 5
-            signals.append("MACD柱狀圖擴大，下跌動能增強")
+            signals.append(("zhang.hist_expand_down", {}))
         
         # 3. 布林通道分析
         current_upper = upper_bb.iloc[-1]
@@ -114,15 +199,15 @@ class ZhangTianhaoAnalyst(BaseAnalyst):
         
         if current_price < current_lower:
             score += 15
-            signals.append(f"價格觸及布林下軌(${current_lower:.2f})，超賣訊號")
+            signals.append(("zhang.bb_lower", {"lower": current_lower}))
         elif current_price > current_upper:
             score -= 10
-            signals.append(f"價格觸及布林上軌(${current_upper:.2f})，超買訊號")
+            signals.append(("zhang.bb_upper", {"upper": current_upper}))
         
         if bb_width < 5:
-            signals.append(f"布林通道收斂({bb_width:.1f}%)，醞釀突破")
+            signals.append(("zhang.bb_squeeze", {"width": bb_width}))
         elif bb_width > 15:
-            signals.append(f"布林通道擴張({bb_width:.1f}%)，波動加劇")
+            signals.append(("zhang.bb_expand", {"width": bb_width}))
         
         # 4. 均線系統分析
         ma5_val = ma5.iloc[-1]
@@ -132,75 +217,76 @@ class ZhangTianhaoAnalyst(BaseAnalyst):
         
         if current_price > ma5_val > ma10_val > ma20_val > ma60_val:
             score += 20
-            signals.append("完美多頭排列，強勢上漲格局")
+            signals.append(("zhang.ma_bullish", {}))
         elif current_price < ma5_val < ma10_val < ma20_val < ma60_val:
             score -= 20
-            signals.append("完美空頭排列，弱勢下跌格局")
+            signals.append(("zhang.ma_bearish", {}))
         elif current_price > ma20_val:
             score += 10
-            signals.append("站穩月線之上，中期偏多")
+            signals.append(("zhang.above_ma20", {}))
         elif current_price < ma20_val:
             score -= 10
-            signals.append("跌破月線，中期偏空")
+            signals.append(("zhang.below_ma20", {}))
         
         # 5. 成交量分析
         current_vol = df['vol'].iloc[-1]
         vol_ma5_val = vol_ma5.iloc[-1]
         vol_ma20_val = vol_ma20.iloc[-1]
         
-        if current_vol > vol_ma5_val * 1.5:
+        if current_vol > vol_ma5_val * p['volume_spike']:
             if current_price > df['close'].iloc[-2]:
                 score += 10
-                signals.append(f"爆量上漲，買盤積極")
+                signals.append(("zhang.volume_spike_up", {}))
             else:
                 score -= 10
-                signals.append(f"爆量下跌，賣壓沉重")
+                signals.append(("zhang.volume_spike_down", {}))
         elif current_vol < vol_ma20_val * 0.5:
-            signals.append("成交量萎縮，觀望氣氛濃厚")
+            signals.append(("zhang.volume_shrink", {}))
         
         # 6. 支撐壓力分析
         distance_to_high = (recent_high - current_price) / current_price * 100
         distance_to_low = (current_price - recent_low) / current_price * 100
         
-        if distance_to_low < 2:
+        if distance_to_low < p['sr_distance']:
             score += 10
-            signals.append(f"接近支撐位${recent_low:.2f}，反彈機會高")
-        elif distance_to_high < 2:
+            signals.append(("zhang.near_support", {"support": recent_low}))
+        elif distance_to_high < p['sr_distance']:
             score -= 10
-            signals.append(f"接近壓力位${recent_high:.2f}，突破不易")
+            signals.append(("zhang.near_resistance", {"resistance": recent_high}))
         
         # 限制分數範圍
         score = max(0, min(100, score))
         
         # 生成專業建議
-        if score >= 70:
+        if score >= p['bullish_score']:
             prediction = "看多"
-            summary = "技術面呈現多頭格局，多項指標支持上漲，建議順勢操作。"
-        elif score <= 40:
+            summary = "zhang.summary_bullish"
+        elif score <= p['bearish_score']:
             prediction = "看空"
-            summary = "技術面轉弱，多項指標顯示下跌風險，建議謹慎觀望。"
+            summary = "zhang.summary_bearish"
         else:
             prediction = "觀望"
-            summary = "技術面訊號混雜，建議等待明確方向再進場。"
+            summary = "zhang.summary_neutral"
         
-        explanation = summary + " " + " ".join(signals)
+        signals.insert(0, (summary, {}))
         
         return {
             "analyst": self.name,
             "score": score,
             "prediction": prediction,
-            "explanation": explanation,
+            "signals": signals,
             "indicators": {
-                "RSI": round(current_rsi, 2),
-                "MACD": round(current_macd, 2),
-                "MACD訊號線": round(current_signal, 2),
-                "布林上軌": round(current_upper, 2),
-                "布林中軌": round(current_middle, 2),
-                "布林下軌": round(current_lower, 2),
-                "MA5": round(ma5_val, 2),
-                "MA20": round(ma20_val, 2),
-                "MA60": round(ma60_val, 2),
-                "支撐位": round(recent_low, 2),
-                "壓力位": round(recent_high, 2)
+                "RSI": ratio(current_rsi),
+                "MACD": ratio(current_macd),
+                "MACD訊號線": ratio(current_signal),
+                "MACD柱": ratio(current_hist),
+                "布林上軌": price(current_upper),
+                "布林中軌": price(current_middle),
+                "布林下軌": price(current_lower),
+                "MA5": price(ma5_val),
+                "MA20": price(ma20_val),
+                "MA60": price(ma60_val),
+                "支撐位": price(recent_low),
+                "壓力位": price(recent_high)
             }
         }
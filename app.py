@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
 from orchestrator import StockAnalysisOrchestrator
-from utils.visualizer import create_unified_chart
+from service.client import RemoteOrchestrator
+from utils.visualizer import compute_indicator_frame, build_base_chart, add_analyst_markers, set_visible_analysts
+from utils.formatting import format_indicator
+from analysts.explain import explain
 import datetime
+import yaml
 
 st.set_page_config(page_title="綜合股票分析系統", layout="wide")
 
@@ -12,86 +16,144 @@ st.markdown("---")
 # 初始化 Orchestrator
 @st.cache_resource
 def get_orchestrator():
-    return StockAnalysisOrchestrator()
+    with open("config.yaml", 'r') as f:
+        config = yaml.safe_load(f)
+    dashboard_config = config.get('dashboard') or {}
+    # 設定 service_url 時由常駐服務分析，多個 Streamlit 程序共用同一份溫熱的快取
+    if dashboard_config.get('service_url'):
+        return RemoteOrchestrator(dashboard_config['service_url'])
+    exclude = dashboard_config.get('exclude_analysts') or None
+    return StockAnalysisOrchestrator(exclude_analysts=exclude)
+
+@st.cache_resource
+def get_history_bars():
+    with open("config.yaml", 'r') as f:
+        config = yaml.safe_load(f)
+    return (config.get('dashboard') or {}).get('history_bars', 1260)
+
+# 指標欄位以股票代號與最後交易日為快取鍵，價格資料本身不參與雜湊
+@st.cache_data(show_spinner=False)
+def get_indicator_frame(stock_id, last_date, _price_data):
+    return compute_indicator_frame(_price_data)
 
 orchestrator = get_orchestrator()
 
+# 長歷史時自動改用週 K / 月 K，指標線以 LTTB 降採樣
+RESOLUTION_OPTIONS = {"自動": "auto", "日線": "daily", "週線": "weekly", "月線": "monthly"}
+
 # 側邊欄：搜尋股票
 st.sidebar.header("搜尋股票")
 stock_id = st.sidebar.text_input("請輸入股票代號 (例如: 2330)", value="2330")
 
+# 分析結果與圖表保存在 session_state，切換分析師標記等互動不會觸發重新分析
 if st.sidebar.button("開始分析"):
     with st.spinner(f"正在分析股票 {stock_id}，請稍候..."):
         result = orchestrator.run_full_analysis(stock_id)
-        
+
         if "error" in result:
+            st.session_state.pop('analysis', None)
             st.error(result["error"])
         else:
             # 取得基礎數據用於畫圖
-            price_data = orchestrator.data_manager.get_stock_data(stock_id)
-            
-            # 顯示主要資訊
-            col1, col2, col3 = st.columns(3)
-            col1.metric("目前價格", f"{result['current_price']:.2f}")
-            col2.metric("預測趨勢", result['prediction']['final_trend'])
-            col3.metric("分析進度", "100%")
-
-            st.markdown("---")
-
-            # 1. 綜合圖表
-            st.subheader("📊 統一分析看板")
-            
-            # 讓用戶選擇要顯示在圖表上的分析師
-            analyst_names = [a['analyst'] for a in result['analysis']]
-            selected_analysts = st.sidebar.multiselect(
-                "選擇圖表標記分析師",
-                options=analyst_names,
-                default=analyst_names
-            )
-            
-            fig = create_unified_chart(price_data, result['analysis'], visible_analysts=selected_analysts)
-            st.plotly_chart(fig, use_container_width=True)
-
-            st.markdown("---")
-
-            # 2. 分析師詳細說明
-            st.subheader("👨‍🏫 分析師專業觀點")
-            
-            # 使用 Tabs 顯示不同分析師
-            tabs = st.tabs(analyst_names)
-            
-            for i, tab in enumerate(tabs):
-                a_result = result['analysis'][i]
-                with tab:
-                    # 根據預測決定顏色
-                    pred_color = "red" if a_result['prediction'] == "看多" else ("green" if a_result['prediction'] == "看空" else "white")
-                    st.markdown(f"### {a_result['analyst']} 的建議：:{pred_color}[**{a_result['prediction']}**]")
-                    st.write(f"**綜合評分：** {a_result['score']}")
-                    st.info(a_result['explanation'])
-                    
-                    # 顯示具體指標
-                    st.write("**核心指標：**")
-                    cols = st.columns(len(a_result['indicators']))
-                    for idx, (k, v) in enumerate(a_result['indicators'].items()):
-                        with cols[idx]:
-                            st.metric(k, f"{v:.2f}" if isinstance(v, float) else v)
-
-            st.markdown("---")
-
-            # 3. 三大法人與新聞
-            col_a, col_b = st.columns(2)
-            with col_a:
-                st.subheader("🏢 三大法人動向")
-                if result['institutional']:
-                    inst_df = pd.DataFrame(result['institutional'])
-                    st.dataframe(inst_df.tail(10))
-                else:
-                    st.write("無三大法人數據。")
-            
-            with col_b:
-                st.subheader("📰 新聞情緒摘要")
-                st.write(result['news_summary'])
-                st.write("詳細新聞請參閱 FinMind 平台。")
+            price_data = orchestrator.data_manager.get_stock_data(stock_id, bars=get_history_bars())
+            indicator_frame = get_indicator_frame(stock_id, str(price_data['date'].iloc[-1]), price_data)
+
+            # 圖表依 K 線週期各建立一次並保存，所有分析師標記預先加入
+            st.session_state['analysis'] = {
+                'stock_id': stock_id,
+                'result': result,
+                'indicator_frame': indicator_frame,
+                'figures': {}
+            }
+
+# 資料快取監控
+with st.sidebar.expander("資料快取狀態"):
+    cache_stats = orchestrator.data_manager.cache_stats()
+    st.write(f"快取股票數: {cache_stats['entries']}")
+    st.write(f"使用量: {cache_stats['bytes']/1024/1024:.1f} / {cache_stats['max_bytes']/1024/1024:.0f} MB")
+    st.write(f"命中率: {cache_stats['hit_rate']*100:.1f}% (命中 {cache_stats['hits']}，未命中 {cache_stats['misses']})")
+
+analysis = st.session_state.get('analysis')
+
+if analysis is not None:
+    result = analysis['result']
+
+    # 顯示主要資訊
+    col1, col2, col3 = st.columns(3)
+    col1.metric("目前價格", f"{result['current_price']:.2f}")
+    col2.metric("預測趨勢", result['prediction']['final_trend'])
+    col3.metric("加權共識評分", result['consensus']['score'])
+
+    st.markdown("---")
+
+    # 1. 綜合圖表
+    st.subheader(f"📊 統一分析看板 ({analysis['stock_id']})")
+
+    # 讓用戶選擇要顯示在圖表上的分析師
+    analyst_names = [a['analyst'] for a in result['analysis']]
+    selected_analysts = st.sidebar.multiselect(
+        "選擇圖表標記分析師",
+        options=analyst_names,
+        default=analyst_names,
+        key=f"visible_analysts_{analysis['stock_id']}"
+    )
+
+    resolution = RESOLUTION_OPTIONS[st.sidebar.selectbox("K 線週期", options=list(RESOLUTION_OPTIONS))]
+    fig = analysis['figures'].get(resolution)
+    if fig is None:
+        fig = build_base_chart(analysis['indicator_frame'], resolution=resolution)
+        add_analyst_markers(fig, analysis['indicator_frame'], result['analysis'])
+        analysis['figures'][resolution] = fig
+
+    # 只切換標記的顯示狀態，不重新計算指標或重建子圖
+    fig = set_visible_analysts(fig, selected_analysts)
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown("---")
+
+    # 2. 分析師詳細說明
+    st.subheader("👨‍🏫 分析師專業觀點")
+
+    # 使用 Tabs 顯示不同分析師
+    tabs = st.tabs(analyst_names)
+
+    for i, tab in enumerate(tabs):
+        a_result = result['analysis'][i]
+        with tab:
+            # 根據預測決定顏色
+            pred_color = "red" if a_result['prediction'] == "看多" else ("green" if a_result['prediction'] == "看空" else "white")
+            st.markdown(f"### {a_result['analyst']} 的建議：:{pred_color}[**{a_result['prediction']}**]")
+            if a_result.get('status', 'ok') != 'ok':
+                st.warning(f"此分析師本次執行狀態：{a_result['status']}")
+            st.write(f"**綜合評分：** {a_result['score']}")
+            st.info(explain(a_result))
+
+            # 顯示具體指標
+            st.write("**核心指標：**")
+            cols = st.columns(max(len(a_result['indicators']), 1))
+            for idx, (k, v) in enumerate(a_result['indicators'].items()):
+                with cols[idx]:
+                    st.metric(k, format_indicator(v))
+
+    st.markdown("---")
+
+    # 3. 三大法人與新聞
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.subheader("🏢 三大法人動向")
+        if result['institutional']:
+            inst_df = pd.DataFrame(result['institutional'])
+            st.dataframe(inst_df.tail(10))
+        else:
+            st.write("無三大法人數據。")
+
+    with col_b:
+        st.subheader("📰 新聞情緒摘要")
+        st.write(result['news_summary'])
+        if result.get('news_sentiment'):
+            sentiment_df = pd.DataFrame(result['news_sentiment']).set_index('date')
+            st.bar_chart(sentiment_df['sentiment'])
+        st.write("詳細新聞請參閱 FinMind 平台。")
 
 else:
     st.info("請在左側輸入股票代號並點擊「開始分析」。")
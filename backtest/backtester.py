@@ -0,0 +1,122 @@
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 每組參數累計的統計量 (可跨股票、跨行程直接相加)
+STAT_FIELDS = ("bull_n", "bull_sum", "bull_hits", "bear_n", "bear_sum", "bear_hits", "all_n", "all_sum")
+
+
+def forward_returns(close, horizon):
+    """
+    每個交易日往後 horizon 日的報酬；最後 horizon 筆無法計算者為 NaN。
+    """
+    close = np.asarray(close, dtype=float)
+    fwd = np.full(len(close), np.nan)
+    if len(close) > horizon:
+        fwd[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    return fwd
+
+
+def signal_sums(scores, fwd, bullish_score, bearish_score, valid):
+    """
+    依評分門檻分出看多/看空訊號，累計其後續報酬；回傳與 STAT_FIELDS 對應的陣列。
+    """
+    mask = valid & ~np.isnan(fwd)
+    bull = mask & (scores >= bullish_score)
+    bear = mask & (scores <= bearish_score)
+    return np.array([
+        bull.sum(), fwd[bull].sum(), (fwd[bull] > 0).sum(),
+        bear.sum(), fwd[bear].sum(), (fwd[bear] < 0).sum(),
+        mask.sum(), fwd[mask].sum()
+    ], dtype=float)
+
+
+def summarize(sums):
+    """
+    將累計統計量轉為報表欄位：訊號次數、平均後續報酬 (%)、命中率 (%) 與多空報酬差。
+    sums 可為單一陣列或 (參數組數 × 欄位) 的矩陣。
+    """
+    s = np.atleast_2d(np.asarray(sums, dtype=float))
+    fields = dict(zip(STAT_FIELDS, s.T))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bull_mean = fields['bull_sum'] / fields['bull_n'] * 100
+        bear_mean = fields['bear_sum'] / fields['bear_n'] * 100
+        table = pd.DataFrame({
+            "bull_count": fields['bull_n'].astype(int),
+            "bull_mean_return": bull_mean,
+            "bull_hit_rate": fields['bull_hits'] / fields['bull_n'] * 100,
+            "bear_count": fields['bear_n'].astype(int),
+            "bear_mean_return": bear_mean,
+            "bear_hit_rate": fields['bear_hits'] / fields['bear_n'] * 100,
+            "baseline_return": fields['all_sum'] / fields['all_n'] * 100,
+            "spread": bull_mean - bear_mean
+        })
+    return table
+
+
+class Backtester:
+    """
+    以分析師的向量化評分 (score_series) 回測整段歷史：
+    每個交易日的評分轉為看多/看空訊號，統計其後 horizon 日的報酬。
+    warmup 為評分開始有效前需要的交易日數。
+    """
+    def __init__(self, analyst, horizon=20, warmup=60):
+        self.analyst = analyst
+        self.horizon = horizon
+        self.warmup = warmup
+
+    def ticker_sums(self, history, params=None, indicators=None, active=None):
+        """
+        active 為布林陣列時，只統計該範圍內的交易日 (分段串流時排除暖身與前瞻資料列)。
+        """
+        params = params or self.analyst.params
+        df = history.sort_values('date').reset_index(drop=True)
+        if indicators is None:
+            indicators = self.analyst.compute_indicators(df, params)
+        scores = self.analyst.score_series(indicators, params)
+        valid = np.arange(len(df)) >= self.warmup - 1
+        if active is not None:
+            valid &= active
+        fwd = forward_returns(df['close'].to_numpy(), self.horizon)
+        return signal_sums(scores, fwd, params['bullish_score'], params['bearish_score'], valid)
+
+    def run(self, histories, params=None):
+        """
+        histories 為 {股票代號: 日 K DataFrame}；回傳各股票與合計的統計表。
+        """
+        rows = {}
+        for stock_id, history in histories.items():
+            if history is None or len(history) <= self.warmup:
+                continue
+            rows[stock_id] = self.ticker_sums(history, params)
+
+        if not rows:
+            return pd.DataFrame()
+        sums = np.vstack(list(rows.values()))
+        table = summarize(np.vstack([sums, sums.sum(axis=0)]))
+        table.index = list(rows) + ["合計"]
+        return table
+
+    def run_stream(self, chunks, params=None):
+        """
+        逐段消化 DataManager.iter_history 產生的 HistoryChunk，記憶體只保留目前這一段；
+        依日期分段時 lookahead_bars 須 >= horizon，跨段的後續報酬才不會遺失，不足時拋出 ValueError。
+        """
+        sums = {}
+        for chunk in chunks:
+            if chunk.lookahead_bars is not None and chunk.lookahead_bars < self.horizon:
+                raise ValueError(f"分段的 lookahead_bars ({chunk.lookahead_bars}) 小於回測期間 horizon ({self.horizon})")
+            for stock_id, history in chunk.frames.items():
+                if len(history) <= self.warmup:
+                    continue
+                row = self.ticker_sums(history, params, active=chunk.active_mask(history))
+                sums[stock_id] = sums.get(stock_id, 0) + row
+
+        if not sums:
+            return pd.DataFrame()
+        rows = np.vstack(list(sums.values()))
+        table = summarize(np.vstack([rows, rows.sum(axis=0)]))
+        table.index = list(sums) + ["合計"]
+        return table
@@ -0,0 +1,230 @@
+import argparse
+import importlib
+import itertools
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+
+from analysts.registry import ANALYST_REGISTRY
+from backtest.backtester import Backtester, STAT_FIELDS, summarize
+
+logger = logging.getLogger(__name__)
+
+# 各分析師預設的參數搜尋空間：list 為離散候選值，tuple 為 (下限, 上限) 的連續區間
+SEARCH_SPACES = {
+    "lin_chi": {
+        "bullish_score": [60, 65, 70, 75, 80],
+        "bearish_score": [25, 30, 35, 40, 45],
+        "momentum_short": (1.0, 6.0),
+        "momentum_medium": (2.0, 10.0),
+        "momentum_long": (5.0, 25.0),
+        "volatility_low": (10.0, 30.0),
+        "volatility_high": (30.0, 60.0),
+        "channel_high": [70, 75, 80, 85, 90],
+        "channel_low": [10, 15, 20, 25, 30],
+    },
+    "zhang_tianhao": {
+        "rsi_period": [7, 9, 14, 21],
+        "rsi_oversold": [20, 25, 30, 35],
+        "rsi_overbought": [65, 70, 75, 80],
+        "bb_period": [10, 20, 30],
+        "bb_std": [1.5, 2.0, 2.5],
+        "bullish_score": [60, 65, 70, 75, 80],
+        "bearish_score": [25, 30, 35, 40, 45],
+    },
+}
+
+
+def create_analyst(analyst_key):
+    module_name, class_name = ANALYST_REGISTRY[analyst_key].split(":")
+    analyst_cls = getattr(importlib.import_module(module_name), class_name)
+    if not hasattr(analyst_cls, "score_series"):
+        raise ValueError(f"分析師 {analyst_key} 尚未支援向量化評分，無法進行參數掃描")
+    return analyst_cls()
+
+
+def expand_grid(space, points=3):
+    """
+    將搜尋空間展開為完整網格：list 直接使用候選值；tuple 的連續區間在上下限之間
+    等距取 points 個值 (含兩端，四捨五入至小數兩位)，避免只掃描到區間的兩個端點
+    """
+    if points < 2:
+        raise ValueError("連續區間至少需要取 2 個點 (grid_points >= 2)")
+    keys = list(space)
+    values = []
+    for k in keys:
+        choices = space[k]
+        if isinstance(choices, tuple):
+            low, high = choices
+            choices = sorted({round(float(v), 2) for v in np.linspace(low, high, points)})
+        values.append(list(choices))
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def sample_params(space, n, seed=None):
+    """由搜尋空間隨機抽樣 n 組參數"""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(n):
+        params = {}
+        for key, choices in space.items():
+            if isinstance(choices, tuple):
+                params[key] = round(rng.uniform(*choices), 2)
+            else:
+                params[key] = rng.choice(choices)
+        samples.append(params)
+    return samples
+
+
+def _evaluate_chunk(analyst_key, param_sets, histories, horizon, warmup):
+    """
+    工作行程：對一批 (日 K, 有效範圍) 評估所有參數組合。
+    指標欄位依 INDICATOR_PARAMS 分組，每檔股票每組只計算一次，門檻類參數共用同一份指標。
+    """
+    analyst = create_analyst(analyst_key)
+    backtester = Backtester(analyst, horizon=horizon, warmup=warmup)
+    indicator_keys = getattr(analyst, "INDICATOR_PARAMS", ())
+
+    groups = {}
+    for i, params in enumerate(param_sets):
+        groups.setdefault(tuple(params[k] for k in indicator_keys), []).append(i)
+
+    sums = np.zeros((len(param_sets), len(STAT_FIELDS)))
+    for df, active in histories:
+        for indices in groups.values():
+            indicators = analyst.compute_indicators(df, param_sets[indices[0]])
+            for i in indices:
+                sums[i] += backtester.ticker_sums(df, param_sets[i], indicators, active)
+    return sums
+
+
+class ParameterSweep:
+    """
+    以回測器評估大量分析師參數組合，股票分批交給多個行程並行計算，
+    最後依多空訊號的後續報酬差 (spread) 排序。
+    """
+    def __init__(self, analyst_key, param_sets, horizon=20, warmup=60, max_workers=None):
+        defaults = create_analyst(analyst_key).params
+        self.analyst_key = analyst_key
+        self.param_sets = [{**defaults, **p} for p in param_sets]
+        self.varied = sorted({k for p in param_sets for k in p})
+        self.horizon = horizon
+        self.warmup = warmup
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def _prepare(self, frames):
+        return [(df.sort_values('date').reset_index(drop=True), active)
+                for df, active in frames if df is not None and len(df) > self.warmup]
+
+    def run(self, histories, min_signals=30):
+        frames = self._prepare((df, None) for df in histories.values())
+        if not frames:
+            return pd.DataFrame()
+
+        # 依資料量平均分配股票給各行程
+        frames.sort(key=lambda item: len(item[0]), reverse=True)
+        n_chunks = min(self.max_workers, len(frames))
+        chunks = [frames[i::n_chunks] for i in range(n_chunks)]
+
+        started = time.perf_counter()
+        sums = np.zeros((len(self.param_sets), len(STAT_FIELDS)))
+        if n_chunks == 1:
+            sums += _evaluate_chunk(self.analyst_key, self.param_sets, chunks[0], self.horizon, self.warmup)
+        else:
+            with ProcessPoolExecutor(max_workers=n_chunks) as executor:
+                futures = [executor.submit(_evaluate_chunk, self.analyst_key, self.param_sets, chunk,
+                                           self.horizon, self.warmup) for chunk in chunks]
+                for future in futures:
+                    sums += future.result()
+        logger.info(f"參數掃描完成: {len(self.param_sets)} 組參數 × {len(frames)} 檔股票，"
+                    f"耗時 {time.perf_counter() - started:.1f} 秒")
+        return self._rank(sums, min_signals)
+
+    def run_stream(self, chunks, min_signals=30):
+        """
+        以 DataManager.iter_history 的 HistoryChunk 串流執行；同時處理中的分段最多為行程數的兩倍，
+        整個市場的歷史資料不需一次載入記憶體。
+        """
+        started = time.perf_counter()
+        sums = np.zeros((len(self.param_sets), len(STAT_FIELDS)))
+        pending = set()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for chunk in chunks:
+                frames = self._prepare((df, chunk.active_mask(df)) for df in chunk.frames.values())
+                if not frames:
+                    continue
+                if len(pending) >= self.max_workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        sums += future.result()
+                pending.add(executor.submit(_evaluate_chunk, self.analyst_key, self.param_sets, frames,
+                                            self.horizon, self.warmup))
+            for future in pending:
+                sums += future.result()
+        logger.info(f"參數掃描 (串流) 完成: {len(self.param_sets)} 組參數，耗時 {time.perf_counter() - started:.1f} 秒")
+        return self._rank(sums, min_signals)
+
+    def _rank(self, sums, min_signals):
+        table = pd.concat([
+            pd.DataFrame([{k: p[k] for k in self.varied} for p in self.param_sets]),
+            summarize(sums)
+        ], axis=1)
+        eligible = (table['bull_count'] >= min_signals) & (table['bear_count'] >= min_signals)
+        table = table[eligible].sort_values('spread', ascending=False).reset_index(drop=True)
+        table.index = table.index + 1
+        table.index.name = 'rank'
+        return table
+
+
+def main():
+    from data_layer.data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="分析師門檻參數掃描")
+    parser.add_argument("--analyst", type=str, default="lin_chi", choices=sorted(SEARCH_SPACES))
+    parser.add_argument("--stock_id", type=str, default="2330", help="股票代號，多個股票用逗號分隔")
+    parser.add_argument("--start_date", type=str, default=None)
+    parser.add_argument("--end_date", type=str, default=None)
+    parser.add_argument("--samples", type=int, default=200, help="隨機抽樣組數；0 表示完整網格")
+    parser.add_argument("--grid_points", type=int, default=3,
+                        help="完整網格時每個連續區間等距取的點數 (含上下限)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--horizon", type=int, default=20, help="後續報酬天數")
+    parser.add_argument("--min_signals", type=int, default=30)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--group_size", type=int, default=0,
+                        help="大於 0 時以每批股票數串流讀取歷史資料，限制記憶體用量")
+    args = parser.parse_args()
+
+    space = SEARCH_SPACES[args.analyst]
+    if args.samples == 0:
+        param_sets = expand_grid(space, args.grid_points)
+        print(f"📐 完整網格共 {len(param_sets)} 組參數")
+    else:
+        param_sets = sample_params(space, args.samples, args.seed)
+
+    stock_ids = [s.strip() for s in args.stock_id.split(',')]
+    data_manager = DataManager()
+    sweep = ParameterSweep(args.analyst, param_sets, horizon=args.horizon)
+    if args.group_size > 0:
+        chunks = data_manager.iter_history(stock_ids, args.start_date, args.end_date, group_size=args.group_size)
+        table = sweep.run_stream(chunks, min_signals=args.min_signals)
+    else:
+        histories = data_manager.get_stock_data_batch(stock_ids, args.start_date, args.end_date)
+        table = sweep.run(histories, min_signals=args.min_signals)
+    if table.empty:
+        print("❌ 沒有符合最少訊號數的參數組合")
+        return
+
+    os.makedirs("reports", exist_ok=True)
+    output = f"reports/param_sweep_{args.analyst}.csv"
+    table.to_csv(output)
+    print(table.head(args.top).to_string())
+    print(f"✅ 完整排名已輸出: {output}")
+
+
+if __name__ == "__main__":
+    main()
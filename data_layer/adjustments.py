@@ -0,0 +1,81 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+FACTOR_COLUMNS = ['stock_id', 'date', 'kind', 'factor']
+
+
+class AdjustmentStore:
+    """
+    Compact corporate-action table: one row per (stock_id, ex-date, kind) with
+    factor = reference price after the action / close before it.
+    Raw bars are never rewritten; adjusted views are derived on read.
+    """
+    def __init__(self, root):
+        self.path = os.path.join(root, "adjustments.csv")
+        self._lock = threading.RLock()
+        if os.path.exists(self.path):
+            self._table = pd.read_csv(self.path, dtype={'stock_id': str, 'date': str})
+        else:
+            self._table = pd.DataFrame(columns=FACTOR_COLUMNS)
+
+    def factors(self, stock_id):
+        table = self._table
+        return table[table['stock_id'] == stock_id].sort_values('date').reset_index(drop=True)
+
+    def update(self, stock_id, events):
+        """Upsert corporate-action factors for a ticker. Returns the number of rows written."""
+        if events is None or events.empty:
+            return 0
+        events = events.assign(stock_id=stock_id)[FACTOR_COLUMNS].copy()
+        events['date'] = events['date'].astype(str).str[:10]
+        events = events[np.isfinite(events['factor']) & (events['factor'] > 0)]
+        if events.empty:
+            return 0
+
+        with self._lock:
+            table = pd.concat([self._table, events], ignore_index=True)
+            self._table = table.drop_duplicates(subset=['stock_id', 'date', 'kind'], keep='last')
+            self._table.to_csv(self.path, index=False)
+        return len(events)
+
+
+def _cumulative_multiplier(bar_dates, event_dates, factors):
+    """
+    Multiplier for each bar = product of every factor whose ex-date is after the bar.
+    """
+    if len(factors) == 0:
+        return np.ones(len(bar_dates))
+    suffix_product = np.append(np.cumprod(factors[::-1])[::-1], 1.0)
+    return suffix_product[np.searchsorted(event_dates, bar_dates, side='right')]
+
+
+def apply_adjustments(bars, factors):
+    """
+    Back-adjust raw bars: prices before each ex-date are scaled by the cumulative
+    factor so dividends and splits no longer leave gaps in rolling statistics.
+    Volume is only rescaled for splits, where the share count actually changes.
+    """
+    if bars is None or bars.empty or factors is None or factors.empty:
+        return bars
+
+    adjusted = bars.copy()
+    bar_dates = adjusted['date'].astype(str).str[:10].to_numpy()
+
+    events = factors.sort_values('date')
+    price_mult = _cumulative_multiplier(bar_dates, events['date'].to_numpy(), events['factor'].to_numpy(dtype=float))
+    for column in PRICE_COLUMNS:
+        if column in adjusted.columns:
+            adjusted[column] = adjusted[column].to_numpy(dtype=float) * price_mult
+
+    splits = events[events['kind'] == 'split']
+    if 'vol' in adjusted.columns and not splits.empty:
+        split_mult = _cumulative_multiplier(bar_dates, splits['date'].to_numpy(), splits['factor'].to_numpy(dtype=float))
+        adjusted['vol'] = adjusted['vol'].to_numpy(dtype=float) / split_mult
+
+    return adjusted
@@ -0,0 +1,49 @@
+from abc import ABC
+import pandas as pd
+
+
+class DataSource(ABC):
+    """
+    Interface shared by every market data backend behind DataManager.
+    Methods return None (or an empty DataFrame for news) when data is unavailable,
+    mirroring how FinMindClient reports failures. Price and institutional queries
+    return an empty DataFrame when the source answered but has no rows in the range
+    (before a listing date, a closure, a bar not yet published), so the data manager
+    can record the range as covered instead of asking again.
+    """
+    name = "base"
+
+    def get_stock_price(self, stock_id, start_date, end_date):
+        return None
+
+    def get_stock_prices(self, stock_ids, start_date, end_date):
+        """
+        Fetch several tickers; returns {stock_id: frame} for tickers with data.
+        Backends with a real multi-symbol endpoint override this.
+        """
+        results = {}
+        for stock_id in stock_ids:
+            df = self.get_stock_price(stock_id, start_date, end_date)
+            if df is not None and not df.empty:
+                results[stock_id] = df
+        return results
+
+    def get_institutional_investors(self, stock_id, start_date, end_date):
+        return None
+
+    def get_corporate_actions(self, stock_id, start_date, end_date):
+        """
+        Corporate actions as a DataFrame with date, kind ('dividend' or 'split')
+        and factor (reference price after / close before); None when unavailable.
+        """
+        return None
+
+    def get_stock_news(self, stock_id, start_date, end_date):
+        return pd.DataFrame()
+
+    def get_stock_info(self):
+        """
+        Listing table for the whole market with at least stock_id, stock_name and
+        industry_category; None when unavailable.
+        """
+        return None
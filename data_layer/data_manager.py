@@ -1,64 +1,401 @@
 import pandas as pd
 import os
 from datetime import datetime, timedelta
-from .finmind_client import FinMindClient
-from .yfinance_client import YFinanceClient
+from .price_store import PriceStore
+from .institutional_store import InstitutionalStore
+from .feature_store import FeatureStore, FEATURE_WARMUP_BARS
+from .adjustments import AdjustmentStore, apply_adjustments
+from .history_iter import HistoryIterator
+from .panel_store import PanelStore, PANEL_FIELDS
+from .trading_calendar import TradingCalendar
+from .memory_cache import FrameCache
+from .stock_info import StockInfoStore
+from .news_store import NewsStore
+from .sentiment import LexiconSentimentScorer
 import logging
 import yaml
 
 logger = logging.getLogger(__name__)
 
+# Roughly one year of TWSE sessions
+DEFAULT_LOOKBACK_BARS = 245
+
 class DataManager:
     def __init__(self, config_path="config.yaml"):
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
-        self.finmind = FinMindClient(token=self.config['api'].get('finmind_token'))
-        self.yfinance = YFinanceClient()
-        self.cache_dir = "data_cache"
+        self.source, self.fallback_source = self._build_sources()
+        cache_config = self.config.get('data_cache') or {}
+        self.cache_dir = cache_config.get('path', "data_cache")
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
+        # Raw bars plus a corporate-action factor table; adjusted views are built on read
+        self.price_store = PriceStore(self.cache_dir)
+        self.adjustment_store = AdjustmentStore(self.cache_dir)
+        self.institutional_store = InstitutionalStore(self.cache_dir)
+        # Versioned per-ticker feature columns, materialized incrementally from the stores above
+        self.feature_store = FeatureStore(self.cache_dir)
+        # Memory-mapped snapshot of the bars for fast panel reads, built on demand
+        self.panel_store = PanelStore(self.cache_dir)
+        self.refresh_minutes = cache_config.get('refresh_minutes', 60)
+        # In-process LRU of full per-ticker frames in front of the CSV store
+        self.memory_cache = FrameCache(int(cache_config.get('memory_mb', 256) * 1024 * 1024))
+        self.calendar = self._build_calendar()
+        self.stock_info_store = StockInfoStore(self.cache_dir, cache_config.get('stock_info_days', 7))
+
+        db_path = (self.config.get('database') or {}).get('path', 'stock_data.db')
+        self.news_store = NewsStore(db_path)
+        self.sentiment_scorer = LexiconSentimentScorer()
+
+    def _build_sources(self):
+        """
+        Create the primary data source and the price fallback from the data_source config.
+        Network clients are imported lazily so replay runs need neither FinMind nor yfinance.
+        """
+        source_config = self.config.get('data_source') or {}
+        primary = source_config.get('primary', 'finmind')
+
+        if primary == 'replay':
+            from .replay_client import ReplayClient
+            replay = source_config.get('replay') or {}
+            source = ReplayClient(
+                fixture_dir=replay.get('fixture_dir', 'fixtures'),
+                latency=replay.get('latency', 0.0),
+                jitter=replay.get('jitter', 0.0),
+                failure_rate=replay.get('failure_rate', 0.0),
+                seed=replay.get('seed'),
+                fail_stock_ids=replay.get('fail_stock_ids')
+            )
+            # Replay runs stay deterministic: no live fallback
+            return source, None
+
+        from .finmind_client import FinMindClient
+        from .yfinance_client import YFinanceClient
+        source = FinMindClient(token=self.config['api'].get('finmind_token'))
+        if source_config.get('record_dir'):
+            from .replay_client import RecordingClient
+            source = RecordingClient(source, source_config['record_dir'])
+        return source, YFinanceClient()
+
+    def _build_calendar(self):
+        """
+        Trading calendar learned from the stored bars of the reference tickers
+        (and the panel snapshot's date axis) plus the configured holiday table.
+        """
+        calendar_config = self.config.get('trading_calendar') or {}
+        sessions = set()
+        for stock_id in calendar_config.get('reference_stock_ids', ['2330']):
+            bars = self.price_store.load(stock_id)
+            if bars is not None:
+                sessions.update(bars['date'])
+        panel_index = self.panel_store.index
+        if panel_index is not None:
+            sessions.update(panel_index['dates'].tolist())
+        return TradingCalendar.from_config(calendar_config, sessions)
 
-    def get_stock_data(self, stock_id, start_date=None, end_date=None, use_cache=True):
+    def _default_window(self, start_date, end_date, bars=DEFAULT_LOOKBACK_BARS):
         """
-        Get stock price data with fallback and caching.
+        Default to the latest session whose bars should be published, and size the
+        window in trading days rather than calendar days.
         """
         if not end_date:
-            end_date = datetime.now().strftime("%Y-%m-%d")
+            end_date = self.calendar.latest_available_session()
         if not start_date:
-            start_date = (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+            start_date = self.calendar.lookback_start(bars, end_date)
+        return start_date, end_date
 
-        cache_file = os.path.join(self.cache_dir, f"{stock_id}_{start_date}_{end_date}.csv")
-        
-        if use_cache and os.path.exists(cache_file):
-            logger.info(f"Loading cached data for {stock_id}")
-            return pd.read_csv(cache_file)
+    def _missing_ranges(self, stock_id, start_date, end_date, store=None):
+        """
+        Date ranges inside [start_date, end_date] that have never been requested,
+        plus the tail after the last stored bar once the refresh interval has passed
+        and the calendar says a newer session has been published.
+        """
+        coverage = (store or self.price_store).coverage(stock_id)
+        if not coverage or not coverage.get('requested_start'):
+            return [(start_date, end_date)]
 
-        # Try FinMind first
-        df = self.finmind.get_stock_price(stock_id, start_date, end_date)
-        
-        if df is None or df.empty:
-            logger.warning(f"FinMind failed for {stock_id}, trying yfinance")
-            # Format for yfinance if it's a TW stock
-            yf_stock_id = stock_id
-            if stock_id.isdigit():
-                yf_stock_id = f"{stock_id}.TW"
-            df = self.yfinance.get_stock_price(yf_stock_id, start_date, end_date)
-
-        if df is not None and not df.empty:
-            if use_cache:
-                df.to_csv(cache_file, index=False)
+        ranges = []
+        if start_date < coverage['requested_start']:
+            head_end = (datetime.strptime(coverage['requested_start'], "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+            ranges.append((start_date, min(head_end, end_date)))
+
+        last_date = coverage.get('last_date') or coverage['requested_start']
+        checked_at = datetime.fromisoformat(coverage['checked_at'])
+        stale = datetime.now() - checked_at > timedelta(minutes=self.refresh_minutes)
+        if end_date > last_date and stale and self.calendar.has_new_data(last_date, end_date):
+            tail_start = (datetime.strptime(last_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            ranges.append((max(tail_start, start_date), end_date))
+        return ranges
+
+    def _sync_prices(self, stock_ids, start_date, end_date, force=False):
+        """
+        Bring the local bar store up to date for the requested window. Only missing
+        ranges are fetched; tickers the primary source cannot serve are retried
+        through the fallback in one multi-symbol request per range. Corporate actions
+        are fetched for the same new ranges, so a dividend costs one factor row.
+        """
+        failed = {}
+        for stock_id in stock_ids:
+            ranges = [(start_date, end_date)] if force else self._missing_ranges(stock_id, start_date, end_date)
+            synced, empty = [], []
+            for range_start, range_end in ranges:
+                df = self.source.get_stock_price(stock_id, range_start, range_end)
+                if df is None:
+                    failed.setdefault((range_start, range_end), []).append(stock_id)
+                elif df.empty:
+                    empty.append((range_start, range_end))
+                else:
+                    self.price_store.append(stock_id, df)
+                    synced.append((range_start, range_end))
+                self.adjustment_store.update(stock_id, self.source.get_corporate_actions(stock_id, range_start, range_end))
+                self._invalidate(stock_id)
+            # An empty answer for a ticker the source has bars for (before its listing
+            # date, a closure, a bar not yet published) is covered; for a ticker it has
+            # never served, the fallback may still have it
+            if synced or (self.price_store.coverage(stock_id) or {}).get('last_date'):
+                synced += empty
+            else:
+                for key in empty:
+                    failed.setdefault(key, []).append(stock_id)
+            self._mark_synced(self.price_store, stock_id, start_date, end_date, synced)
+
+        if failed and self.fallback_source is not None:
+            for (range_start, range_end), ids in failed.items():
+                logger.warning(f"{self.source.name} failed for {len(ids)} tickers, batch fetching from {self.fallback_source.name}")
+                fetched = self.fallback_source.get_stock_prices(ids, range_start, range_end)
+                for stock_id, df in fetched.items():
+                    if df is None or df.empty:
+                        continue
+                    self.price_store.append(stock_id, df)
+                    self._invalidate(stock_id)
+                    self._mark_synced(self.price_store, stock_id, start_date, end_date, [(range_start, range_end)])
+
+    @staticmethod
+    def _mark_synced(store, stock_id, start_date, end_date, synced):
+        """
+        Extend a ticker's coverage by the ranges the source answered, with or
+        without rows: a range starting at start_date moves requested_start back,
+        one reaching end_date refreshes checked_at. Failed ranges stay missing
+        and are requested again on the next call.
+        """
+        if not synced:
+            return
+        store.mark_checked(stock_id,
+                           start_date if any(s == start_date for s, _ in synced) else None,
+                           refreshed=any(e == end_date for _, e in synced))
+
+    def _sync_institutional(self, stock_ids, start_date, end_date):
+        """
+        Fetch only the institutional ranges the local store has never requested.
+        Ranges answered without rows (before the first flow row, a closure) count
+        as covered; only failed requests are retried.
+        """
+        for stock_id in stock_ids:
+            ranges = self._missing_ranges(stock_id, start_date, end_date, store=self.institutional_store)
+            synced = []
+            for range_start, range_end in ranges:
+                df = self.source.get_institutional_investors(stock_id, range_start, range_end)
+                if df is None:
+                    continue
+                self.institutional_store.append(stock_id, df)
+                synced.append((range_start, range_end))
+            self._mark_synced(self.institutional_store, stock_id, start_date, end_date, synced)
+
+    def _invalidate(self, stock_id):
+        self.memory_cache.invalidate(lambda key: key[0] == stock_id)
+
+    def _read_prices(self, stock_id, start_date, end_date, adjusted, use_memory=True):
+        """
+        Bars for [start_date, end_date]. The full (optionally adjusted) history of a
+        ticker is kept in the in-process LRU, so repeated reads skip CSV parsing;
+        bulk scans pass use_memory=False to avoid evicting the hot set, and only
+        the requested slice is kept and adjusted.
+        """
+        if not use_memory:
+            df = self.price_store.read(stock_id, start_date, end_date)
+            if df is not None and adjusted:
+                df = apply_adjustments(df, self.adjustment_store.factors(stock_id))
             return df
-        
-        return None
+
+        key = (stock_id, adjusted)
+        full = self.memory_cache.get(key)
+        if full is None:
+            full = self.price_store.load(stock_id)
+            if full is None:
+                return None
+            if adjusted:
+                full = apply_adjustments(full, self.adjustment_store.factors(stock_id))
+            self.memory_cache.put(key, full)
+
+        mask = full['date'].to_numpy() >= start_date if start_date else None
+        if end_date:
+            before_end = full['date'].to_numpy() <= end_date
+            mask = before_end if mask is None else mask & before_end
+        df = full[mask] if mask is not None else full.copy()
+        return df.reset_index(drop=True) if not df.empty else None
+
+    def cache_stats(self):
+        """Hit/miss/byte counters of the in-process frame cache, for monitoring."""
+        return self.memory_cache.stats()
+
+    def get_stock_data(self, stock_id, start_date=None, end_date=None, use_cache=True, adjusted=True, bars=None):
+        """
+        Get daily bars for a ticker from the local store, fetching only missing ranges.
+        Without start_date the window holds `bars` trading sessions (default about a year).
+        adjusted=True back-adjusts prices for dividends and splits on read;
+        use_cache=False forces the whole window to be refetched.
+        """
+        start_date, end_date = self._default_window(start_date, end_date, bars or DEFAULT_LOOKBACK_BARS)
+        self._sync_prices([stock_id], start_date, end_date, force=not use_cache)
+        return self._read_prices(stock_id, start_date, end_date, adjusted)
+
+    def get_stock_data_batch(self, stock_ids, start_date=None, end_date=None, use_cache=True, adjusted=True, bars=None):
+        """
+        Get price data for many tickers. Tickers the primary source cannot serve are
+        collected and fetched from the fallback in one multi-symbol request.
+        Returns {stock_id: DataFrame}; tickers without data are omitted.
+        """
+        start_date, end_date = self._default_window(start_date, end_date, bars or DEFAULT_LOOKBACK_BARS)
+        self._sync_prices(stock_ids, start_date, end_date, force=not use_cache)
+
+        results = {}
+        for stock_id in stock_ids:
+            df = self._read_prices(stock_id, start_date, end_date, adjusted)
+            if df is not None:
+                results[stock_id] = df
+        return results
+
+    def get_price_panel(self, stock_ids, field='close', start_date=None, end_date=None, adjusted=True):
+        """
+        Wide date x ticker panel of one price field, aligned on the union of trading dates.
+        Served from the memory-mapped panel snapshot when it is current for these
+        tickers, otherwise assembled from the per-ticker bar files.
+        """
+        start_date, end_date = self._default_window(start_date, end_date)
+        self._sync_prices(stock_ids, start_date, end_date)
+        last_dates = {s: (self.price_store.coverage(s) or {}).get('last_date') for s in stock_ids}
+        factors_changed = os.path.getmtime(self.adjustment_store.path) if os.path.exists(self.adjustment_store.path) else 0.0
+        if self.panel_store.covers(stock_ids, field, start_date, adjusted, last_dates, factors_changed):
+            return self.panel_store.read(field, stock_ids, start_date, end_date)
+
+        frames = self.get_stock_data_batch(stock_ids, start_date, end_date, adjusted=adjusted)
+        if not frames:
+            return pd.DataFrame()
+        columns = {stock_id: df.set_index('date')[field] for stock_id, df in frames.items()}
+        return pd.DataFrame(columns).sort_index()
+
+    def iter_history(self, stock_ids, start_date=None, end_date=None, by='ticker', group_size=100,
+                     block_days=365, warmup_bars=252, lookahead_bars=20, columns=None, adjusted=True):
+        """
+        Stream stored history in memory-bounded HistoryChunks instead of one huge dict.
+        by='ticker' yields groups of group_size tickers over the whole window (fetching
+        missing ranges group by group); by='date' yields calendar blocks of block_days
+        across all tickers, each with warmup_bars of trailing context and lookahead_bars
+        of leading context (set it to at least the backtest horizon).
+        """
+        iterator = HistoryIterator(self, columns=columns, adjusted=adjusted)
+        if by == 'date':
+            return iterator.iter_date_blocks(stock_ids, start_date, end_date, block_days, warmup_bars, lookahead_bars)
+        return iterator.iter_ticker_groups(stock_ids, start_date, end_date, group_size, sync=True)
+
+    def build_panel(self, stock_ids, start_date=None, end_date=None, fields=None, adjusted=True):
+        """
+        Sync the bars for stock_ids and write the memory-mapped panel snapshot
+        (one .npy per field plus a date/ticker index) used by get_price_panel.
+        """
+        start_date, end_date = self._default_window(start_date, end_date)
+        self._sync_prices(stock_ids, start_date, end_date)
+        return self.panel_store.build(
+            lambda stock_id: self._read_prices(stock_id, start_date, end_date, adjusted),
+            stock_ids, start_date, end_date, adjusted=adjusted, fields=fields or PANEL_FIELDS
+        )
+
+    def refresh_adjustments(self, stock_id, start_date=None, end_date=None):
+        """
+        Re-pull corporate actions for a ticker (e.g. after a newly announced dividend).
+        Only the factor table changes; stored bars are untouched.
+        """
+        start_date, end_date = self._default_window(start_date, end_date)
+        written = self.adjustment_store.update(stock_id, self.source.get_corporate_actions(stock_id, start_date, end_date))
+        self._invalidate(stock_id)
+        return written
+
+    def get_stock_info(self, refresh=False):
+        """
+        Market-wide listing table (stock_id, stock_name, industry_category, type),
+        served from the local cache and refreshed from the source when stale.
+        Falls back to the stale copy if the source is unavailable.
+        """
+        if refresh or self.stock_info_store.is_stale():
+            self.stock_info_store.update(self.source.get_stock_info())
+        return self.stock_info_store.load()
 
     def get_institutional_data(self, stock_id, start_date=None, end_date=None):
         if not end_date:
             end_date = datetime.now().strftime("%Y-%m-%d")
         if not start_date:
             start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-        
-        return self.finmind.get_institutional_investors(stock_id, start_date, end_date)
+
+        self._sync_institutional([stock_id], start_date, end_date)
+        return self.institutional_store.read(stock_id, start_date, end_date)
+
+    def _factors_key(self, stock_id):
+        """Fingerprint of a ticker's corporate-action factors; a change rewrites the adjusted history."""
+        factors = self.adjustment_store.factors(stock_id)
+        if factors.empty:
+            return ""
+        return f"{len(factors)}:{factors['date'].iloc[-1]}:{factors['factor'].astype(float).prod():.12g}"
+
+    def materialize_features(self, stock_ids):
+        """
+        Incrementally bring the feature store up to date with the stored bars and
+        institutional flows (no fetching). Returns {stock_id: rows written}.
+        """
+        written = {}
+        for stock_id in stock_ids:
+            bars = self._read_prices(stock_id, None, None, adjusted=True)
+            written[stock_id] = self.feature_store.materialize(
+                stock_id, bars, self.institutional_store.load(stock_id), self._factors_key(stock_id))
+            if written[stock_id]:
+                self.memory_cache.invalidate(lambda key: key == (stock_id, 'features'))
+        return written
+
+    def get_features(self, stock_id, start_date=None, end_date=None, bars=None, columns=None, sync=True):
+        """
+        Precomputed feature rows (date x FEATURE_COLUMNS) for a ticker. With sync=True
+        bars and institutional flows for the window, plus FEATURE_WARMUP_BARS of
+        context so the first row is fully primed, are fetched first; sync=False only
+        materializes what is already stored (callers that just synced the bars).
+        Only new rows are computed either way.
+        """
+        return self.get_features_batch([stock_id], start_date, end_date, bars, columns, sync).get(stock_id)
+
+    def get_features_batch(self, stock_ids, start_date=None, end_date=None, bars=None, columns=None, sync=True):
+        """Features for many tickers as {stock_id: DataFrame}; tickers without data are omitted."""
+        start_date, end_date = self._default_window(start_date, end_date, bars or DEFAULT_LOOKBACK_BARS)
+        if sync:
+            context_start = self.calendar.shift(start_date, FEATURE_WARMUP_BARS)
+            self._sync_prices(stock_ids, context_start, end_date)
+            self._sync_institutional(stock_ids, context_start, end_date)
+        self.materialize_features(stock_ids)
+
+        results = {}
+        for stock_id in stock_ids:
+            key = (stock_id, 'features')
+            full = self.memory_cache.get(key)
+            if full is None:
+                full = self.feature_store.load(stock_id)
+                if full is None:
+                    continue
+                self.memory_cache.put(key, full)
+            dates = full['date'].to_numpy()
+            df = full[(dates >= start_date) & (dates <= end_date)]
+            if columns:
+                df = df[['date', *columns]]
+            if not df.empty:
+                results[stock_id] = df.reset_index(drop=True)
+        return results
 
     def get_news_data(self, stock_id, start_date=None, end_date=None):
         if not end_date:
@@ -66,4 +403,28 @@ class DataManager:
         if not start_date:
             start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
             
-        return self.finmind.get_stock_news(stock_id, start_date, end_date)
+        return self.source.get_stock_news(stock_id, start_date, end_date)
+
+    def update_news(self, stock_id, lookback_days=7):
+        """
+        Fetch only news newer than what is already stored, deduplicate by URL,
+        and score any unscored articles in batches. Returns the number of new articles.
+        """
+        start_date = (datetime.now() - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+        latest = self.news_store.latest_date(stock_id)
+        if latest and latest > start_date:
+            start_date = latest
+
+        news_df = self.get_news_data(stock_id, start_date=start_date)
+        added = self.news_store.add_articles(stock_id, news_df)
+        if added:
+            self.news_store.score_pending(self.sentiment_scorer)
+        return added
+
+    def get_news_sentiment(self, stock_id, days=30):
+        """
+        Daily mean news sentiment for a ticker (DataFrame indexed by date:
+        sentiment in [-1, 1], article_count), read from the local news store.
+        """
+        start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        return self.news_store.daily_sentiment(stock_id, start_date)
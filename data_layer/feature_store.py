@@ -0,0 +1,201 @@
+import os
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import logging
+
+from analysts import kernels
+
+logger = logging.getLogger(__name__)
+
+# Bump when a column definition changes: a new version is materialized from
+# scratch next to the old one, and models trained on the old one are refit.
+FEATURE_VERSION = "v2"
+# Bars of context recomputed in front of the first dirty row. Covers every
+# rolling window below and lets the EMA-based columns (RSI, MACD) converge to
+# well under 1e-6 of a full-history recompute.
+FEATURE_WARMUP_BARS = 250
+
+INSTITUTIONAL_COLUMNS = {
+    'foreign': 'Foreign_Investor',
+    'trust': 'Investment_Trust',
+    'dealer': 'Dealer',
+}
+FLOW_WINDOWS = (5, 20)
+
+FEATURE_COLUMNS = [
+    'close',
+    'ret_1', 'ret_5', 'ret_20', 'ret_60',
+    'volatility_20',
+    'ma5_ratio', 'ma10_ratio', 'ma20_ratio', 'ma60_ratio',
+    'rsi_14',
+    'macd', 'macd_signal', 'macd_hist',
+    'channel_position',
+    'vol_ratio', 'vol_rel_245',
+    *[f"{name}_{n}" for name in INSTITUTIONAL_COLUMNS for n in FLOW_WINDOWS],
+    *[f"inst_ratio_{n}" for n in FLOW_WINDOWS],
+]
+STATE_COLUMNS = ['stock_id', 'first_date', 'last_date', 'inst_from', 'inst_through', 'factors', 'materialized_at']
+
+
+def _flow_matrix(dates, institutional):
+    """
+    Institutional net shares aligned to the bar dates. The source returns a row
+    for every session it served, so a session without a row was never fetched
+    (or not yet published) and stays NaN; only an investor type missing from an
+    existing row counts as 0.
+    """
+    columns = list(INSTITUTIONAL_COLUMNS.values())
+    if institutional is None or institutional.empty:
+        return np.full((len(dates), len(columns)), np.nan)
+    inst = institutional.drop_duplicates(subset=['date'], keep='last').set_index('date')
+    inst = inst.reindex(columns=columns).fillna(0.0).reindex(dates)
+    return inst.to_numpy(dtype=float)
+
+
+def compute_features(bars, institutional=None):
+    """
+    Per-session feature columns for one ticker's (adjusted) bars, sorted by date.
+    Ratios are scale-free so tickers at any price level share one model:
+    returns and MA/MACD ratios are fractions of close, volatility_20 is annualised,
+    rsi_14 is Wilder RSI on 0-100, channel_position is the 20-day range position
+    on 0-1, vol_rel_245 is volume over its up-to-245-session mean. Institutional
+    flows are net shares summed over 5/20 sessions; inst_ratio_n is the three
+    investor types combined over the traded volume of the same window; windows
+    touching a session without institutional data are NaN.
+    """
+    dates = bars['date'].astype(str).str[:10].to_numpy()
+    close = bars['close'].to_numpy(dtype=float)
+    high = bars['high'].to_numpy(dtype=float)
+    low = bars['low'].to_numpy(dtype=float)
+    vol = bars['vol'].to_numpy(dtype=float)
+
+    columns = {'close': close}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for n in (1, 5, 20, 60):
+            columns[f'ret_{n}'] = close / kernels.shift(close, n) - 1
+        columns['volatility_20'] = kernels.rolling_std(columns['ret_1'], 20) * np.sqrt(252)
+        for n in (5, 10, 20, 60):
+            columns[f'ma{n}_ratio'] = close / kernels.sma(close, n) - 1
+        columns['rsi_14'] = kernels.rsi(close, 14)
+        line, signal, hist = kernels.macd(close)
+        columns['macd'], columns['macd_signal'], columns['macd_hist'] = line / close, signal / close, hist / close
+        highest, lowest = kernels.rolling_max(high, 20), kernels.rolling_min(low, 20)
+        columns['channel_position'] = (close - lowest) / (highest - lowest)
+        columns['vol_ratio'] = kernels.sma(vol, 5) / kernels.sma(vol, 20) - 1
+        columns['vol_rel_245'] = vol / kernels.sma(vol, 245, min_periods=1)
+
+        flows = _flow_matrix(dates, institutional)
+        for n in FLOW_WINDOWS:
+            sums = kernels.sma(flows, n) * n
+            for j, name in enumerate(INSTITUTIONAL_COLUMNS):
+                columns[f'{name}_{n}'] = sums[:, j]
+            columns[f'inst_ratio_{n}'] = sums.sum(axis=1) / (kernels.sma(vol, n) * n)
+
+    features = pd.DataFrame(columns, columns=FEATURE_COLUMNS)
+    features = features.replace([np.inf, -np.inf], np.nan)
+    features.insert(0, 'date', dates)
+    return features
+
+
+class FeatureStore:
+    """
+    Versioned per-ticker feature tables under <root>/features/<version>/, one CSV
+    per ticker (date x FEATURE_COLUMNS) plus a state table recording, per ticker,
+    the bar range and institutional date the rows were computed from and a
+    fingerprint of the corporate-action factors.
+
+    Materialization is incremental: only rows after the last materialized bar
+    (or after the last institutional date, whose flows may still have been
+    missing) are recomputed, from FEATURE_WARMUP_BARS of context. A changed
+    factor table (adjusted history rewritten) or newly stored older bars or
+    institutional rows force a full recompute of that ticker.
+    """
+    def __init__(self, root, version=FEATURE_VERSION):
+        self.version = version
+        self.dir = os.path.join(root, "features", version)
+        os.makedirs(self.dir, exist_ok=True)
+        self.state_path = os.path.join(self.dir, "_state.csv")
+        self._lock = threading.RLock()
+        self._state = self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        df = pd.read_csv(self.state_path, dtype=str).fillna("")
+        return {row['stock_id']: row for row in df.to_dict(orient='records')}
+
+    def _save_state(self):
+        df = pd.DataFrame(list(self._state.values()), columns=STATE_COLUMNS)
+        df.to_csv(self.state_path, index=False)
+
+    def path(self, stock_id):
+        return os.path.join(self.dir, f"{stock_id}.csv")
+
+    def state(self, stock_id):
+        return self._state.get(stock_id)
+
+    def load(self, stock_id):
+        path = self.path(stock_id)
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path, dtype={'date': str})
+
+    def read(self, stock_id, start_date=None, end_date=None, columns=None):
+        """Feature rows for [start_date, end_date]; None when nothing is materialized."""
+        df = self.load(stock_id)
+        if df is None:
+            return None
+        if start_date:
+            df = df[df['date'] >= start_date]
+        if end_date:
+            df = df[df['date'] <= end_date]
+        if columns:
+            df = df[['date', *columns]]
+        return df.reset_index(drop=True) if not df.empty else None
+
+    def materialize(self, stock_id, bars, institutional=None, factors_key=""):
+        """
+        Bring a ticker's features up to date with its full adjusted bar history.
+        Returns the number of rows (re)written; 0 when already current.
+        """
+        if bars is None or bars.empty:
+            return 0
+        dates = bars['date'].astype(str).str[:10].to_numpy()
+        has_inst = institutional is not None and not institutional.empty
+        inst_from = str(institutional['date'].min())[:10] if has_inst else ""
+        inst_through = str(institutional['date'].max())[:10] if has_inst else ""
+
+        with self._lock:
+            state = self._state.get(stock_id)
+            incremental = (state is not None and state['factors'] == factors_key
+                           and state['first_date'] <= dates[0]
+                           and (state['inst_from'] == inst_from or "" < state['inst_from'] <= inst_from)
+                           and os.path.exists(self.path(stock_id)))
+            if incremental:
+                if dates[-1] <= state['last_date'] and inst_through == state['inst_through']:
+                    return 0
+                # Rows after the last institutional date were stored with missing flows
+                dirty_after = min(state['last_date'], state['inst_through'] or state['last_date'])
+                start = np.searchsorted(dates, dirty_after, side='right')
+                context = bars.iloc[max(start - FEATURE_WARMUP_BARS, 0):]
+                fresh = compute_features(context, institutional)
+                fresh = fresh[fresh['date'].to_numpy() > dirty_after]
+                existing = self.load(stock_id)
+                features = pd.concat([existing[existing['date'] <= dirty_after], fresh], ignore_index=True)
+            else:
+                fresh = features = compute_features(bars, institutional)
+
+            features.to_csv(self.path(stock_id), index=False, float_format="%.10g")
+            self._state[stock_id] = {
+                'stock_id': stock_id,
+                'first_date': dates[0],
+                'last_date': dates[-1],
+                'inst_from': inst_from,
+                'inst_through': inst_through,
+                'factors': factors_key,
+                'materialized_at': datetime.now().isoformat(timespec='seconds')
+            }
+            self._save_state()
+        return len(fresh)
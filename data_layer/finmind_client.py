@@ -1,10 +1,13 @@
 import pandas as pd
 from FinMind.data import DataLoader
 import logging
+from .base_source import DataSource
 
 logger = logging.getLogger(__name__)
 
-class FinMindClient:
+class FinMindClient(DataSource):
+    name = "finmind"
+
     def __init__(self, token=None):
         self.loader = DataLoader()
         if token:
@@ -22,8 +25,10 @@ class FinMindClient:
                 end_date=end_date
             )
             
-            if df is None or df.empty:
+            if df is None:
                 return None
+            if df.empty:
+                return pd.DataFrame()
             
             # Normalize column names to match expected schema
             column_mapping = {
@@ -50,8 +55,10 @@ class FinMindClient:
                 end_date=end_date
             )
             
-            if df is None or df.empty:
+            if df is None:
                 return None
+            if df.empty:
+                return pd.DataFrame()
             
             # Calculate net buy (buy - sell)
             df['net_buy'] = df['buy'] - df['sell']
@@ -80,6 +87,60 @@ class FinMindClient:
             logger.error(f"Error fetching FinMind institutional investors: {e}")
             return None
 
+    def get_corporate_actions(self, stock_id, start_date, end_date):
+        """
+        Fetch ex-dividend/ex-right results and split price changes, expressed as
+        price adjustment factors (after_price / before_price).
+        """
+        frames = []
+        try:
+            dividends = self.loader.taiwan_stock_dividend_result(
+                stock_id=stock_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+            if dividends is not None and not dividends.empty:
+                frames.append(pd.DataFrame({
+                    'date': dividends['date'],
+                    'kind': 'dividend',
+                    'factor': dividends['after_price'] / dividends['before_price']
+                }))
+        except Exception as e:
+            logger.error(f"Error fetching FinMind dividend results: {e}")
+
+        try:
+            splits = self.loader.get_data(
+                dataset="TaiwanStockSplitPrice",
+                data_id=stock_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+            if splits is not None and not splits.empty:
+                frames.append(pd.DataFrame({
+                    'date': splits['date'],
+                    'kind': 'split',
+                    'factor': splits['after_price'] / splits['before_price']
+                }))
+        except Exception as e:
+            logger.error(f"Error fetching FinMind split prices: {e}")
+
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True)
+
+    def get_stock_info(self):
+        """
+        Fetch the market-wide listing table (industry classification per ticker).
+        """
+        try:
+            df = self.loader.taiwan_stock_info()
+            if df is None or df.empty:
+                return None
+            return df
+        except Exception as e:
+            logger.error(f"Error fetching FinMind stock info: {e}")
+            return None
+
     def get_stock_news(self, stock_id, start_date, end_date):
         """
         Fetch stock related news.
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _margin_days(bars):
+    """Calendar days that hold at least `bars` sessions (same slack as TradingCalendar.shift)."""
+    return bars * 7 // 5 + 30 if bars else 0
+
+
+class HistoryChunk:
+    """
+    One slice of the market history.
+
+    frames maps stock_id -> bars (sorted by date). Only rows dated inside
+    [start, end] belong to the chunk; rows before it are warm-up context for
+    rolling windows and rows after it are look-ahead (e.g. for forward returns).
+    start/end of None mean the chunk is not bounded on that side. lookahead_bars
+    is how many bars past end each frame carries, or None when the frames run to
+    the end of the stored window (nothing after end is missing).
+    """
+    __slots__ = ("start", "end", "frames", "lookahead_bars")
+
+    def __init__(self, start, end, frames, lookahead_bars=None):
+        self.start = start
+        self.end = end
+        self.frames = frames
+        self.lookahead_bars = lookahead_bars
+
+    def active_mask(self, df):
+        dates = df['date'].to_numpy()
+        mask = np.ones(len(df), dtype=bool)
+        if self.start:
+            mask &= dates >= self.start
+        if self.end:
+            mask &= dates <= self.end
+        return mask
+
+    def active(self, stock_id):
+        """The chunk's own rows for a ticker, without warm-up or look-ahead context."""
+        df = self.frames[stock_id]
+        return df[self.active_mask(df)].reset_index(drop=True)
+
+
+class HistoryIterator:
+    """
+    Memory-bounded iteration over the locally stored history of many tickers.
+
+    Only one chunk of bars is ever held in memory: either a group of tickers
+    with their full window (iter_ticker_groups) or every ticker restricted to a
+    block of dates plus warmup_bars of trailing context (iter_date_blocks).
+    Bars are read from the price store; call DataManager.get_stock_data_batch
+    (or pass sync=True) first if the store may be missing ranges.
+    Prices stay float64 by default so scores match the in-memory path exactly;
+    float_dtype='float32' halves the footprint at the cost of small numeric
+    differences (a score on a threshold can flip).
+    """
+    def __init__(self, data_manager, columns=None, adjusted=True, float_dtype=None):
+        self.data_manager = data_manager
+        self.columns = columns
+        self.adjusted = adjusted
+        self.float_dtype = float_dtype
+
+    def _compact(self, df):
+        if df is None or df.empty:
+            return None
+        if self.columns:
+            df = df[[c for c in ['stock_id', 'date', *self.columns] if c in df.columns]]
+        if self.float_dtype:
+            floats = df.select_dtypes(include='float64').columns
+            df = df.astype({c: self.float_dtype for c in floats})
+        return df.reset_index(drop=True)
+
+    def _read(self, stock_id, start_date=None, end_date=None):
+        return self.data_manager._read_prices(stock_id, start_date, end_date, self.adjusted, use_memory=False)
+
+    def iter_ticker_groups(self, stock_ids, start_date=None, end_date=None, group_size=100, sync=False):
+        """
+        Yield HistoryChunks of up to group_size tickers, each with its whole window.
+        Suited to per-ticker work such as backtests, where no context crosses chunks.
+        """
+        start_date, end_date = self.data_manager._default_window(start_date, end_date)
+        for i in range(0, len(stock_ids), group_size):
+            group = stock_ids[i:i + group_size]
+            if sync:
+                self.data_manager._sync_prices(group, start_date, end_date)
+            frames = {}
+            for stock_id in group:
+                df = self._compact(self._read(stock_id, start_date, end_date))
+                if df is not None:
+                    frames[stock_id] = df
+            if frames:
+                yield HistoryChunk(start_date, end_date, frames)
+
+    def iter_date_blocks(self, stock_ids, start_date, end_date=None, block_days=365, warmup_bars=252, lookahead_bars=20):
+        """
+        Yield one HistoryChunk per calendar block of block_days, covering every ticker.
+        Each frame carries warmup_bars stored bars before the block (so 60/120/252-bar
+        rolling windows are already primed at the first active row) and lookahead_bars
+        after it; the default covers the 20-bar Backtester horizon, so forward returns
+        of rows near a block's end are not lost. Chunks overlap only by that context, so peak memory is about
+        n_tickers x (block + warmup + lookahead) bars. Each ticker is read only for
+        the block padded by enough calendar days for the context, then trimmed to
+        the exact bar counts; a ticker suspended for longer than that padding gets
+        fewer context bars.
+        """
+        start_date, end_date = self.data_manager._default_window(start_date, end_date)
+        block_start = pd.Timestamp(start_date)
+        last = pd.Timestamp(end_date)
+
+        while block_start <= last:
+            block_end = min(block_start + pd.Timedelta(days=block_days - 1), last)
+            start_str, end_str = block_start.strftime("%Y-%m-%d"), block_end.strftime("%Y-%m-%d")
+            read_start = (block_start - pd.Timedelta(days=_margin_days(warmup_bars))).strftime("%Y-%m-%d")
+            read_end = (block_end + pd.Timedelta(days=_margin_days(lookahead_bars))).strftime("%Y-%m-%d")
+
+            frames = {}
+            for stock_id in stock_ids:
+                df = self._read(stock_id, read_start, read_end)
+                if df is None:
+                    continue
+                dates = df['date'].to_numpy()
+                lo = np.searchsorted(dates, start_str, side='left')
+                hi = np.searchsorted(dates, end_str, side='right')
+                if lo == hi:
+                    continue
+                df = self._compact(df.iloc[max(lo - warmup_bars, 0):hi + lookahead_bars])
+                frames[stock_id] = df
+            if frames:
+                yield HistoryChunk(start_str, end_str, frames, lookahead_bars)
+            block_start = block_end + pd.Timedelta(days=1)
@@ -0,0 +1,11 @@
+from .price_store import PriceStore
+
+
+class InstitutionalStore(PriceStore):
+    """
+    Local store of daily institutional net buy/sell (one CSV per ticker under
+    <root>/institutional/, columns date plus one net-shares column per investor
+    type), with the same coverage bookkeeping as the bar store so only ranges
+    that were never requested are fetched from the source.
+    """
+    SUBDIR = "institutional"
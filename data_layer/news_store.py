@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news_articles (
+    article_id TEXT PRIMARY KEY,
+    stock_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    source TEXT,
+    sentiment REAL
+);
+CREATE INDEX IF NOT EXISTS idx_news_stock_date ON news_articles (stock_id, date);
+CREATE INDEX IF NOT EXISTS idx_news_unscored ON news_articles (sentiment) WHERE sentiment IS NULL;
+"""
+
+
+def article_id(stock_id, row):
+    """
+    Stable article key: hash of the URL, or of date + title when the URL is missing.
+    """
+    link = row.get('link')
+    key = link if isinstance(link, str) and link else f"{row.get('date')}|{row.get('title')}"
+    return hashlib.sha1(f"{stock_id}|{key}".encode("utf-8")).hexdigest()
+
+
+class NewsStore:
+    """
+    SQLite store for news articles, deduplicated by URL hash, with per-article sentiment.
+    A short-lived connection is opened per call so the store can be shared across threads.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def latest_date(self, stock_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM news_articles WHERE stock_id = ?", (stock_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add_articles(self, stock_id, news_df):
+        """
+        Insert articles that are not stored yet. Returns the number of new articles.
+        """
+        if news_df is None or news_df.empty:
+            return 0
+
+        rows = []
+        for record in news_df.to_dict(orient='records'):
+            rows.append((
+                article_id(stock_id, record),
+                stock_id,
+                str(record.get('date', ''))[:10],
+                record.get('title'),
+                record.get('link'),
+                record.get('source'),
+            ))
+
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO news_articles (article_id, stock_id, date, title, link, source) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    def unscored(self, limit=500):
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT article_id, title FROM news_articles WHERE sentiment IS NULL LIMIT ?",
+                conn, params=(limit,)
+            )
+
+    def update_sentiment(self, article_ids, scores):
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE news_articles SET sentiment = ? WHERE article_id = ?",
+                [(float(s), a) for a, s in zip(article_ids, scores)]
+            )
+
+    def score_pending(self, scorer, batch_size=500):
+        """
+        Score every article that has no sentiment yet, in batches. Returns the number scored.
+        """
+        scored = 0
+        while True:
+            pending = self.unscored(batch_size)
+            if pending.empty:
+                return scored
+            self.update_sentiment(pending['article_id'], scorer.score_batch(pending['title']))
+            scored += len(pending)
+
+    def daily_sentiment(self, stock_id, start_date=None):
+        """
+        Per-day mean sentiment and article count for a ticker, indexed by date.
+        """
+        query = ("SELECT date, AVG(sentiment) AS sentiment, COUNT(*) AS article_count "
+                 "FROM news_articles WHERE stock_id = ? AND sentiment IS NOT NULL")
+        params = [stock_id]
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        query += " GROUP BY date ORDER BY date"
+
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params, index_col='date')
@@ -0,0 +1,181 @@
+import os
+import json
+import shutil
+import time
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+PANEL_FIELDS = ['open', 'high', 'low', 'close', 'vol']
+
+
+class PanelStore:
+    """
+    Binary date x ticker panels under <root>/panel/: one .npy file per field in a
+    versioned snapshot directory plus index.json with the date and ticker axes. Files are opened with mmap_mode='r',
+    so every process (workers, the Streamlit app, backtests) shares one copy of the
+    data through the page cache and date slices are zero-copy views.
+
+    Panels are a read-optimised snapshot of the price store; rebuild them with
+    DataManager.build_panel after new bars arrive.
+    """
+    def __init__(self, root):
+        self.dir = os.path.join(root, "panel")
+        self.index_path = os.path.join(self.dir, "index.json")
+        self._lock = threading.RLock()
+        self._index = None
+        self._arrays = {}
+        self._mtime = None
+
+    def _field_path(self, field, version=None):
+        version = version or self._index['version']
+        return os.path.join(self.dir, version, f"{field}.npy")
+
+    def _refresh(self):
+        """(Re)open the index and drop stale mappings when a rebuild replaced the files."""
+        if not os.path.exists(self.index_path):
+            self._index, self._arrays, self._mtime = None, {}, None
+            return None
+        mtime = os.path.getmtime(self.index_path)
+        if mtime != self._mtime:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            index['dates'] = np.array(index['dates'])
+            index['positions'] = {t: i for i, t in enumerate(index['tickers'])}
+            self._index, self._arrays, self._mtime = index, {}, mtime
+        return self._index
+
+    @property
+    def index(self):
+        with self._lock:
+            return self._refresh()
+
+    def array(self, field):
+        """The whole memory-mapped date x ticker array for a field."""
+        with self._lock:
+            if self._refresh() is None:
+                return None
+            if field not in self._arrays:
+                self._arrays[field] = np.load(self._field_path(field), mmap_mode='r')
+            return self._arrays[field]
+
+    def covers(self, stock_ids, field, start_date, adjusted, last_dates, changed_at=0.0):
+        """
+        True when the snapshot can answer the request as the price store would:
+        same adjustment mode, every ticker present, a start inside the build
+        window, and no ticker with bars newer than the snapshot (last_dates maps
+        stock_id -> last stored bar date). changed_at is the timestamp of the last
+        change to other inputs (e.g. the corporate-action table).
+        """
+        index = self.index
+        if index is None or field not in index['fields'] or index['adjusted'] != adjusted:
+            return False
+        if changed_at > index['built_ts']:
+            return False
+        if start_date < index['start_date']:
+            return False
+        positions = index['positions']
+        return all(s in positions and (last_dates.get(s) or "") <= index['dates'][-1] for s in stock_ids)
+
+    def read(self, field, stock_ids=None, start_date=None, end_date=None):
+        """
+        DataFrame view of one field. Rows are sliced without copying; selecting a
+        subset of tickers copies only those columns.
+        """
+        index = self.index
+        data = self.array(field)
+        if index is None or data is None:
+            return pd.DataFrame()
+
+        dates = index['dates']
+        lo = np.searchsorted(dates, start_date, side='left') if start_date else 0
+        hi = np.searchsorted(dates, end_date, side='right') if end_date else len(dates)
+        block = data[lo:hi]
+        tickers = index['tickers']
+        if stock_ids is not None:
+            columns = [index['positions'][s] for s in stock_ids if s in index['positions']]
+            block = block[:, columns]
+            tickers = [tickers[c] for c in columns]
+
+        panel = pd.DataFrame(block, index=pd.Index(dates[lo:hi], name='date'), columns=tickers, copy=False)
+        # Drop leading/trailing dates on which none of the selected tickers traded
+        return panel.dropna(how='all')
+
+    def build(self, load, stock_ids, start_date, end_date, adjusted=True, fields=None):
+        """
+        Write a new snapshot from load(stock_id) -> bars. Tickers are loaded twice
+        (once for the date axis, once to fill their column), so only one ticker's
+        bars are in memory at a time. Each snapshot goes to its own version
+        directory and index.json is swapped in last with os.replace, so readers
+        never mix files from different builds; mappings of older versions stay valid.
+        """
+        fields = fields or PANEL_FIELDS
+        built_ts = time.time()
+        version = datetime.fromtimestamp(built_ts).strftime("%Y%m%d%H%M%S%f")
+
+        tickers, date_set = [], set()
+        for stock_id in stock_ids:
+            bars = load(stock_id)
+            if bars is None or bars.empty:
+                continue
+            tickers.append(stock_id)
+            date_set.update(bars['date'].astype(str).str[:10])
+        if not tickers:
+            logger.warning("No bars to build a price panel from")
+            return None
+
+        dates = np.array(sorted(date_set))
+        positions = {t: i for i, t in enumerate(tickers)}
+        os.makedirs(os.path.join(self.dir, version), exist_ok=True)
+
+        outputs = {
+            f: np.lib.format.open_memmap(self._field_path(f, version), mode='w+', dtype=np.float64,
+                                         shape=(len(dates), len(tickers)))
+            for f in fields
+        }
+        for out in outputs.values():
+            out[:] = np.nan
+
+        for stock_id in tickers:
+            bars = load(stock_id)
+            rows = np.searchsorted(dates, bars['date'].astype(str).str[:10].to_numpy())
+            for field, out in outputs.items():
+                if field in bars.columns:
+                    out[rows, positions[stock_id]] = bars[field].to_numpy(dtype=float)
+
+        for out in outputs.values():
+            out.flush()
+        del outputs
+
+        index = {
+            "version": version,
+            "tickers": tickers,
+            "dates": dates.tolist(),
+            "fields": list(fields),
+            "adjusted": adjusted,
+            "start_date": start_date,
+            "end_date": end_date,
+            "built_at": datetime.fromtimestamp(built_ts).isoformat(timespec='seconds'),
+            "built_ts": built_ts
+        }
+        with self._lock:
+            previous = (self._refresh() or {}).get('version')
+            tmp_index = self.index_path + ".tmp"
+            with open(tmp_index, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_index, self.index_path)
+            self._mtime = None
+            self._prune(keep={version, previous})
+        logger.info(f"Built price panel: {len(dates)} dates x {len(tickers)} tickers, fields {', '.join(fields)}")
+        return index
+
+    def _prune(self, keep):
+        """Remove snapshot directories older than the current and previous build."""
+        for name in os.listdir(self.dir):
+            path = os.path.join(self.dir, name)
+            if os.path.isdir(path) and name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
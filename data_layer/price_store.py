@@ -0,0 +1,93 @@
+import os
+import threading
+from datetime import datetime
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+COVERAGE_COLUMNS = ['stock_id', 'requested_start', 'last_date', 'checked_at']
+
+
+class PriceStore:
+    """
+    Local store of raw (unadjusted) daily bars, one CSV per ticker under <root>/bars/.
+
+    A small coverage table remembers, per ticker, the earliest start date already
+    requested, the last stored bar and when the source was last checked, so the
+    data manager only fetches the date ranges it has never asked for.
+    """
+    SUBDIR = "bars"
+
+    def __init__(self, root):
+        self.bars_dir = os.path.join(root, self.SUBDIR)
+        os.makedirs(self.bars_dir, exist_ok=True)
+        self.coverage_path = os.path.join(self.bars_dir, "_coverage.csv")
+        self._lock = threading.RLock()
+        self._coverage = self._load_coverage()
+
+    def _load_coverage(self):
+        if not os.path.exists(self.coverage_path):
+            return {}
+        df = pd.read_csv(self.coverage_path, dtype=str).fillna("")
+        return {row['stock_id']: row for row in df.to_dict(orient='records')}
+
+    def _save_coverage(self):
+        df = pd.DataFrame(list(self._coverage.values()), columns=COVERAGE_COLUMNS)
+        df.to_csv(self.coverage_path, index=False)
+
+    def path(self, stock_id):
+        return os.path.join(self.bars_dir, f"{stock_id}.csv")
+
+    def coverage(self, stock_id):
+        return self._coverage.get(stock_id)
+
+    def load(self, stock_id):
+        path = self.path(stock_id)
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path, dtype={'stock_id': str, 'date': str})
+
+    def read(self, stock_id, start_date=None, end_date=None):
+        """Raw bars for a ticker within [start_date, end_date]; None when nothing is stored."""
+        df = self.load(stock_id)
+        if df is None:
+            return None
+        if start_date:
+            df = df[df['date'] >= start_date]
+        if end_date:
+            df = df[df['date'] <= end_date]
+        return df.reset_index(drop=True) if not df.empty else None
+
+    def append(self, stock_id, bars):
+        """Merge new bars into the ticker file (newer rows win on duplicate dates)."""
+        if bars is None or bars.empty:
+            return
+        bars = bars.copy()
+        bars['date'] = bars['date'].astype(str).str[:10]
+        with self._lock:
+            existing = self.load(stock_id)
+            merged = bars if existing is None else pd.concat([existing, bars], ignore_index=True)
+            merged = merged.drop_duplicates(subset=['date'], keep='last').sort_values('date')
+            merged.to_csv(self.path(stock_id), index=False)
+
+    def mark_checked(self, stock_id, requested_start=None, refreshed=True):
+        """
+        Record a successful query of the source. requested_start extends the
+        covered window backwards (None keeps it); refreshed=False keeps the
+        previous checked_at, so a failed tail fetch is retried on the next call.
+        """
+        with self._lock:
+            df = self.load(stock_id)
+            previous = self._coverage.get(stock_id) or {}
+            starts = [s for s in (previous.get('requested_start'), requested_start) if s]
+            if not starts:
+                return
+            now = datetime.now().isoformat(timespec='seconds')
+            self._coverage[stock_id] = {
+                'stock_id': stock_id,
+                'requested_start': min(starts),
+                'last_date': df['date'].iloc[-1] if df is not None and not df.empty else "",
+                'checked_at': now if refreshed or not previous.get('checked_at') else previous['checked_at']
+            }
+            self._save_coverage()
@@ -0,0 +1,141 @@
+import os
+import time
+import random
+import logging
+import pandas as pd
+from .base_source import DataSource
+
+logger = logging.getLogger(__name__)
+
+def fixture_path(fixture_dir, dataset, stock_id):
+    """Fixture layout: <fixture_dir>/<dataset>/<stock_id>.csv"""
+    return os.path.join(fixture_dir, dataset, f"{stock_id}.csv")
+
+
+def _filter_dates(df, start_date, end_date):
+    dates = df['date'].astype(str).str[:10]
+    mask = pd.Series(True, index=df.index)
+    if start_date:
+        mask &= dates >= start_date
+    if end_date:
+        mask &= dates <= end_date
+    return df[mask].reset_index(drop=True)
+
+
+class ReplayClient(DataSource):
+    """
+    Offline data source that serves recorded frames from local CSV fixtures.
+
+    latency (seconds, plus optional uniform jitter) is added to every call and
+    failure_rate is the probability that a call fails like a network error, so
+    concurrency and cache behaviour can be benchmarked without FinMind quotas.
+    A fixed seed makes failure injection reproducible.
+    """
+    name = "replay"
+
+    def __init__(self, fixture_dir="fixtures", latency=0.0, jitter=0.0, failure_rate=0.0,
+                 seed=None, fail_stock_ids=None):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.fail_stock_ids = set(fail_stock_ids or [])
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def _simulate(self, stock_id):
+        """Apply configured latency; return True when this call should fail."""
+        self.calls += 1
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        failed = stock_id in self.fail_stock_ids or self.rng.random() < self.failure_rate
+        if failed:
+            self.failures += 1
+        return failed
+
+    def _load(self, dataset, stock_id, start_date, end_date):
+        if self._simulate(stock_id):
+            logger.error(f"Injected replay failure for {dataset}/{stock_id}")
+            return None
+
+        path = fixture_path(self.fixture_dir, dataset, stock_id)
+        if not os.path.exists(path):
+            logger.warning(f"No replay fixture at {path}")
+            return None
+
+        # An empty slice is a valid answer (no rows in the range), not a failure
+        return _filter_dates(pd.read_csv(path, dtype={'stock_id': str}), start_date, end_date)
+
+    def get_stock_price(self, stock_id, start_date, end_date):
+        return self._load("stock_price", stock_id, start_date, end_date)
+
+    def get_institutional_investors(self, stock_id, start_date, end_date):
+        return self._load("institutional", stock_id, start_date, end_date)
+
+    def get_corporate_actions(self, stock_id, start_date, end_date):
+        return self._load("corporate_actions", stock_id, start_date, end_date)
+
+    def get_stock_news(self, stock_id, start_date, end_date):
+        df = self._load("news", stock_id, start_date, end_date)
+        return df if df is not None else pd.DataFrame()
+
+    def get_stock_info(self):
+        """Market-wide listing table from <fixture_dir>/stock_info/all.csv."""
+        if self._simulate("stock_info"):
+            logger.error("Injected replay failure for stock_info")
+            return None
+        path = fixture_path(self.fixture_dir, "stock_info", "all")
+        if not os.path.exists(path):
+            logger.warning(f"No replay fixture at {path}")
+            return None
+        return pd.read_csv(path, dtype={'stock_id': str})
+
+
+class RecordingClient(DataSource):
+    """
+    Wraps a live source and records every non-empty response as a replay fixture,
+    merging with rows already on disk (deduplicated by date, or link for news).
+    """
+    def __init__(self, source, fixture_dir="fixtures"):
+        self.source = source
+        self.fixture_dir = fixture_dir
+        self.name = f"recording:{source.name}"
+
+    def _record(self, dataset, stock_id, df, key_columns):
+        if df is None or df.empty:
+            return df
+
+        path = fixture_path(self.fixture_dir, dataset, stock_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        merged = df
+        if os.path.exists(path):
+            existing = pd.read_csv(path, dtype={'stock_id': str})
+            merged = pd.concat([existing, df], ignore_index=True)
+        keys = [c for c in key_columns if c in merged.columns]
+        merged = merged.drop_duplicates(subset=keys or None, keep='last')
+        if 'date' in merged.columns:
+            merged = merged.sort_values('date')
+        merged.to_csv(path, index=False)
+        return df
+
+    def get_stock_price(self, stock_id, start_date, end_date):
+        df = self.source.get_stock_price(stock_id, start_date, end_date)
+        return self._record("stock_price", stock_id, df, ['date'])
+
+    def get_institutional_investors(self, stock_id, start_date, end_date):
+        df = self.source.get_institutional_investors(stock_id, start_date, end_date)
+        return self._record("institutional", stock_id, df, ['date'])
+
+    def get_corporate_actions(self, stock_id, start_date, end_date):
+        df = self.source.get_corporate_actions(stock_id, start_date, end_date)
+        return self._record("corporate_actions", stock_id, df, ['date', 'kind'])
+
+    def get_stock_news(self, stock_id, start_date, end_date):
+        df = self.source.get_stock_news(stock_id, start_date, end_date)
+        return self._record("news", stock_id, df, ['link'])
+
+    def get_stock_info(self):
+        df = self.source.get_stock_info()
+        return self._record("stock_info", "all", df, ['stock_id', 'industry_category'])
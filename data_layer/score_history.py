@@ -0,0 +1,184 @@
+import argparse
+import logging
+import sqlite3
+from contextlib import contextmanager
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CONSENSUS_KEY = "consensus"
+
+# date is the bar date the scores were computed from; a rerun on the same bar replaces the row.
+# The primary key serves the diff (two date seeks), the secondary index serves per-ticker history.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyst_scores (
+    date TEXT NOT NULL,
+    stock_id TEXT NOT NULL,
+    analyst TEXT NOT NULL,
+    score REAL NOT NULL,
+    prediction TEXT,
+    PRIMARY KEY (date, stock_id, analyst)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_scores_stock ON analyst_scores (stock_id, analyst, date);
+"""
+
+DIFF_COLUMNS = ['stock_id', 'analyst', 'score_from', 'score_to', 'change',
+                'prediction_from', 'prediction_to', 'flipped']
+
+
+def consensus_prediction(consensus):
+    """Majority direction of the analysts behind a weighted_consensus result."""
+    if consensus['bullish'] > consensus['bearish']:
+        return "看多"
+    if consensus['bearish'] > consensus['bullish']:
+        return "看空"
+    return "觀望"
+
+
+class ScoreHistory:
+    """
+    SQLite history of every analyst's score and prediction per ticker and bar date,
+    plus the weighted consensus under the analyst key "consensus".
+    Same connection-per-call pattern as NewsStore, so it can be shared across threads.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def rows_from_result(result, date=None):
+        """
+        (date, stock_id, analyst, score, prediction) rows for one analysis result.
+        Analysts that timed out or failed are skipped so their neutral fallback is not recorded.
+        """
+        date = str(date or result['as_of'])[:10]
+        stock_id = str(result['stock_id'])
+        rows = [(date, stock_id, a['key'], float(a['score']), a['prediction'])
+                for a in result['analysis'] if a.get('status', 'ok') == 'ok' and a.get('key')]
+        consensus = result['consensus']
+        if consensus.get('score') is not None:
+            rows.append((date, stock_id, CONSENSUS_KEY, float(consensus['score']),
+                         consensus_prediction(consensus)))
+        return rows
+
+    def record(self, result, date=None):
+        return self.record_rows(self.rows_from_result(result, date))
+
+    def record_rows(self, rows):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO analyst_scores (date, stock_id, analyst, score, prediction) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def resolve_date(self, date):
+        """Latest recorded date on or before date (None when nothing is recorded yet)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM analyst_scores WHERE date <= ?", (str(date)[:10],)
+            ).fetchone()
+        return row[0]
+
+    def previous_date(self, date):
+        """Latest recorded date strictly before date."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(date) FROM analyst_scores WHERE date < ?", (str(date)[:10],)
+            ).fetchone()
+        return row[0]
+
+    def history(self, stock_id, analyst=None, start_date=None):
+        """Score and prediction over time for one ticker, one column pair per analyst row."""
+        query = "SELECT date, analyst, score, prediction FROM analyst_scores WHERE stock_id = ?"
+        params = [str(stock_id)]
+        if analyst:
+            query += " AND analyst = ?"
+            params.append(analyst)
+        if start_date:
+            query += " AND date >= ?"
+            params.append(start_date)
+        query += " ORDER BY analyst, date"
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def diff(self, start_date, end_date, analyst=None, min_change=0.0):
+        """
+        Score changes between the snapshots at start_date and end_date (each resolved to the
+        latest recorded date on or before it) for every ticker present in both.
+        Returns DIFF_COLUMNS rows where the score moved by more than min_change or the
+        prediction flipped; only the two snapshot dates are read through the primary key.
+        """
+        date_from, date_to = self.resolve_date(start_date), self.resolve_date(end_date)
+        if date_from is None or date_to is None or date_from == date_to:
+            return pd.DataFrame(columns=DIFF_COLUMNS)
+
+        query = ("SELECT a.stock_id, a.analyst, a.score AS score_from, b.score AS score_to, "
+                 "a.prediction AS prediction_from, b.prediction AS prediction_to "
+                 "FROM analyst_scores a JOIN analyst_scores b "
+                 "ON b.date = ? AND b.stock_id = a.stock_id AND b.analyst = a.analyst "
+                 "WHERE a.date = ?")
+        params = [date_to, date_from]
+        if analyst:
+            query += " AND a.analyst = ?"
+            params.append(analyst)
+        with self._connect() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+
+        df['change'] = df['score_to'] - df['score_from']
+        df['flipped'] = df['prediction_from'] != df['prediction_to']
+        df = df[(df['change'].abs() > min_change) | df['flipped']]
+        df = df.sort_values('change', ascending=False, kind='stable').reset_index(drop=True)
+        df.attrs.update(date_from=date_from, date_to=date_to)
+        return df[DIFF_COLUMNS]
+
+    def upgrades(self, start_date, end_date, analyst=None, min_change=0.0):
+        df = self.diff(start_date, end_date, analyst, min_change)
+        return df[df['change'] > min_change]
+
+    def downgrades(self, start_date, end_date, analyst=None, min_change=0.0):
+        df = self.diff(start_date, end_date, analyst, min_change)
+        return df[df['change'] < -min_change].sort_values('change').reset_index(drop=True)
+
+    def flips(self, start_date, end_date, analyst=None):
+        df = self.diff(start_date, end_date, analyst)
+        return df[df['flipped']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyst score changes between two dates")
+    parser.add_argument("--db", type=str, default="reports/score_history.db")
+    parser.add_argument("--from_date", type=str, default=None, help="defaults to the snapshot before --to_date")
+    parser.add_argument("--to_date", type=str, default="9999-12-31")
+    parser.add_argument("--analyst", type=str, default=None)
+    parser.add_argument("--min_change", type=float, default=0.0)
+    args = parser.parse_args()
+
+    history = ScoreHistory(args.db)
+    to_date = history.resolve_date(args.to_date)
+    from_date = args.from_date or (history.previous_date(to_date) if to_date else None)
+    if from_date is None:
+        print("Not enough recorded snapshots to diff")
+        return
+    df = history.diff(from_date, to_date, args.analyst, args.min_change)
+    print(f"{df.attrs.get('date_from', from_date)} -> {df.attrs.get('date_to', to_date)}: "
+          f"{int((df['change'] > args.min_change).sum())} upgrades, "
+          f"{int((df['change'] < -args.min_change).sum())} downgrades, "
+          f"{int(df['flipped'].sum())} prediction flips")
+    if not df.empty:
+        print(df.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Finance-oriented zh-TW lexicon; weights let strong terms count more than mild ones.
+POSITIVE_TERMS = {
+    "創新高": 2.0, "上修": 2.0, "大漲": 2.0, "漲停": 2.0, "報喜": 1.5, "利多": 1.5,
+    "看好": 1.0, "成長": 1.0, "增長": 1.0, "獲利": 1.0, "買超": 1.0, "擴產": 1.0,
+    "加碼": 1.0, "調升": 1.0, "樂觀": 1.0, "強勁": 1.0, "回溫": 1.0, "突破": 1.0,
+    "上漲": 1.0, "營收增": 1.0, "受惠": 1.0, "接單": 0.5, "布局": 0.5, "漲": 0.5,
+}
+NEGATIVE_TERMS = {
+    "虧損": 2.0, "下修": 2.0, "大跌": 2.0, "跌停": 2.0, "砍單": 2.0, "利空": 1.5,
+    "衰退": 1.5, "裁員": 1.5, "看淡": 1.0, "賣超": 1.0, "減產": 1.0, "減碼": 1.0,
+    "調降": 1.0, "悲觀": 1.0, "疲弱": 1.0, "重挫": 1.0, "下跌": 1.0, "營收減": 1.0,
+    "違約": 1.0, "停工": 1.0, "衝擊": 0.5, "跌": 0.5,
+}
+
+
+class LexiconSentimentScorer:
+    """
+    CPU-only lexicon scorer for news headlines.
+    Scores are in [-1, 1]: (positive - negative) / (positive + negative), 0 when no term matches.
+    Terms are matched longest-first in one pass, so a sub-term inside a compound
+    ("漲" in "大漲", "跌" in "跌停") is not counted again.
+    """
+    def __init__(self, positive_terms=None, negative_terms=None):
+        self.positive_terms = positive_terms or POSITIVE_TERMS
+        self.negative_terms = negative_terms or NEGATIVE_TERMS
+        terms = sorted({*self.positive_terms, *self.negative_terms}, key=len, reverse=True)
+        self._pattern = "(" + "|".join(re.escape(term) for term in terms) + ")"
+
+    def _weighted_hits(self, texts, matches, terms):
+        weights = matches.map(terms).fillna(0.0)
+        hits = weights.groupby(level=0).sum()
+        return hits.reindex(range(len(texts)), fill_value=0.0).to_numpy(dtype=float)
+
+    def score_batch(self, texts):
+        """
+        Score a batch of texts; the lexicon is matched across the whole batch at once.
+        """
+        texts = pd.Series(texts, dtype=object).fillna("").astype(str)
+        if texts.empty:
+            return np.array([])
+
+        matches = texts.reset_index(drop=True).str.extractall(self._pattern)[0]
+        positive = self._weighted_hits(texts, matches, self.positive_terms)
+        negative = self._weighted_hits(texts, matches, self.negative_terms)
+        total = positive + negative
+        return np.divide(positive - negative, total, out=np.zeros_like(total), where=total > 0)
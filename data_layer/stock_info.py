@@ -0,0 +1,48 @@
+import os
+import time
+import threading
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+INFO_COLUMNS = ['stock_id', 'stock_name', 'industry_category', 'type']
+
+
+class StockInfoStore:
+    """
+    Locally cached listing table (<root>/stock_info.csv): one row per ticker with
+    its name, industry category and market type. The source is only asked again
+    once the file is older than max_age_days.
+    """
+    def __init__(self, root, max_age_days=7):
+        self.path = os.path.join(root, "stock_info.csv")
+        self.max_age_days = max_age_days
+        self._lock = threading.RLock()
+        self._table = None
+
+    def is_stale(self):
+        if not os.path.exists(self.path):
+            return True
+        return time.time() - os.path.getmtime(self.path) > self.max_age_days * 86400
+
+    def load(self):
+        with self._lock:
+            if self._table is None and os.path.exists(self.path):
+                self._table = pd.read_csv(self.path, dtype={'stock_id': str})
+            return self._table
+
+    def update(self, info):
+        """
+        Replace the cached table. Tickers listed under several industries keep the
+        first category so every ticker maps to exactly one sector.
+        """
+        if info is None or info.empty:
+            return 0
+        table = info[[c for c in INFO_COLUMNS if c in info.columns]].copy()
+        table['stock_id'] = table['stock_id'].astype(str)
+        table = table.drop_duplicates(subset=['stock_id'], keep='first').reset_index(drop=True)
+        with self._lock:
+            table.to_csv(self.path, index=False)
+            self._table = table
+        return len(table)
@@ -0,0 +1,133 @@
+import os
+from datetime import datetime, date, time, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+TAIPEI = ZoneInfo("Asia/Taipei")
+
+# Fixed-date market holidays (MM-DD), including the ones restored by the 2025
+# holiday act (Teachers' Day, Retrocession Day, Constitution Day). Lunar
+# holidays, weekend make-up days, bridge days and typhoon closures move every
+# year and go in the explicit holiday list instead (data_layer/twse_holidays.csv).
+FIXED_HOLIDAYS = ("01-01", "02-28", "04-04", "05-01", "09-28", "10-10", "10-25", "12-25")
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class TradingCalendar:
+    """
+    Taiwan stock exchange trading calendar, built offline.
+
+    Inside the span of stored bars the sessions are exactly the stored bar dates
+    (so past holidays and typhoon closures are learned from the data). Beyond it,
+    a session is any weekday that is neither a fixed-date holiday nor listed in
+    the explicit holiday table. Daily bars for a session are assumed to be
+    published at data_ready (Taipei time).
+    """
+    def __init__(self, known_sessions=None, holidays=None, fixed_holidays=FIXED_HOLIDAYS, data_ready="14:30"):
+        self.known = np.array(sorted({str(d)[:10] for d in (known_sessions if known_sessions is not None else [])}))
+        self.holidays = {str(d)[:10] for d in (holidays or [])}
+        self.fixed_holidays = set(fixed_holidays or ())
+        hour, minute = (int(x) for x in data_ready.split(":"))
+        self.data_ready = time(hour, minute)
+        self._shift_cache = {}
+
+    @classmethod
+    def from_config(cls, calendar_config, known_sessions=None):
+        """
+        calendar_config is the trading_calendar section of config.yaml:
+        holidays (list of dates), holidays_file (CSV with a date column; lines
+        starting with # are comments) and data_ready.
+        """
+        calendar_config = calendar_config or {}
+        holidays = list(calendar_config.get('holidays') or [])
+        holidays_file = calendar_config.get('holidays_file')
+        if holidays_file and os.path.exists(holidays_file):
+            holidays += pd.read_csv(holidays_file, dtype={'date': str}, comment='#')['date'].tolist()
+        return cls(known_sessions, holidays, data_ready=calendar_config.get('data_ready', "14:30"))
+
+    def now(self):
+        return datetime.now(TAIPEI)
+
+    def is_trading_day(self, day):
+        day = _to_date(day)
+        key = day.strftime("%Y-%m-%d")
+        if len(self.known) and self.known[0] <= key <= self.known[-1]:
+            return bool(self.known[np.searchsorted(self.known, key)] == key)
+        if day.weekday() >= 5 or key in self.holidays:
+            return False
+        return day.strftime("%m-%d") not in self.fixed_holidays
+
+    def _session_mask(self, days):
+        """Vectorised is_trading_day over a DatetimeIndex."""
+        keys = days.strftime("%Y-%m-%d").to_numpy()
+        mask = (days.weekday < 5) & ~np.isin(keys, list(self.holidays)) \
+            & ~np.isin(days.strftime("%m-%d").to_numpy(), list(self.fixed_holidays))
+        if len(self.known):
+            inside = (keys >= self.known[0]) & (keys <= self.known[-1])
+            mask = np.where(inside, np.isin(keys, self.known), mask)
+        return mask
+
+    def sessions(self, start, end):
+        """Trading dates (YYYY-MM-DD strings) in [start, end]."""
+        days = pd.date_range(_to_date(start), _to_date(end), freq='D')
+        return days[self._session_mask(days)].strftime("%Y-%m-%d").tolist()
+
+    def previous_session(self, day, inclusive=False):
+        day = _to_date(day)
+        if not inclusive:
+            day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day.strftime("%Y-%m-%d")
+
+    def next_session(self, day):
+        day = _to_date(day) + timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day.strftime("%Y-%m-%d")
+
+    def latest_available_session(self, now=None):
+        """The most recent session whose daily bar should already be published."""
+        now = now or self.now()
+        today = now.date()
+        if self.is_trading_day(today) and now.time() >= self.data_ready:
+            return today.strftime("%Y-%m-%d")
+        return self.previous_session(today)
+
+    def has_new_data(self, last_date, end_date=None, now=None):
+        """True when a session after last_date (and not after end_date) should have published bars."""
+        if not last_date:
+            return True
+        latest = self.latest_available_session(now)
+        if end_date:
+            latest = min(latest, str(end_date)[:10])
+        return self.next_session(last_date) <= latest
+
+    def shift(self, day, n):
+        """The session n trading days before day (day itself counts as the first when it is a session)."""
+        end = _to_date(day)
+        key = (end, n)
+        if key not in self._shift_cache:
+            span = n * 7 // 5 + 30
+            sessions = self.sessions(end - timedelta(days=span), end)
+            while len(sessions) < n:
+                span *= 2
+                sessions = self.sessions(end - timedelta(days=span), end)
+            self._shift_cache[key] = sessions[-max(n, 1)]
+        return self._shift_cache[key]
+
+    def lookback_start(self, bars, end=None):
+        """First date of a window holding `bars` sessions that ends at `end` (default: latest available)."""
+        end = end or self.latest_available_session()
+        return self.shift(end, bars)
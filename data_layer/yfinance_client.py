@@ -1,10 +1,44 @@
 import yfinance as yf
 import pandas as pd
 import logging
+from .base_source import DataSource
 
 logger = logging.getLogger(__name__)
 
-class YFinanceClient:
+# Taiwan listed (TWSE) stocks use .TW, OTC (TPEx) stocks use .TWO
+TW_SUFFIXES = (".TW", ".TWO")
+
+COLUMN_MAPPING = {
+    'Date': 'date',
+    'Datetime': 'date',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'vol'
+}
+
+def normalize_frame(df, stock_id):
+    """
+    Convert a yfinance frame to the FinMind-style schema used by the analysts
+    (date as YYYY-MM-DD string, open/high/low/close/vol, stock_id).
+    """
+    df = df.dropna(how='all').reset_index()
+    df = df.rename(columns=COLUMN_MAPPING)
+    df['date'] = pd.to_datetime(df['date']).dt.strftime("%Y-%m-%d")
+    df['stock_id'] = stock_id
+    columns = ['date', 'stock_id', 'open', 'high', 'low', 'close', 'vol']
+    return df[[c for c in columns if c in df.columns]]
+
+def exclusive_end(end_date):
+    """yfinance treats end= as exclusive; the day after end_date keeps its bar."""
+    if not end_date:
+        return end_date
+    return (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+class YFinanceClient(DataSource):
+    name = "yfinance"
+
     def get_stock_price(self, stock_id, start_date, end_date):
         """
         Fetch historical stock price from yfinance (fallback).
@@ -12,10 +46,64 @@ class YFinanceClient:
         """
         try:
             ticker = yf.Ticker(stock_id)
-            df = ticker.history(start=start_date, end=end_date)
-            # Standardize column names to match FinMind style if needed
-            df.reset_index(inplace=True)
-            return df
+            df = ticker.history(start=start_date, end=exclusive_end(end_date), auto_adjust=False)
+            if df is None or df.empty:
+                return None
+            return normalize_frame(df, stock_id.split('.')[0])
         except Exception as e:
             logger.error(f"Error fetching yfinance stock price: {e}")
             return None
+
+    def _download(self, symbols, start_date, end_date):
+        """
+        One multi-symbol download; returns {symbol: raw frame} for symbols with data.
+        """
+        try:
+            raw = yf.download(symbols, start=start_date, end=exclusive_end(end_date), group_by='ticker',
+                              auto_adjust=False, progress=False, threads=True)
+        except Exception as e:
+            logger.error(f"Error in yfinance batch download: {e}")
+            return {}
+
+        if raw is None or raw.empty:
+            return {}
+
+        frames = {}
+        for symbol in symbols:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if symbol not in raw.columns.get_level_values(0):
+                    continue
+                df = raw[symbol]
+            else:
+                df = raw
+            df = df.dropna(how='all')
+            if not df.empty:
+                frames[symbol] = df
+        return frames
+
+    def get_stock_prices(self, stock_ids, start_date, end_date):
+        """
+        Batch fallback for many tickers: numeric TW tickers are tried with .TW first,
+        and whatever is still missing is retried with .TWO; each pass is a single
+        multi-symbol download. Returns {stock_id: normalized frame}.
+        """
+        results = {}
+        plain = [s for s in stock_ids if not s.isdigit()]
+        if plain:
+            for symbol, df in self._download(plain, start_date, end_date).items():
+                results[symbol] = normalize_frame(df, symbol)
+
+        pending = [s for s in stock_ids if s.isdigit()]
+        for suffix in TW_SUFFIXES:
+            if not pending:
+                break
+            symbols = [f"{s}{suffix}" for s in pending]
+            frames = self._download(symbols, start_date, end_date)
+            for stock_id, symbol in zip(pending, symbols):
+                if symbol in frames:
+                    results[stock_id] = normalize_frame(frames[symbol], stock_id)
+            pending = [s for s in pending if s not in results]
+
+        if pending:
+            logger.warning(f"yfinance has no data for: {', '.join(pending)}")
+        return results
@@ -0,0 +1,133 @@
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MARKET_LABEL = "全市場"
+UNCLASSIFIED = "未分類"
+
+
+def _window_mean(X, window):
+    """最後 window 列的平均 (忽略缺值)；有效資料不足 window 筆者為 NaN"""
+    block = X[-window:]
+    count = np.sum(~np.isnan(block), axis=0)
+    with np.errstate(invalid='ignore'):
+        mean = np.nansum(block, axis=0) / count
+    return np.where(count >= window, mean, np.nan)
+
+
+def _return_over(X, last, bars):
+    if len(X) <= bars:
+        return np.full(X.shape[1], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return last / X[-bars - 1] - 1
+
+
+def ticker_snapshot(close_panel, short_window=5, long_window=20):
+    """
+    由收盤價面板 (日期 × 股票) 一次算出每檔股票最新的漲跌、是否站上 MA20 / MA60
+    與短/長期報酬；停牌造成的缺值以前一筆收盤價補齊。
+    """
+    X = close_panel.sort_index().ffill().to_numpy(dtype=float)
+    last = X[-1]
+    prev = X[-2] if len(X) > 1 else np.full_like(last, np.nan)
+    ma20 = _window_mean(X, 20)
+    ma60 = _window_mean(X, 60)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = last / prev - 1
+    return pd.DataFrame({
+        "close": last,
+        "change": change,
+        "above_ma20": np.where(np.isnan(ma20), np.nan, last > ma20),
+        "above_ma60": np.where(np.isnan(ma60), np.nan, last > ma60),
+        "return_short": _return_over(X, last, short_window),
+        "return_long": _return_over(X, last, long_window),
+    }, index=close_panel.columns)
+
+
+def rotation_signal(relative_short, relative_long):
+    """
+    依類股相對大盤的短/長期超額報酬判斷輪動：
+    短強長強為領先、短強長弱為轉強、短弱長強為轉弱、短弱長弱為落後。
+    """
+    return np.select(
+        [(relative_short > 0) & (relative_long > 0), (relative_short > 0) & (relative_long <= 0),
+         (relative_short <= 0) & (relative_long > 0)],
+        ["領先", "轉強", "轉弱"],
+        default="落後"
+    )
+
+
+def aggregate_sectors(scores, snapshot, stock_info=None, bullish_score=60, bearish_score=40):
+    """
+    將每檔股票的共識評分、價格快照與產業分類合併，一次 groupby 算出各類股與全市場的
+    平均評分、看多/看空比例、漲跌家數、站上均線比例與類股輪動訊號。
+    scores 需包含 stock_id 與 score 欄位。
+    """
+    df = scores[['stock_id', 'score']].copy()
+    df['stock_id'] = df['stock_id'].astype(str)
+    df = df.join(snapshot, on='stock_id')
+    if stock_info is not None and not stock_info.empty:
+        sectors = stock_info.drop_duplicates('stock_id').set_index('stock_id')['industry_category']
+        df['sector'] = df['stock_id'].map(sectors)
+    else:
+        df['sector'] = np.nan
+    df['sector'] = df['sector'].fillna(UNCLASSIFIED)
+
+    score = df['score'].to_numpy(dtype=float)
+    change = df['change'].to_numpy(dtype=float)
+    df['bullish'] = score >= bullish_score
+    df['bearish'] = score <= bearish_score
+    df['advance'] = change > 0
+    df['decline'] = change < 0
+
+    spec = {
+        'stocks': ('stock_id', 'size'),
+        'avg_score': ('score', 'mean'),
+        'bullish_pct': ('bullish', 'mean'),
+        'bearish_pct': ('bearish', 'mean'),
+        'advances': ('advance', 'sum'),
+        'declines': ('decline', 'sum'),
+        'above_ma20_pct': ('above_ma20', 'mean'),
+        'above_ma60_pct': ('above_ma60', 'mean'),
+        'return_short': ('return_short', 'mean'),
+        'return_long': ('return_long', 'mean'),
+    }
+    table = df.groupby('sector').agg(**spec)
+    market = df.assign(sector=MARKET_LABEL).groupby('sector').agg(**spec)
+
+    for column in ['bullish_pct', 'bearish_pct', 'above_ma20_pct', 'above_ma60_pct', 'return_short', 'return_long']:
+        table[column] *= 100
+        market[column] *= 100
+    table['relative_short'] = table['return_short'] - market['return_short'].iloc[0]
+    table['relative_long'] = table['return_long'] - market['return_long'].iloc[0]
+    table['rotation'] = rotation_signal(table['relative_short'].to_numpy(), table['relative_long'].to_numpy())
+    table['ad_ratio'] = table['advances'] / table['declines'].replace(0, np.nan)
+    market['ad_ratio'] = market['advances'] / market['declines'].replace(0, np.nan)
+
+    table = table.sort_values('avg_score', ascending=False)
+    return pd.concat([market, table]).round(2)
+
+
+class MarketBreadth:
+    """
+    每日收盤後的跨股票彙總：以價格面板 (可使用記憶體映射的 panel 快照) 與本地快取的
+    產業分類表，將當日所有股票的分析結果彙總為類股共識、市場寬度與輪動訊號。
+    """
+    # MA60 需要 60 根 K 線，多取幾根以涵蓋停牌
+    LOOKBACK_BARS = 65
+
+    def __init__(self, data_manager, short_window=5, long_window=20):
+        self.data_manager = data_manager
+        self.short_window = short_window
+        self.long_window = long_window
+
+    def run(self, scores):
+        stock_ids = scores['stock_id'].astype(str).tolist()
+        start_date = self.data_manager.calendar.lookback_start(self.LOOKBACK_BARS)
+        panel = self.data_manager.get_price_panel(stock_ids, 'close', start_date)
+        if panel.empty:
+            return pd.DataFrame()
+        snapshot = ticker_snapshot(panel, self.short_window, self.long_window)
+        return aggregate_sectors(scores, snapshot, self.data_manager.get_stock_info())
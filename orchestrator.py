@@ -1,60 +1,71 @@
 import logging
 import yaml
 from data_layer.data_manager import DataManager
-from analysts.buffett import BuffettAnalyst
-from analysts.zhang_tianhao import ZhangTianhaoAnalyst
-from analysts.lin_chi import LinChiAnalyst
-from analysts.institutional import InstitutionalAnalyst
+from analysts.registry import AnalystRegistry
+from analysts.consensus import weighted_consensus
+from analysts.runner import AnalystRunner, STATUS_OK
 from prediction.prediction_engine import PredictionEngine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StockAnalysisOrchestrator:
-    def __init__(self, config_path="config.yaml"):
+    def __init__(self, config_path="config.yaml", include_analysts=None, exclude_analysts=None):
         self.data_manager = DataManager(config_path)
-        self.prediction_engine = PredictionEngine()
-        self.analysts = [
-            BuffettAnalyst(),
-            ZhangTianhaoAnalyst(),
-            LinChiAnalyst(),
-            InstitutionalAnalyst()
-        ]
+        self.prediction_engine = PredictionEngine.from_config(self.data_manager.config)
+        self.registry = AnalystRegistry(self.data_manager.config.get('analysts'))
+        self.analysts = self.registry.build(include=include_analysts, exclude=exclude_analysts)
+
+        self.runner = AnalystRunner.from_config(self.data_manager.config)
+        # 只有啟用的分析師宣告需要三大法人資料時才抓取，停用後不再產生任何查詢成本
+        self.needs_institutional = any(a.requires_institutional for a in self.analysts)
+        # 向資料層請求的 K 線數為所有分析師與預測模型所需歷史長度的聯集
+        self.lookback_bars = max([a.required_bars for a in self.analysts] + [self.prediction_engine.lookback_bars])
+        logger.info(f"分析所需歷史長度: {self.lookback_bars} 個交易日")
 
     def run_full_analysis(self, stock_id):
         logger.info(f"開始分析股票: {stock_id}")
         
         # 1. 獲取數據
-        price_data = self.data_manager.get_stock_data(stock_id)
+        price_data = self.data_manager.get_stock_data(stock_id, bars=self.lookback_bars)
         if price_data is None:
             return {"error": "無法獲取股價數據"}
             
-        inst_data = self.data_manager.get_institutional_data(stock_id)
-        news_data = self.data_manager.get_news_data(stock_id)
+        inst_data = self.data_manager.get_institutional_data(stock_id) if self.needs_institutional else None
+        new_articles = self.data_manager.update_news(stock_id)
+        news_sentiment = self.data_manager.get_news_sentiment(stock_id)
+        
+        # 2. 並行執行分析師分析 (逾時或出錯者以 status 標示，不納入共識)
+        analysis_results = self.runner.run(self.analysts, price_data, inst_data)
+        completed = [r for r in analysis_results if r['status'] == STATUS_OK]
+        weights = [self.registry.weight(r['key']) for r in completed]
         
-        # 2. 執行分析師分析
-        analysis_results = []
-        for analyst in self.analysts:
-            try:
-                if isinstance(analyst, InstitutionalAnalyst):
-                    result = analyst.analyze(price_data, institutional_data=inst_data)
-                else:
-                    result = analyst.analyze(price_data)
-                analysis_results.append(result)
-            except Exception as e:
-                logger.error(f"分析師 {analyst.name} 執行出錯: {e}")
-                
         # 3. 執行預測
-        prediction = self.prediction_engine.get_ensemble_prediction(price_data)
+        # 特徵庫只增量物化剛同步的 K 線與法人資料，不另外抓取
+        features = self.data_manager.get_features(stock_id, end_date=price_data['date'].iloc[-1],
+                                                  bars=self.prediction_engine.lookback_bars, sync=False)
+        prediction = self.prediction_engine.get_ensemble_prediction(price_data, features)
         
         # 4. 整合報告
         summary = {
             "stock_id": stock_id,
+            "as_of": price_data['date'].iloc[-1],
             "current_price": price_data['close'].iloc[-1],
             "analysis": analysis_results,
+            "consensus": weighted_consensus(completed, weights),
             "prediction": prediction,
             "institutional": inst_data.to_dict(orient='records') if inst_data is not None else [],
-            "news_summary": f"共獲取 {len(news_data)} 則相關新聞" if news_data is not None else "無新聞數據"
+            "news_summary": self._news_summary(news_sentiment, new_articles),
+            "news_sentiment": news_sentiment.reset_index().to_dict(orient='records')
         }
         
         return summary
+
+    def _news_summary(self, news_sentiment, new_articles):
+        if news_sentiment is None or news_sentiment.empty:
+            return "無新聞數據"
+        recent = news_sentiment.tail(7)
+        total = int(recent['article_count'].sum())
+        avg = (recent['sentiment'] * recent['article_count']).sum() / total
+        tone = "偏多" if avg > 0.1 else ("偏空" if avg < -0.1 else "中性")
+        return f"近 7 個新聞日共 {total} 則相關新聞 (本次新增 {new_articles} 則)，平均情緒 {avg:+.2f} ({tone})"
@@ -0,0 +1,192 @@
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+
+
+def to_returns(price_panel):
+    """
+    由收盤價面板 (日期 × 股票) 計算日報酬；停牌或尚未上市造成的缺值保留為 NaN，
+    不以 0 報酬填補 (否則會低估該股的波動)，由使用端決定如何排除。
+    """
+    return price_panel.sort_index().pct_change(fill_method=None).iloc[1:]
+
+
+def sharpe_ratio(returns, periods=TRADING_DAYS):
+    """
+    年化夏普比率 (無風險利率 0)；returns 可為 1-D 或 2-D (逐欄計算)。
+    """
+    r = np.asarray(returns, dtype=float)
+    std = r.std(axis=0, ddof=1)
+    mean = r.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods), 0.0)
+    return sharpe if sharpe.ndim else float(sharpe)
+
+
+def max_drawdown(returns):
+    """
+    最大回撤 (負值)；returns 可為 1-D 或 2-D (逐欄計算)。
+    """
+    r = np.asarray(returns, dtype=float)
+    cumulative = np.cumprod(1 + r, axis=0)
+    running_max = np.maximum.accumulate(cumulative, axis=0)
+    drawdown = (cumulative - running_max) / running_max
+    mdd = drawdown.min(axis=0)
+    return mdd if np.ndim(mdd) else float(mdd)
+
+
+def var_cvar(returns, confidence=0.95):
+    """
+    歷史模擬法的單日 VaR 與 CVaR (以損失的正值表示)。
+    """
+    r = np.sort(np.asarray(returns, dtype=float))
+    cutoff = max(int(np.floor((1 - confidence) * len(r))), 1)
+    var = -r[cutoff - 1]
+    cvar = -r[:cutoff].mean()
+    return float(var), float(cvar)
+
+
+def rolling_correlation(returns, target, window=60):
+    """
+    各股票與目標序列 (通常為投資組合報酬) 的滾動相關係數，
+    以累積和一次計算所有欄位，回傳與 returns 相同形狀的面板。
+    視窗內有缺值 (或歷史短於 window) 的位置為 NaN。
+    """
+    X = returns.to_numpy(dtype=float)
+    y = np.asarray(target, dtype=float)[:, None]
+    n = window
+    if len(X) < n:
+        return pd.DataFrame(np.nan, index=returns.index, columns=returns.columns)
+
+    def rolling_sum(a):
+        c = np.cumsum(a, axis=0)
+        out = np.full(a.shape, np.nan)
+        out[n - 1] = c[n - 1]
+        out[n:] = c[n:] - c[:-n]
+        return out
+
+    valid = np.isfinite(X) & np.isfinite(y)
+    X, y = np.where(valid, X, 0.0), np.where(valid, y, 0.0)
+    sx, sy = rolling_sum(X), rolling_sum(y)
+    sxx, syy, sxy = rolling_sum(X * X), rolling_sum(y * y), rolling_sum(X * y)
+    cov = sxy - sx * sy / n
+    var_x = sxx - sx * sx / n
+    var_y = syy - sy * sy / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[rolling_sum(valid.astype(float)) < n] = np.nan
+    return pd.DataFrame(corr, index=returns.index, columns=returns.columns)
+
+
+class PortfolioRiskEngine:
+    """
+    投資組合風險引擎：以報酬面板的矩陣運算計算共變異數、夏普比率、回撤、VaR/CVaR
+    與滾動相關係數。股價取自 DataManager 的本地價格資料 (還原股價)。
+    """
+    def __init__(self, data_manager=None, periods=TRADING_DAYS):
+        self.data_manager = data_manager
+        self.periods = periods
+
+    def load_returns(self, stock_ids, start_date=None, end_date=None):
+        panel = self.data_manager.get_price_panel(stock_ids, 'close', start_date, end_date)
+        return to_returns(panel)
+
+    def analyze(self, weights, start_date=None, end_date=None, returns=None, confidence=0.95, window=60):
+        """
+        weights 為 {股票代號: 權重}，會自動正規化；可直接傳入 returns 面板略過資料載入。
+        投資組合報酬需要每檔股票同一天的報酬，因此只使用所有持股都有報酬的交易日
+        (停牌、尚未上市的日期整列排除)；rolling_correlation 的視窗長於可用歷史時為全 NaN。
+        """
+        if returns is None:
+            returns = self.load_returns(list(weights), start_date, end_date)
+
+        tickers = [t for t in weights if t in returns.columns]
+        missing = [t for t in weights if t not in returns.columns]
+        if missing:
+            logger.warning(f"以下股票缺少價格資料，不納入投資組合: {', '.join(missing)}")
+        returns = returns[tickers].dropna(how='any')
+        if not tickers or len(returns) < 2:
+            return {"error": "價格資料不足，無法計算投資組合風險"}
+
+        R = returns.to_numpy(dtype=float)
+        w = np.array([weights[t] for t in tickers], dtype=float)
+        w = w / w.sum()
+
+        cov = np.cov(R, rowvar=False, ddof=1).reshape(len(tickers), len(tickers))
+        port_returns = R @ w
+        port_vol = float(np.sqrt(w @ cov @ w))
+        # 各股票對投資組合變異數的貢獻比例 (總和為 1)
+        marginal = cov @ w
+        total_variance = w @ marginal
+        risk_contribution = w * marginal / total_variance if total_variance > 0 else np.zeros_like(w)
+
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+
+        var, cvar = var_cvar(port_returns, confidence)
+
+        return {
+            "tickers": tickers,
+            "weights": dict(zip(tickers, w.round(6).tolist())),
+            "annual_return": float(port_returns.mean() * self.periods),
+            "annual_volatility": port_vol * np.sqrt(self.periods),
+            "sharpe": sharpe_ratio(port_returns, self.periods),
+            "max_drawdown": max_drawdown(port_returns),
+            "var": var,
+            "cvar": cvar,
+            "confidence": confidence,
+            "asset_sharpe": dict(zip(tickers, sharpe_ratio(R, self.periods).tolist())),
+            "asset_max_drawdown": dict(zip(tickers, max_drawdown(R).tolist())),
+            "risk_contribution": dict(zip(tickers, risk_contribution.tolist())),
+            "covariance": pd.DataFrame(cov * self.periods, index=tickers, columns=tickers),
+            "correlation": pd.DataFrame(corr, index=tickers, columns=tickers),
+            "rolling_correlation": rolling_correlation(returns, port_returns, window)
+        }
+
+
+def parse_watchlist(text):
+    """解析 "2330:0.5,2317:0.3,2454" 格式的觀察清單；未指定權重者為 1"""
+    weights = {}
+    for item in text.split(','):
+        stock_id, _, weight = item.strip().partition(':')
+        if stock_id:
+            weights[stock_id] = float(weight) if weight else 1.0
+    return weights
+
+
+def main():
+    from data_layer.data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="投資組合風險分析")
+    parser.add_argument("--watchlist", type=str, required=True,
+                        help="股票與權重，例如: 2330:0.5,2317:0.3,2454:0.2")
+    parser.add_argument("--start_date", type=str, default=None)
+    parser.add_argument("--end_date", type=str, default=None)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    args = parser.parse_args()
+
+    engine = PortfolioRiskEngine(DataManager())
+    report = engine.analyze(parse_watchlist(args.watchlist), args.start_date, args.end_date,
+                            confidence=args.confidence)
+    if "error" in report:
+        print(f"❌ 錯誤: {report['error']}")
+        return
+
+    print(f"年化報酬: {report['annual_return']*100:.2f}%")
+    print(f"年化波動: {report['annual_volatility']*100:.2f}%")
+    print(f"夏普比率: {report['sharpe']:.2f}")
+    print(f"最大回撤: {report['max_drawdown']*100:.2f}%")
+    print(f"單日 VaR({report['confidence']:.0%}): {report['var']*100:.2f}%  CVaR: {report['cvar']*100:.2f}%")
+    print("風險貢獻:")
+    for ticker, share in report['risk_contribution'].items():
+        print(f"  {ticker}: {share*100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import numpy as np
+
+from analysts import kernels
+from data_layer.feature_store import FEATURE_VERSION
+
+# 預測模型的輸入欄位，取自特徵庫 (data_layer.feature_store) 已物化的欄位；訓練與推論讀取同一份數值。
+# 欄位增減或特徵庫版本 (FEATURE_VERSION) 改變後，既有模型會被視為不相容而完整重訓
+FEATURE_COLUMNS = [
+    "ret_1", "ret_5", "ret_20",
+    "volatility_20",
+    "ma5_ratio", "ma20_ratio", "ma60_ratio",
+    "rsi_14", "macd_hist",
+    "vol_ratio",
+    "channel_position",
+]
+
+
+def compatible(meta):
+    """模型版本的 meta 是否與目前的特徵定義相符"""
+    return meta.get('features') == FEATURE_COLUMNS and meta.get('feature_version') == FEATURE_VERSION
+
+
+def forward_returns(close, horizon):
+    """horizon 個交易日後的報酬率 (訓練標籤)；最後 horizon 列尚無答案，為 NaN"""
+    close = np.asarray(close, dtype=float)
+    return kernels.shift(close, -horizon) / close - 1
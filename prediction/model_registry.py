@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+import shutil
+import time
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+CURRENT_FILE = "current.json"
+
+
+class ModelRegistry:
+    """
+    預測模型的版本庫：<root>/<模型名稱>/<版本>/ 存放模型檔與 meta.json，
+    <root>/<模型名稱>/current.json 指向目前使用的版本。
+
+    新版本先寫入暫存目錄，完成後才改名為正式版本目錄，再以 os.replace 改寫 current.json；
+    讀取端看到的永遠是完整的舊版本或完整的新版本，不會讀到寫到一半的模型。
+    """
+    def __init__(self, root="models", keep=5):
+        self.root = root
+        self.keep = keep
+
+    def _model_dir(self, name):
+        return os.path.join(self.root, name)
+
+    def _pointer_path(self, name):
+        return os.path.join(self._model_dir(name), CURRENT_FILE)
+
+    def versions(self, name):
+        """已發布的版本 (由舊到新)"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        return sorted(v for v in os.listdir(model_dir)
+                      if not v.startswith(".") and os.path.exists(os.path.join(model_dir, v, META_FILE)))
+
+    def meta(self, name, version):
+        path = os.path.join(self._model_dir(name), version, META_FILE)
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        meta['path'] = os.path.dirname(path)
+        return meta
+
+    def current_version(self, name):
+        try:
+            with open(self._pointer_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)['version']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def current(self, name):
+        """目前使用中版本的 meta (含 path)，尚未發布任何版本時為 None"""
+        version = self.current_version(name)
+        return self.meta(name, version) if version else None
+
+    def stamp(self, name):
+        """current.json 的修改時間，推論端據此判斷是否需要重新載入"""
+        try:
+            return os.path.getmtime(self._pointer_path(name))
+        except OSError:
+            return None
+
+    def publish(self, name, write_artifacts, meta):
+        """
+        發布新版本：write_artifacts(目錄) 負責寫入模型檔，meta 為可 JSON 序列化的說明。
+        回傳新版本的 meta (含 version 與 path)。
+        """
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        existing = self.versions(name)
+        number = int(existing[-1].lstrip("v")) + 1 if existing else 1
+        version = f"v{number:04d}"
+
+        staging = os.path.join(model_dir, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            write_artifacts(staging)
+            meta = {**meta, "version": version, "published_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.rename(staging, os.path.join(model_dir, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self.activate(name, version)
+        self.prune(name)
+        logger.info(f"模型 {name} 已發布版本 {version}")
+        return self.meta(name, version)
+
+    def activate(self, name, version):
+        """將 current.json 指向指定版本 (亦用於回滾)"""
+        if version not in self.versions(name):
+            raise ValueError(f"模型 {name} 沒有版本 {version}")
+        pointer = self._pointer_path(name)
+        tmp_path = pointer + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": version}, f)
+        os.replace(tmp_path, pointer)
+
+    def prune(self, name, keep=None):
+        """只保留最近 keep 個版本；使用中的版本一定保留"""
+        keep = self.keep if keep is None else keep
+        current = self.current_version(name)
+        for version in self.versions(name)[:-keep or None]:
+            if version != current:
+                shutil.rmtree(os.path.join(self._model_dir(name), version), ignore_errors=True)
@@ -0,0 +1,180 @@
+"""
+可增量更新的預測模型。
+
+TreeModel (XGBoost) 預測 horizon 日後上漲的機率，增量更新時以既有的樹為起點再加 update_rounds 棵 (warm start)；
+SequenceModel (Keras LSTM) 以最近 window 個交易日的特徵預測 horizon 日報酬，增量更新時載入既有權重
+以較小的學習率再訓練幾個 epoch (fine-tune)，特徵標準化參數沿用完整訓練時的數值，新舊資料的輸入尺度一致。
+
+xgboost 與 tensorflow 只在訓練或載入時才匯入；未安裝時 PredictionEngine 會改用原本的規則式預測。
+"""
+
+import json
+import os
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def make_windows(F, window):
+    """(列, 特徵) -> (列 - window + 1, window, 特徵)，第 k 個視窗結束於第 k + window - 1 列"""
+    if len(F) < window:
+        return np.empty((0, window, F.shape[1]), dtype=F.dtype)
+    return sliding_window_view(F, window, axis=0).transpose(0, 2, 1)
+
+
+class TreeModel:
+    name = "xgboost"
+    inputs = "rows"        # 單列特徵
+    DEFAULT_PARAMS = {
+        "max_depth": 4,
+        "eta": 0.05,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "min_child_weight": 20,
+        "rounds": 300,         # 完整訓練的樹數
+        "update_rounds": 10,   # 每次增量更新追加的樹數
+        "nthread": 0,          # 0 = 使用全部 CPU
+    }
+    ARTIFACT = "model.json"
+
+    def __init__(self, params=None, booster=None, meta=None):
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
+        self.booster = booster
+        self.meta = meta or {}
+
+    @property
+    def version(self):
+        return self.meta.get('version')
+
+    def _train_params(self):
+        p = self.params
+        return {
+            "objective": "binary:logistic",
+            "eval_metric": "logloss",
+            "tree_method": "hist",
+            "max_depth": p['max_depth'],
+            "eta": p['eta'],
+            "subsample": p['subsample'],
+            "colsample_bytree": p['colsample_bytree'],
+            "min_child_weight": p['min_child_weight'],
+            "nthread": p['nthread'],
+        }
+
+    def fit(self, X, y, warm_start=False):
+        """y 為 horizon 日報酬；warm_start=True 時在既有的樹之後追加 update_rounds 棵"""
+        import xgboost as xgb
+        dtrain = xgb.DMatrix(X, label=(y > 0).astype(np.float32))
+        rounds = self.params['update_rounds'] if warm_start else self.params['rounds']
+        previous = self.booster if warm_start else None
+        self.booster = xgb.train(self._train_params(), dtrain, num_boost_round=rounds, xgb_model=previous)
+        return self
+
+    def predict(self, X):
+        """上漲機率"""
+        import xgboost as xgb
+        return self.booster.predict(xgb.DMatrix(np.atleast_2d(X)))
+
+    def direction(self, X):
+        return np.sign(self.predict(X) - 0.5)
+
+    def state(self):
+        return {"trees": int(self.booster.num_boosted_rounds())}
+
+    def save(self, directory):
+        self.booster.save_model(os.path.join(directory, self.ARTIFACT))
+
+    @classmethod
+    def load(cls, meta):
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(meta['path'], cls.ARTIFACT))
+        return cls(meta.get('params'), booster=booster, meta=meta)
+
+
+class SequenceModel:
+    name = "lstm"
+    inputs = "windows"     # 最近 window 列特徵
+    DEFAULT_PARAMS = {
+        "window": 20,                    # 輸入的交易日數
+        "units": 32,
+        "epochs": 8,                     # 完整訓練
+        "fine_tune_epochs": 2,           # 增量更新
+        "batch_size": 256,
+        "learning_rate": 0.001,
+        "fine_tune_learning_rate": 0.0002,
+    }
+    ARTIFACT = "model.keras"
+    SCALER = "scaler.json"
+
+    def __init__(self, params=None, model=None, scaler=None, meta=None):
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
+        self.model = model
+        self.scaler = scaler
+        self.meta = meta or {}
+
+    @property
+    def version(self):
+        return self.meta.get('version')
+
+    @property
+    def window(self):
+        return self.params['window']
+
+    def _build(self, n_features):
+        from tensorflow import keras
+        return keras.Sequential([
+            keras.Input(shape=(self.window, n_features)),
+            keras.layers.LSTM(self.params['units']),
+            keras.layers.Dense(1),
+        ])
+
+    def _scale(self, W):
+        return ((W - self.scaler['mean']) / self.scaler['std']).astype(np.float32)
+
+    def fit(self, W, y, warm_start=False):
+        """W 為 (樣本, window, 特徵) 的視窗，y 為 horizon 日報酬"""
+        from tensorflow import keras
+        if not warm_start or self.model is None:
+            flat = W.reshape(-1, W.shape[-1])
+            self.scaler = {
+                "mean": flat.mean(axis=0),
+                "std": np.where(flat.std(axis=0) > 0, flat.std(axis=0), 1.0),
+                "target_std": float(np.std(y)) or 1.0,
+            }
+            self.model = self._build(W.shape[-1])
+            learning_rate, epochs = self.params['learning_rate'], self.params['epochs']
+        else:
+            learning_rate, epochs = self.params['fine_tune_learning_rate'], self.params['fine_tune_epochs']
+        self.model.compile(optimizer=keras.optimizers.Adam(learning_rate), loss="mse")
+        self.model.fit(self._scale(W), (y / self.scaler['target_std']).astype(np.float32),
+                       epochs=epochs, batch_size=self.params['batch_size'], shuffle=True, verbose=0)
+        return self
+
+    def predict(self, W):
+        """horizon 日報酬"""
+        W = W if W.ndim == 3 else W[None]
+        return self.model.predict(self._scale(W), verbose=0)[:, 0] * self.scaler['target_std']
+
+    def direction(self, W):
+        return np.sign(self.predict(W))
+
+    def state(self):
+        return {}
+
+    def save(self, directory):
+        self.model.save(os.path.join(directory, self.ARTIFACT))
+        scaler = {k: np.asarray(v).tolist() for k, v in self.scaler.items()}
+        with open(os.path.join(directory, self.SCALER), 'w', encoding='utf-8') as f:
+            json.dump(scaler, f)
+
+    @classmethod
+    def load(cls, meta):
+        from tensorflow import keras
+        model = keras.models.load_model(os.path.join(meta['path'], cls.ARTIFACT))
+        with open(os.path.join(meta['path'], cls.SCALER), 'r', encoding='utf-8') as f:
+            scaler = json.load(f)
+        scaler = {k: np.asarray(v, dtype=np.float32) if isinstance(v, list) else v for k, v in scaler.items()}
+        return cls(meta.get('params'), model=model, scaler=scaler, meta=meta)
+
+
+MODEL_TYPES = {model.name: model for model in (TreeModel, SequenceModel)}
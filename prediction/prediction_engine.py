@@ -1,18 +1,100 @@
 import numpy as np
 import pandas as pd
 import logging
+import threading
+import time
+
+from data_layer.feature_store import compute_features
+from .features import FEATURE_COLUMNS, compatible
+from .model_registry import ModelRegistry
+from .models import MODEL_TYPES, SequenceModel, TreeModel
 
 logger = logging.getLogger(__name__)
 
 class PredictionEngine:
-    def __init__(self):
-        # 這裡未來可以載入訓練好的權重，目前先以邏輯演算法示範集成效果
-        pass
+    # 趨勢回歸與平均量以近一年的 K 線計算 (交易日)
+    lookback_bars = 245
+
+    def __init__(self, registry=None, reload_seconds=60):
+        # 由 prediction.retrain 訓練並發布到版本庫的模型；沒有可用版本 (或未安裝對應套件) 的模型
+        # 改用下方的規則式預測示範集成效果
+        self.registry = registry
+        self.reload_seconds = reload_seconds
+        self._models = {}
+        self._stamps = {}
+        self._checked_at = 0.0
+        self._reload_lock = threading.Lock()
+        self.refresh(force=True)
+
+    @classmethod
+    def from_config(cls, config):
+        """由 config.yaml 的 prediction.models 區段建立"""
+        model_config = (config.get('prediction') or {}).get('models') or {}
+        registry = ModelRegistry(model_config.get('dir', "models"), keep=int(model_config.get('keep_versions', 5)))
+        return cls(registry, reload_seconds=float(model_config.get('reload_seconds', 60)))
+
+    @property
+    def versions(self):
+        return {name: model.version for name, model in self._models.items()}
 
-    def predict_lstm(self, data):
+    def refresh(self, force=False):
         """
-        模擬 LSTM 預測（時間序列趨勢）
+        每 reload_seconds 檢查一次版本庫，有新發布的版本時載入並整組替換。
+        載入期間其他請求照常使用舊模型；替換只是一個參照的指派，
+        進行中的預測拿到的是替換前的整組模型，不會混用新舊版本。
         """
+        if self.registry is None:
+            return
+        now = time.time()
+        if not force and now - self._checked_at < self.reload_seconds:
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = now
+            stamps = {name: self.registry.stamp(name) for name in MODEL_TYPES}
+            if stamps == self._stamps:
+                return
+            models = dict(self._models)
+            for name, model_cls in MODEL_TYPES.items():
+                if stamps[name] == self._stamps.get(name):
+                    continue
+                models.pop(name, None)
+                meta = self.registry.current(name)
+                if meta is None:
+                    continue
+                if not compatible(meta):
+                    logger.warning(f"模型 {name} {meta['version']} 的特徵與目前版本不符，等待重訓")
+                    continue
+                try:
+                    models[name] = model_cls.load(meta)
+                    logger.info(f"已載入預測模型 {name} {meta['version']} (訓練至 {meta['trained_through']})")
+                except ImportError as e:
+                    logger.warning(f"模型 {name} 缺少套件 ({e})，改用規則式預測")
+                except Exception as e:
+                    logger.warning(f"模型 {name} {meta['version']} 載入失敗 ({e})，改用規則式預測")
+            self._models = models
+            self._stamps = stamps
+        finally:
+            self._reload_lock.release()
+
+    def predict_lstm(self, data, model=None, features=None):
+        """
+        LSTM 預測（時間序列趨勢）；沒有已訓練的模型時以回歸趨勢模擬
+        """
+        if model is not None:
+            window = features[FEATURE_COLUMNS].to_numpy(dtype=np.float32)[-model.window:]
+            if len(window) == model.window and np.isfinite(window).all():
+                expected = float(model.predict(window)[0])
+                scale = model.scaler['target_std']
+                return {
+                    "model": "LSTM",
+                    "predicted_price": data['close'].iloc[-1] * (1 + expected),
+                    "trend": "Up" if expected > 0 else "Down",
+                    "confidence": min(0.5 + abs(expected) / (2 * scale), 0.95),
+                    "version": model.version
+                }
+
         # 簡化邏輯：基於回歸趨勢
         prices = data['close'].values
         x = np.arange(len(prices))
@@ -28,19 +110,33 @@ class PredictionEngine:
             "confidence": 0.85 # 預設高信心
         }
 
-    def predict_xgboost(self, data):
+    def predict_xgboost(self, data, model=None, features=None):
         """
-        模擬 XGBoost 預測（特徵分類）
+        XGBoost 預測（特徵分類）；沒有已訓練的模型時以成交量與價格變動模擬
         """
-        # 簡化邏輯：基於成交量與價格變動
-        last_vol = data['vol'].iloc[-1]
-        avg_vol = data['vol'].mean()
-        last_return = data['close'].pct_change().iloc[-1]
+        if model is not None:
+            row = features[FEATURE_COLUMNS].to_numpy(dtype=np.float32)[-1]
+            if np.isfinite(row).all():
+                p_up = float(model.predict(row)[0])
+                trend = "Bullish" if p_up > 0.55 else ("Bearish" if p_up < 0.45 else "Neutral")
+                return {
+                    "model": "XGBoost",
+                    "trend": trend,
+                    "confidence": max(p_up, 1 - p_up),
+                    "version": model.version
+                }
+
+        # 簡化邏輯：基於成交量 (相對近一年均量) 與價格變動
+        if features is None:
+            features = compute_features(data)
+        last = features.iloc[-1]
+        above_avg_vol = last['vol_rel_245'] > 1
+        last_return = last['ret_1']
         
-        if last_vol > avg_vol and last_return > 0:
+        if above_avg_vol and last_return > 0:
             trend = "Bullish"
             confidence = 0.80
-        elif last_vol > avg_vol and last_return < 0:
+        elif above_avg_vol and last_return < 0:
             trend = "Bearish"
             confidence = 0.75
         else:
@@ -53,13 +149,22 @@ class PredictionEngine:
             "confidence": confidence
         }
 
-    def get_ensemble_prediction(self, data):
-        lstm = self.predict_lstm(data)
-        xgb = self.predict_xgboost(data)
-        
+    def get_ensemble_prediction(self, data, features=None):
+        """
+        features 為特徵庫中對應 data 日期的列 (DataManager.get_features)；
+        未提供時 (例如沒有特徵庫的呼叫端) 由 data 現場計算
+        """
+        data = data.tail(self.lookback_bars)
+        if features is None:
+            features = compute_features(data)
+        self.refresh()
+        models = self._models
+        lstm = self.predict_lstm(data, models.get(SequenceModel.name), features)
+        xgb = self.predict_xgboost(data, models.get(TreeModel.name), features)
+
         # 集成邏輯
         final_trend = lstm['trend'] if lstm['confidence'] > xgb['confidence'] else xgb['trend']
-        
+
         return {
             "final_trend": final_trend,
             "details": [lstm, xgb]
@@ -0,0 +1,256 @@
+"""
+預測模型的 walk-forward 重訓排程 (python -m prediction.retrain)。
+
+每個交易日收盤後執行：自上次訓練以來有新的已知標籤 (horizon 日後的報酬已揭曉) 時，
+先以目前版本對這些新樣本做樣本外評估 (walk-forward 成績)，再用新樣本加上最近 replay_bars 個交易日
+增量更新模型並發布為新版本；增量次數達 full_refit_every、特徵或參數改變時改為以 train_bars 的歷史完整重訓。
+特徵直接讀取特徵庫 (data_layer.feature_store) 已物化的欄位，與推論端使用同一份數值；
+增量更新只需讀取最近一段特徵並訓練少量樹或 epoch，CPU 上數分鐘內即可完成。
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import yaml
+
+from data_layer.data_manager import DataManager
+from data_layer.feature_store import FEATURE_VERSION
+from .features import FEATURE_COLUMNS, compatible, forward_returns
+from .model_registry import ModelRegistry
+from .models import MODEL_TYPES, SequenceModel, make_windows
+
+logger = logging.getLogger(__name__)
+
+# 每個版本保留最近幾次的 walk-forward 成績
+WALK_FORWARD_HISTORY = 60
+
+
+class TrainingSet:
+    """
+    已知標籤的訓練樣本：rows (單列特徵，給樹模型) 與 windows (連續 window 列，給序列模型)，
+    各自附上樣本日期，供依日期切出新樣本或 replay 區間。
+    """
+    def __init__(self, window):
+        self.window = window
+        self._rows, self._windows = [], []
+
+    def add(self, features, horizon):
+        F = features[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+        y = forward_returns(features['close'], horizon).astype(np.float32)
+        dates = features['date'].to_numpy().astype(str)
+
+        labelled = np.isfinite(y)
+        ok = labelled & np.isfinite(F).all(axis=1)
+        self._rows.append((dates[ok], F[ok], y[ok]))
+
+        W = make_windows(F, self.window)
+        end = slice(self.window - 1, None)
+        ok_seq = labelled[end] & np.isfinite(W).all(axis=(1, 2))
+        self._windows.append((dates[end][ok_seq], W[ok_seq], y[end][ok_seq]))
+
+    @staticmethod
+    def _concat(parts, n_features, window=None):
+        if not parts:
+            shape = (0, n_features) if window is None else (0, window, n_features)
+            return np.array([], dtype=str), np.empty(shape, dtype=np.float32), np.empty(0, dtype=np.float32)
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def finalize(self):
+        n_features = len(FEATURE_COLUMNS)
+        self.rows = self._concat(self._rows, n_features)
+        self.windows = self._concat(self._windows, n_features, self.window)
+        self._rows, self._windows = [], []
+        return self
+
+    @property
+    def labelled_through(self):
+        dates = self.rows[0]
+        return str(np.sort(dates)[-1]) if len(dates) else None
+
+    def select(self, kind, start=None, end=None):
+        """kind 為 rows 或 windows；回傳日期介於 (start, end] 的 (X, y)"""
+        dates, X, y = getattr(self, kind)
+        mask = np.ones(len(dates), dtype=bool)
+        if start:
+            mask &= dates > start
+        if end:
+            mask &= dates <= end
+        return X[mask], y[mask]
+
+
+class WalkForwardTrainer:
+    """
+    依 config.yaml 的 prediction 區段訓練並發布模型：
+    prediction.models 為版本庫設定，prediction.training 為訓練股票池、歷史長度與各模型參數。
+    """
+    def __init__(self, data_manager, registry, horizon=5, training_config=None):
+        self.data_manager = data_manager
+        self.registry = registry
+        self.horizon = horizon
+        config = training_config or {}
+        self.stock_ids = [str(s) for s in config.get('stock_ids') or ['2330']]
+        self.train_bars = int(config.get('train_bars', 756))
+        self.replay_bars = int(config.get('replay_bars', 60))
+        self.full_refit_every = int(config.get('full_refit_every', 20))
+        self.group_size = int(config.get('group_size', 100))
+        self.model_params = {name: config.get(name) or {} for name in MODEL_TYPES}
+        enabled = config.get('models')
+        self.model_names = [name for name in (enabled or MODEL_TYPES) if name in MODEL_TYPES]
+
+    @classmethod
+    def from_config(cls, config_path="config.yaml", data_manager=None):
+        with open(config_path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+        prediction_config = config.get('prediction') or {}
+        model_config = prediction_config.get('models') or {}
+        registry = ModelRegistry(model_config.get('dir', "models"), keep=int(model_config.get('keep_versions', 5)))
+        return cls(data_manager or DataManager(config_path), registry,
+                   horizon=int(prediction_config.get('short_term', 5)),
+                   training_config=prediction_config.get('training'))
+
+    def _plan(self, name, full):
+        """決定模型本次為完整重訓 (full) 或增量更新 (update)，回傳 (模式, 目前版本 meta)"""
+        model = MODEL_TYPES[name](self.model_params[name])
+        previous = self.registry.current(name)
+        if previous is None or full:
+            return "full", previous
+        if not (compatible(previous) and previous.get('horizon') == self.horizon
+                and previous.get('params') == model.params):
+            logger.info(f"模型 {name} 的特徵或參數已變更，完整重訓")
+            return "full", previous
+        if previous.get('updates_since_refit', 0) >= self.full_refit_every:
+            return "full", previous
+        return "update", previous
+
+    def _load(self, start_date):
+        """
+        由特徵庫讀取 start_date 起的特徵 (序列模型多讀 window 列) 並組成訓練樣本；
+        特徵庫先增量物化新的交易日，一次只保留一組股票的特徵
+        """
+        window = SequenceModel(self.model_params[SequenceModel.name]).window
+        calendar = self.data_manager.calendar
+        end_date = calendar.latest_available_session()
+        history_start = calendar.shift(start_date, window)
+        dataset = TrainingSet(window)
+        for i in range(0, len(self.stock_ids), self.group_size):
+            group = self.stock_ids[i:i + self.group_size]
+            frames = self.data_manager.get_features_batch(group, history_start, end_date,
+                                                          columns=['close', *FEATURE_COLUMNS])
+            for features in frames.values():
+                dataset.add(features, self.horizon)
+        return dataset.finalize()
+
+    def run(self, full=False):
+        """執行一次排程，回傳本次發布的版本 meta list"""
+        calendar = self.data_manager.calendar
+        latest = calendar.latest_available_session()
+        plans = {name: self._plan(name, full) for name in self.model_names}
+
+        # 所有模型共用一次讀取：完整重訓需要 train_bars，增量更新只需 replay 區間
+        starts = []
+        for mode, previous in plans.values():
+            if mode == "full":
+                starts.append(calendar.lookback_start(self.train_bars, latest))
+            else:
+                starts.append(calendar.shift(previous['trained_through'], self.replay_bars))
+        if not starts:
+            return []
+        dataset = self._load(min(starts))
+        labelled_through = dataset.labelled_through
+        if labelled_through is None:
+            logger.warning("沒有可用的訓練樣本")
+            return []
+
+        published = []
+        for name, (mode, previous) in plans.items():
+            if mode == "update" and previous['trained_through'] >= labelled_through:
+                logger.info(f"模型 {name} 已訓練至 {previous['trained_through']}，沒有新的已知標籤")
+                continue
+            try:
+                published.append(self._train(name, mode, previous, dataset, labelled_through))
+            except ImportError as e:
+                logger.warning(f"模型 {name} 缺少套件 ({e})，略過")
+        return published
+
+    def _train(self, name, mode, previous, dataset, labelled_through):
+        model_cls = MODEL_TYPES[name]
+        kind = model_cls.inputs
+        started = time.time()
+
+        walk_forward = list((previous or {}).get('walk_forward', []))
+        if mode == "update":
+            model = model_cls.load(previous)
+            # 目前版本從未見過的新樣本：先做樣本外評估再拿來訓練
+            X_new, y_new = dataset.select(kind, start=previous['trained_through'])
+            if len(y_new):
+                hit = model.direction(X_new) == np.sign(y_new)
+                walk_forward.append({"from": previous['trained_through'], "to": labelled_through,
+                                     "samples": int(len(y_new)), "accuracy": round(float(hit.mean()), 4),
+                                     "version": previous['version']})
+            replay_start = self.data_manager.calendar.shift(previous['trained_through'], self.replay_bars)
+            X, y = dataset.select(kind, start=replay_start)
+            model.fit(X, y, warm_start=True)
+            updates = previous.get('updates_since_refit', 0) + 1
+        else:
+            model = model_cls(self.model_params[name])
+            X, y = dataset.select(kind)
+            model.fit(X, y)
+            updates = 0
+
+        meta = {
+            "model": name,
+            "mode": mode,
+            "trained_through": labelled_through,
+            "horizon": self.horizon,
+            "features": FEATURE_COLUMNS,
+            "feature_version": FEATURE_VERSION,
+            "params": model.params,
+            "samples": int(len(y)),
+            "updates_since_refit": updates,
+            "parent": (previous or {}).get('version'),
+            "elapsed": round(time.time() - started, 2),
+            "walk_forward": walk_forward[-WALK_FORWARD_HISTORY:],
+            **model.state(),
+        }
+        meta = self.registry.publish(name, model.save, meta)
+        logger.info(f"模型 {name} {mode} 訓練完成 ({meta['samples']} 筆樣本，{meta['elapsed']} 秒) -> {meta['version']}")
+        return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="預測模型 walk-forward 重訓")
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--stock_id", type=str, default=None,
+                        help="訓練股票池，多個用逗號分隔 (預設為 prediction.training.stock_ids)")
+    parser.add_argument("--full", action="store_true", help="忽略既有版本，完整重訓")
+    parser.add_argument("--skip_non_trading", action="store_true", help="今日非交易日時直接結束")
+    parser.add_argument("--rollback", type=str, default=None, metavar="MODEL:VERSION",
+                        help="將模型切回指定版本，例如 xgboost:v0003")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    trainer = WalkForwardTrainer.from_config(args.config)
+    if args.rollback:
+        name, version = args.rollback.split(":")
+        trainer.registry.activate(name, version)
+        print(f"✅ {name} 已切換至 {version}")
+        return
+
+    calendar = trainer.data_manager.calendar
+    today = calendar.now().strftime("%Y-%m-%d")
+    if args.skip_non_trading and not calendar.is_trading_day(today):
+        print(f"📅 {today} 非交易日，略過重訓")
+        return
+    if args.stock_id:
+        trainer.stock_ids = [s.strip() for s in args.stock_id.split(',')]
+
+    for meta in trainer.run(full=args.full):
+        recent = meta['walk_forward'][-1:] if meta['mode'] == "update" else []
+        score = f"，樣本外方向準確率 {recent[0]['accuracy']:.1%}" if recent else ""
+        print(f"✅ {meta['model']} {meta['version']} ({meta['mode']}，訓練至 {meta['trained_through']}{score})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+import logging
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+import pandas as pd
+
+from utils.serialization import restore_indicators
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisClient:
+    """
+    分析服務的 HTTP/JSON 客戶端 (僅使用標準函式庫)。
+    """
+    def __init__(self, base_url="http://127.0.0.1:8765", timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path, payload=None, query=None):
+        url = f"{self.base_url}{path}"
+        if query:
+            url += "?" + urlencode({k: v for k, v in query.items() if v is not None})
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = Request(url, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except HTTPError as e:
+            # 服務以 JSON 回報錯誤內容 (例如查無股價)，與本地協調器的 {"error": ...} 一致
+            return json.loads(e.read().decode("utf-8") or "{}")
+
+    def health(self):
+        return self._request("/health")
+
+    def stats(self):
+        return self._request("/stats")
+
+    def analyze(self, stock_id):
+        result = self._request(f"/analyze/{stock_id}")
+        return restore_indicators(result) if "error" not in result else result
+
+    def analyze_batch(self, stock_ids, timeout=None):
+        results = self._request("/analyze", {"stock_ids": list(stock_ids), "timeout": timeout})
+        return {k: restore_indicators(v) if "error" not in v else v for k, v in results.items()}
+
+    def history(self, stock_id, bars=None, start_date=None, end_date=None):
+        records = self._request(f"/history/{stock_id}", query={"bars": bars, "start_date": start_date, "end_date": end_date})
+        return pd.DataFrame(records) if isinstance(records, list) else None
+
+    def institutional(self, stock_id):
+        records = self._request(f"/institutional/{stock_id}")
+        return pd.DataFrame(records) if isinstance(records, list) else None
+
+    def breadth(self, scores):
+        records = self._request("/breadth", {"scores": scores.to_dict(orient='records')})
+        return pd.DataFrame(records).set_index('sector') if records else pd.DataFrame()
+
+
+class RemoteDataManager:
+    """
+    以分析服務取代本地 DataManager 的唯讀介面 (儀表板與排程工作使用的部分)，
+    資料快取與資料來源連線都保留在服務端。
+    """
+    def __init__(self, client):
+        self.client = client
+
+    def get_stock_data(self, stock_id, start_date=None, end_date=None, bars=None):
+        return self.client.history(stock_id, bars, start_date, end_date)
+
+    def get_institutional_data(self, stock_id):
+        return self.client.institutional(stock_id)
+
+    def cache_stats(self):
+        return self.client.stats()["cache"]
+
+
+class RemoteOrchestrator:
+    """
+    與 StockAnalysisOrchestrator 相同用法的遠端版本：分析在常駐服務的工作池中執行，
+    呼叫端不必載入分析師、設定檔或登入資料來源。
+    """
+    def __init__(self, base_url, timeout=120):
+        self.client = AnalysisClient(base_url, timeout)
+        self.data_manager = RemoteDataManager(self.client)
+        self.lookback_bars = self.client.health()["lookback_bars"]
+
+    def run_full_analysis(self, stock_id):
+        return self.client.analyze(stock_id)
@@ -0,0 +1,241 @@
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import yaml
+
+from orchestrator import StockAnalysisOrchestrator
+from market.breadth import MarketBreadth
+from utils.serialization import convert_numpy_types, frame_to_records
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisService:
+    """
+    常駐的分析服務核心：程序啟動時建立一次協調器 (設定檔、資料來源登入、分析師與快取皆保持溫熱)，
+    分析工作交給固定大小的工作執行緒池。同一檔股票同時只會分析一次，
+    完成的結果在 result_ttl 秒內直接重用。
+    """
+    def __init__(self, config_path="config.yaml", workers=4, result_ttl=60):
+        self.orchestrator = StockAnalysisOrchestrator(config_path)
+        self.data_manager = self.orchestrator.data_manager
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._results = {}
+        self.counters = {"requests": 0, "analyses": 0, "reused": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _run(self, stock_id):
+        try:
+            result = convert_numpy_types(self.orchestrator.run_full_analysis(stock_id))
+            self._count("analyses")
+            if "error" not in result:
+                with self._lock:
+                    self._results[stock_id] = (time.time(), result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(stock_id, None)
+
+    def submit(self, stock_id):
+        """回傳該股票分析結果的 Future；重複請求共用進行中或尚未過期的結果"""
+        with self._lock:
+            cached = self._results.get(stock_id)
+            if cached is not None and time.time() - cached[0] < self.result_ttl:
+                self.counters["reused"] += 1
+                future = Future()
+                future.set_result(cached[1])
+                return future
+            future = self._inflight.get(stock_id)
+            if future is None:
+                future = self.pool.submit(self._run, stock_id)
+                self._inflight[stock_id] = future
+            else:
+                self.counters["reused"] += 1
+            return future
+
+    def analyze(self, stock_id, timeout=None):
+        return self.submit(stock_id).result(timeout=timeout)
+
+    def analyze_batch(self, stock_ids, timeout=None):
+        futures = {stock_id: self.submit(stock_id) for stock_id in stock_ids}
+        wait(futures.values(), timeout=timeout)
+        results = {}
+        for stock_id, future in futures.items():
+            if not future.done():
+                results[stock_id] = {"error": "分析逾時"}
+            elif future.exception() is not None:
+                self._count("errors")
+                results[stock_id] = {"error": str(future.exception())}
+            else:
+                results[stock_id] = future.result()
+        return results
+
+    def history(self, stock_id, bars=None, start_date=None, end_date=None):
+        return frame_to_records(self.data_manager.get_stock_data(stock_id, start_date, end_date, bars=bars))
+
+    def institutional(self, stock_id):
+        return frame_to_records(self.data_manager.get_institutional_data(stock_id))
+
+    def breadth(self, scores):
+        table = MarketBreadth(self.data_manager).run(pd.DataFrame(scores))
+        return convert_numpy_types(table.reset_index().to_dict(orient='records'))
+
+    def health(self):
+        calendar = self.data_manager.calendar
+        today = calendar.now().strftime("%Y-%m-%d")
+        return {
+            "status": "ok",
+            "uptime": round(time.time() - self.started_at, 1),
+            "today": today,
+            "trading_day": calendar.is_trading_day(today),
+            "latest_session": calendar.latest_available_session(),
+            "lookback_bars": self.orchestrator.lookback_bars
+        }
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            inflight = len(self._inflight)
+            cached = len(self._results)
+        return {
+            **counters,
+            "workers": self.workers,
+            "inflight": inflight,
+            "cached_results": cached,
+            "cache": self.data_manager.cache_stats(),
+            "analysts": [a.key for a in self.orchestrator.analysts]
+        }
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health                     服務狀態與交易日資訊
+    GET  /stats                      請求計數、快取命中率
+    GET  /analyze/<股票代號>          單一股票完整分析
+    POST /analyze                    批次分析，body: {"stock_ids": [...], "timeout": 秒}
+    GET  /history/<股票代號>?bars=N   日 K 資料
+    GET  /institutional/<股票代號>    三大法人資料
+    POST /breadth                    類股與市場寬度，body: {"scores": [{"stock_id":..., "score":...}]}
+    """
+    server_version = "StockAnalysisService/1.0"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s" % (self.address_string(), format % args))
+
+    def _send(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _dispatch(self, routes):
+        self.service._count("requests")
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        handler = routes.get(parts[0] if parts else "")
+        if handler is None:
+            self._send({"error": f"未知的路徑: {url.path}"}, 404)
+            return
+        try:
+            handler(parts[1:], query)
+        except Exception as e:
+            logger.exception(f"處理請求 {self.path} 時發生錯誤")
+            self.service._count("errors")
+            self._send({"error": str(e)}, 500)
+
+    def do_GET(self):
+        self._dispatch({
+            "health": lambda args, q: self._send(self.service.health()),
+            "stats": lambda args, q: self._send(self.service.stats()),
+            "analyze": self._get_analyze,
+            "history": self._get_history,
+            "institutional": lambda args, q: self._send(self.service.institutional(args[0])),
+        })
+
+    def do_POST(self):
+        self._dispatch({
+            "analyze": self._post_analyze,
+            "breadth": lambda args, q: self._send(self.service.breadth(self._read_json().get("scores", []))),
+        })
+
+    def _get_analyze(self, args, query):
+        if not args:
+            self._send({"error": "請指定股票代號"}, 400)
+            return
+        result = self.service.analyze(args[0])
+        self._send(result, 404 if "error" in result else 200)
+
+    def _post_analyze(self, args, query):
+        body = self._read_json()
+        stock_ids = [str(s).strip() for s in body.get("stock_ids", []) if str(s).strip()]
+        if not stock_ids:
+            self._send({"error": "stock_ids 不可為空"}, 400)
+            return
+        self._send(self.service.analyze_batch(stock_ids, timeout=body.get("timeout")))
+
+    def _get_history(self, args, query):
+        bars = int(query["bars"]) if "bars" in query else None
+        records = self.service.history(args[0], bars, query.get("start_date"), query.get("end_date"))
+        if records is None:
+            self._send({"error": "無法獲取股價數據"}, 404)
+            return
+        self._send(records)
+
+
+def serve(config_path="config.yaml", host=None, port=None, workers=None):
+    with open(config_path, 'r') as f:
+        service_config = (yaml.safe_load(f) or {}).get('service') or {}
+
+    host = host or service_config.get('host', '127.0.0.1')
+    port = port or service_config.get('port', 8765)
+    service = AnalysisService(config_path, workers or service_config.get('workers', 4),
+                              service_config.get('result_ttl', 60))
+    server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    logger.info(f"分析服務啟動於 http://{host}:{port} (工作執行緒 {service.workers})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="股票分析 HTTP 服務")
+    parser.add_argument("--config", type=str, default="config.yaml")
+    parser.add_argument("--host", type=str, default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    serve(args.config, args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+// 匯總表格：資料來自 SUMMARY_DATA (columns + rows)，於瀏覽器端搜尋、排序與分頁
+(function () {
+    var data = window.SUMMARY_DATA || { columns: [], rows: [] };
+    var PAGE_SIZE = 50;
+    var TREND_CLASS = { "看多": "bullish", "看空": "bearish" };
+    var state = { column: 3, descending: true, page: 0, filter: "" };
+
+    var tbody = document.getElementById("rows");
+    var headers = document.querySelectorAll("th[data-column]");
+
+    function visibleRows() {
+        var filter = state.filter;
+        var rows = filter ? data.rows.filter(function (r) { return String(r[0]).indexOf(filter) !== -1; }) : data.rows.slice();
+        var c = state.column, sign = state.descending ? -1 : 1;
+        rows.sort(function (a, b) {
+            if (a[c] === b[c]) return 0;
+            if (a[c] === null) return 1;
+            if (b[c] === null) return -1;
+            return (a[c] < b[c] ? -1 : 1) * sign;
+        });
+        return rows;
+    }
+
+    function cell(text, className) {
+        var td = document.createElement("td");
+        td.textContent = text;
+        if (className) td.className = className;
+        return td;
+    }
+
+    function render() {
+        var rows = visibleRows();
+        var pages = Math.max(1, Math.ceil(rows.length / PAGE_SIZE));
+        state.page = Math.min(state.page, pages - 1);
+        var fragment = document.createDocumentFragment();
+        rows.slice(state.page * PAGE_SIZE, (state.page + 1) * PAGE_SIZE).forEach(function (r) {
+            var tr = document.createElement("tr");
+            var id = cell(""); id.innerHTML = "<strong></strong>"; id.firstChild.textContent = r[0];
+            tr.appendChild(id);
+            tr.appendChild(cell("$" + r[1].toFixed(2)));
+            tr.appendChild(cell(r[2], TREND_CLASS[r[2]] || "neutral"));
+            tr.appendChild(cell(r[3] === null ? "N/A" : r[3].toFixed(1)));
+            tr.appendChild(cell(r[4] + " 位"));
+            tr.appendChild(cell(r[5] + " 位"));
+            var link = document.createElement("a");
+            link.href = "report_" + encodeURIComponent(r[0]) + ".html";
+            link.className = "stock-link";
+            link.textContent = "查看詳情 →";
+            var td = cell(""); td.appendChild(link); tr.appendChild(td);
+            fragment.appendChild(tr);
+        });
+        tbody.replaceChildren(fragment);
+
+        headers.forEach(function (th) {
+            var active = Number(th.dataset.column) === state.column;
+            th.classList.toggle("sorted-asc", active && !state.descending);
+            th.classList.toggle("sorted-desc", active && state.descending);
+        });
+        document.getElementById("count").textContent = "共 " + rows.length + " 檔";
+        document.getElementById("page").textContent = (state.page + 1) + " / " + pages;
+        document.getElementById("prev").disabled = state.page === 0;
+        document.getElementById("next").disabled = state.page >= pages - 1;
+    }
+
+    headers.forEach(function (th) {
+        th.addEventListener("click", function () {
+            var column = Number(th.dataset.column);
+            state.descending = state.column === column ? !state.descending : column !== 0;
+            state.column = column;
+            render();
+        });
+    });
+    document.getElementById("prev").addEventListener("click", function () { state.page--; render(); });
+    document.getElementById("next").addEventListener("click", function () { state.page++; render(); });
+    document.getElementById("filter").addEventListener("input", function (e) {
+        state.filter = e.target.value.trim();
+        state.page = 0;
+        render();
+    });
+
+    render();
+})();
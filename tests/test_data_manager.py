@@ -0,0 +1,97 @@
+"""
+DataManager 的區間覆蓋紀錄：資料來源回應「沒有資料」(上市日之前、休市、尚未公布) 的區間
+視為已查詢，不再重複呼叫；只有真正失敗的區間會在下次重試。以 replay 資料來源離線執行。
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+import yaml
+
+from data_layer.data_manager import DataManager
+
+STOCK_ID = "9999"
+DATES = pd.bdate_range("2024-05-02", periods=100).strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def manager(tmp_path):
+    fixture_dir = tmp_path / "fixtures"
+    (fixture_dir / "stock_price").mkdir(parents=True)
+    (fixture_dir / "institutional").mkdir()
+    pd.DataFrame({"date": DATES, "stock_id": STOCK_ID, "open": 10.0, "high": 11.0, "low": 9.0,
+                  "close": 10.5, "vol": 1000}).to_csv(fixture_dir / "stock_price" / f"{STOCK_ID}.csv", index=False)
+    pd.DataFrame({"date": DATES[-20:], "Foreign_Investor": 100, "Investment_Trust": -50,
+                  "Dealer": 0}).to_csv(fixture_dir / "institutional" / f"{STOCK_ID}.csv", index=False)
+    config = {
+        "data_source": {"primary": "replay", "replay": {"fixture_dir": str(fixture_dir)}},
+        "data_cache": {"path": str(tmp_path / "cache"), "refresh_minutes": 60},
+        "trading_calendar": {"reference_stock_ids": [], "holidays": []},
+        "database": {"path": str(tmp_path / "stock_data.db")},
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    return DataManager(str(config_path))
+
+
+def _calls(manager, fetch):
+    before = manager.source.calls
+    fetch()
+    return manager.source.calls - before
+
+
+def _expire(store):
+    coverage = store.coverage(STOCK_ID)
+    coverage["checked_at"] = (datetime.now() - timedelta(days=1)).isoformat(timespec="seconds")
+
+
+def test_range_before_listing_date_is_covered(manager):
+    last = DATES[-1]
+    assert len(manager.get_stock_data(STOCK_ID, "2024-01-01", last)) == 100
+
+    # 上市日之前的區間只查詢一次 (K 線與除權息各一次)
+    assert _calls(manager, lambda: manager.get_stock_data(STOCK_ID, "2019-01-01", last)) == 2
+    assert manager.price_store.coverage(STOCK_ID)["requested_start"] == "2019-01-01"
+    assert _calls(manager, lambda: manager.get_stock_data(STOCK_ID, "2019-01-01", last)) == 0
+
+
+def test_empty_tail_refreshes_checked_at(manager):
+    last = DATES[-1]
+    manager.get_stock_data(STOCK_ID, "2024-05-01", last)
+    _expire(manager.price_store)
+
+    # 尚未公布 (或颱風停市) 的最新交易日：查詢一次後於 refresh_minutes 內不再重試
+    next_session = pd.bdate_range(last, periods=2)[-1].strftime("%Y-%m-%d")
+    assert _calls(manager, lambda: manager.get_stock_data(STOCK_ID, "2024-05-01", next_session)) == 2
+    assert _calls(manager, lambda: manager.get_stock_data(STOCK_ID, "2024-05-01", next_session)) == 0
+
+
+def test_failed_range_is_retried(manager):
+    manager.source.fail_stock_ids = {STOCK_ID}
+    assert manager.get_stock_data(STOCK_ID, "2024-05-01", DATES[-1]) is None
+    assert manager.price_store.coverage(STOCK_ID) is None
+
+    manager.source.fail_stock_ids = set()
+    assert len(manager.get_stock_data(STOCK_ID, "2024-05-01", DATES[-1])) == 100
+
+
+def test_institutional_window_before_first_row_is_covered(manager):
+    last = DATES[-1]
+    assert len(manager.get_institutional_data(STOCK_ID, DATES[0], last)) == 20
+    assert _calls(manager, lambda: manager.get_institutional_data(STOCK_ID, "2019-01-01", last)) == 1
+    assert _calls(manager, lambda: manager.get_institutional_data(STOCK_ID, "2019-01-01", last)) == 0
+
+
+def test_date_blocks_match_full_history(manager):
+    full = manager.get_stock_data(STOCK_ID, DATES[0], DATES[-1])
+    blocks = list(manager.iter_history([STOCK_ID], DATES[0], DATES[-1], by="date", block_days=30,
+                                       warmup_bars=20, lookahead_bars=5))
+    assert len(blocks) > 3
+    dates = full["date"].to_numpy()
+    for chunk in blocks:
+        frame = chunk.frames[STOCK_ID]
+        lo = max(dates.searchsorted(chunk.start) - 20, 0)
+        hi = dates.searchsorted(chunk.end, side="right") + 5
+        expected = full.iloc[lo:hi].reset_index(drop=True)
+        pd.testing.assert_frame_equal(frame, expected[frame.columns])
@@ -0,0 +1,139 @@
+"""
+analysts.kernels 與 pandas 實作的逐一比對：含缺值的寬面板 (逐列迴圈路徑)、
+窄面板與 1-D (累積和路徑)，以及長序列、整段持平的數值精度。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysts import kernels
+
+T, N = 1500, 300
+
+
+def _panel(n_columns=N, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, size=(T, n_columns)), axis=0))
+    high = close * (1 + rng.uniform(0, 0.03, size=(T, n_columns)))
+    low = close * (1 - rng.uniform(0, 0.03, size=(T, n_columns)))
+    # 尚未上市 (前段缺值) 與停牌 (中段缺值)
+    close[:rng.integers(0, 200)] = np.nan
+    close[:400, :n_columns // 3] = np.nan
+    close[rng.random((T, n_columns)) < 0.01] = np.nan
+    high[np.isnan(close)] = np.nan
+    low[np.isnan(close)] = np.nan
+    return close, high, low
+
+
+def _pd_ewm(s, **kwargs):
+    return s.ewm(adjust=False, ignore_na=True, **kwargs).mean()
+
+
+def _pd_rsi(s, period, method):
+    delta = s.diff()
+    gain, loss = delta.where(delta > 0, 0), -delta.where(delta < 0, 0)
+    if method == "sma":
+        return 100 - 100 / (1 + gain.rolling(period).mean() / loss.rolling(period).mean())
+    smooth = dict(alpha=1 / period, min_periods=period)
+    return 100 - 100 / (1 + _pd_ewm(gain, **smooth) / _pd_ewm(loss, **smooth))
+
+
+def _pd_macd(s):
+    line = _pd_ewm(s, span=12) - _pd_ewm(s, span=26)
+    signal = _pd_ewm(line, span=9)
+    return line, signal, line - signal
+
+
+def _pd_atr(H, L, C, period):
+    tr = np.fmax(H - L, np.fmax((H - C.shift()).abs(), (L - C.shift()).abs()))
+    return tr.rolling(period).mean()
+
+
+def _pd_bollinger(C):
+    middle, std = C.rolling(20).mean(), C.rolling(20).std()
+    return middle + 2 * std, middle, middle - 2 * std
+
+
+CASES = {
+    "sma": (lambda c, h, l: kernels.sma(c, 20), lambda C, H, L: C.rolling(20).mean()),
+    "rolling_std": (lambda c, h, l: kernels.rolling_std(c, 20), lambda C, H, L: C.rolling(20).std()),
+    "rolling_max": (lambda c, h, l: kernels.rolling_max(h, 20), lambda C, H, L: H.rolling(20).max()),
+    "rolling_min(min_periods=1)": (lambda c, h, l: kernels.rolling_min(l, 20, 1),
+                                   lambda C, H, L: L.rolling(20, min_periods=1).min()),
+    "ema": (lambda c, h, l: kernels.ema(c, span=26), lambda C, H, L: _pd_ewm(C, span=26)),
+    "rsi(wilder)": (lambda c, h, l: kernels.rsi(c, 14), lambda C, H, L: _pd_rsi(C, 14, "wilder")),
+    "rsi(sma)": (lambda c, h, l: kernels.rsi(c, 14, "sma"), lambda C, H, L: _pd_rsi(C, 14, "sma")),
+    "macd": (lambda c, h, l: kernels.macd(c), lambda C, H, L: _pd_macd(C)),
+    "atr": (lambda c, h, l: kernels.atr(h, l, c, 14), lambda C, H, L: _pd_atr(H, L, C, 14)),
+    "bollinger": (lambda c, h, l: kernels.bollinger(c, 20, 2), lambda C, H, L: _pd_bollinger(C)),
+}
+
+
+def _as_tuple(result):
+    return result if isinstance(result, tuple) else (result,)
+
+
+def _assert_matches(ours, expected, rtol=1e-8, atol=1e-8):
+    for a, b in zip(_as_tuple(ours), _as_tuple(expected)):
+        b = b.to_numpy() if hasattr(b, "to_numpy") else b
+        np.testing.assert_allclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+
+
+@pytest.mark.parametrize("n_columns", [N, 8], ids=["wide", "narrow"])
+@pytest.mark.parametrize("name", list(CASES))
+def test_matches_pandas_on_panel(name, n_columns):
+    close, high, low = _panel(n_columns)
+    kernel, reference = CASES[name]
+    _assert_matches(kernel(close, high, low),
+                    reference(pd.DataFrame(close), pd.DataFrame(high), pd.DataFrame(low)))
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_1d_matches_panel_column(name):
+    close, high, low = _panel()
+    kernel, _ = CASES[name]
+    j = int(np.argmax(np.isnan(close).sum(axis=0)))
+    panel = _as_tuple(kernel(close, high, low))
+    column = _as_tuple(kernel(close[:, j], high[:, j], low[:, j]))
+    for a, b in zip(panel, column):
+        np.testing.assert_allclose(a[:, j], b, equal_nan=True)
+
+
+def _long_volume(flat_value, n=5000, flat_bars=20, seed=1):
+    rng = np.random.default_rng(seed)
+    vol = rng.lognormal(16, 1.0, size=n).round()
+    vol[-flat_bars:] = flat_value
+    return vol
+
+
+@pytest.mark.parametrize("flat_value", [25_000_000.0, 101.37], ids=["volume", "price"])
+def test_long_series_with_flat_window(flat_value):
+    vol = _long_volume(flat_value)
+    s = pd.Series(vol)
+
+    std = kernels.rolling_std(vol, 20)
+    assert std[-1] == 0.0
+    np.testing.assert_allclose(std, s.rolling(20).std().to_numpy(), rtol=1e-7, atol=1e-6, equal_nan=True)
+
+    mean = kernels.sma(vol, 20)
+    assert mean[-1] == pytest.approx(flat_value, rel=1e-14)
+    np.testing.assert_allclose(mean, s.rolling(20).mean().to_numpy(), rtol=1e-12, equal_nan=True)
+
+    long_mean = kernels.sma(vol, 245, min_periods=1)
+    np.testing.assert_allclose(long_mean, s.rolling(245, min_periods=1).mean().to_numpy(), rtol=1e-12)
+
+
+def test_long_flat_panel_uses_same_precision():
+    vol = np.column_stack([_long_volume(25_000_000.0, seed=k) for k in range(kernels._ROW_LOOP_MIN_COLUMNS)])
+    std = kernels.rolling_std(vol, 20)
+    assert (std[-1] == 0.0).all()
+    np.testing.assert_allclose(kernels.sma(vol, 20)[-1], 25_000_000.0, rtol=1e-14)
+
+
+def test_ema_long_series():
+    close, _, _ = _panel()
+    long_close = np.concatenate([close[:, -1]] * 4)
+    _assert_matches(kernels.ema(long_close, span=26), _pd_ewm(pd.Series(long_close), span=26))
+    _assert_matches(kernels.ema(long_close, alpha=1 / 14, min_periods=14),
+                    _pd_ewm(pd.Series(long_close), alpha=1 / 14, min_periods=14))
@@ -0,0 +1,18 @@
+"""
+新聞標題的詞典情緒分數：複合詞優先比對，其中的單字詞不重複計分。
+"""
+
+import numpy as np
+
+from data_layer.sentiment import LexiconSentimentScorer
+
+
+def test_sub_terms_are_not_counted_inside_compounds():
+    scorer = LexiconSentimentScorer(positive_terms={"大漲": 2.0, "漲": 0.5}, negative_terms={"跌": 0.5})
+    # 只有「大漲」計分 (2.0)；若「漲」重複計算，正面權重會變成 2.5，分數不再是 (2.0 - 0.5) / 2.5
+    np.testing.assert_allclose(scorer.score_batch(["大漲後小跌", "漲", "", None]), [0.6, 1.0, 0.0, 0.0])
+
+
+def test_default_lexicon_scores_batch():
+    scores = LexiconSentimentScorer().score_batch(["台積電大漲創新高", "股價跌停", "營收減 但 大漲"])
+    np.testing.assert_allclose(scores, [1.0, -1.0, 1 / 3])
@@ -0,0 +1,21 @@
+import math
+from analysts.indicator import Indicator
+
+
+def format_indicator(value):
+    """
+    將分析師指標轉為顯示字串，僅供呈現層 (Streamlit、HTML 報告) 使用。
+    """
+    if isinstance(value, Indicator):
+        if value.value is None or math.isnan(value.value):
+            return "N/A"
+        sign = "+" if value.signed else ""
+        return f"{value.value:{sign}.{value.precision}f}{value.unit}"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def format_indicators(indicators):
+    """將整組指標格式化為 "名稱: 數值" 的字串清單"""
+    return [f"{k}: {format_indicator(v)}" for k, v in indicators.items()]
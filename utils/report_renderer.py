@@ -0,0 +1,114 @@
+import os
+import json
+import shutil
+from html import escape
+from string import Template
+from datetime import datetime
+from utils.formatting import format_indicators
+from analysts.explain import explain
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+# 共用靜態檔：每次執行複製一份到報告目錄，所有報告頁面共用
+STATIC_FILES = ("report.css", "summary.js")
+
+PREDICTION_CLASS = {"看多": "bullish", "看空": "bearish"}
+
+SUMMARY_COLUMNS = ["stock_id", "current_price", "final_trend", "score", "bullish", "bearish"]
+
+
+class ReportRenderer:
+    """
+    以 templates/ 下的 string.Template 片段產生 HTML 報告。
+    範本在建立時讀取並編譯一次，之後每檔股票只做代換並以串流方式寫入檔案；
+    樣式表與匯總頁的 JS 為共用的外部檔案，不再嵌入每份報告。
+    """
+    def __init__(self, output_dir="reports", template_dir=TEMPLATE_DIR):
+        self.output_dir = output_dir
+        self.template_dir = template_dir
+        self.templates = {}
+        for name in ("report_head", "report_institutional", "analyst_card", "report_tail", "summary"):
+            with open(os.path.join(template_dir, f"{name}.html"), "r", encoding="utf-8") as f:
+                self.templates[name] = Template(f.read())
+        os.makedirs(output_dir, exist_ok=True)
+        self._static_copied = False
+
+    def _copy_static(self):
+        if self._static_copied:
+            return
+        for name in STATIC_FILES:
+            shutil.copyfile(os.path.join(self.template_dir, name), os.path.join(self.output_dir, name))
+        self._static_copied = True
+
+    def write_report(self, stock_id, result, charts):
+        """
+        寫出單一股票的 HTML 報告 (reports/report_<股票代號>.html)，回傳檔案路徑。
+        """
+        self._copy_static()
+        path = os.path.join(self.output_dir, f"report_{stock_id}.html")
+        institutional_chart = ""
+        if 'institutional' in charts:
+            institutional_chart = self.templates['report_institutional'].substitute(stock_id=escape(stock_id))
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.templates['report_head'].substitute(
+                stock_id=escape(stock_id),
+                generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                current_price=f"{result['current_price']:.2f}",
+                final_trend=escape(str(result['prediction']['final_trend'])),
+                news_summary=escape(result['news_summary']),
+                institutional_chart=institutional_chart
+            ))
+            card = self.templates['analyst_card']
+            for a in result['analysis']:
+                f.write(card.substitute(
+                    analyst=escape(a['analyst']),
+                    prediction_class=PREDICTION_CLASS.get(a['prediction'], 'neutral'),
+                    prediction=escape(a['prediction']),
+                    score=a['score'],
+                    explanation=escape(explain(a)),
+                    indicators=escape(', '.join(format_indicators(a['indicators'])))
+                ))
+            f.write(self.templates['report_tail'].substitute())
+        return path
+
+    @staticmethod
+    def summary_row(stock_id, result):
+        """匯總表格的一列 (對應 SUMMARY_COLUMNS)，只保留匯總頁需要的欄位"""
+        consensus = result['consensus']
+        score = consensus['score']
+        return [
+            stock_id,
+            round(float(result['current_price']), 2),
+            result['prediction']['final_trend'],
+            round(float(score), 1) if score is not None else None,
+            consensus['bullish'],
+            consensus['bearish']
+        ]
+
+    def write_summary(self, rows, data_file="summary_data.js"):
+        """
+        寫出匯總頁：表格資料以精簡的 JSON (欄位名稱 + 每列一個陣列) 逐列寫入 data_file，
+        summary.html 只是固定的外殼，由 summary.js 在瀏覽器端分頁與排序，數千檔股票也不會產生巨大的 HTML。
+        """
+        self._copy_static()
+        count = 0
+        with open(os.path.join(self.output_dir, data_file), "w", encoding="utf-8") as f:
+            f.write('window.SUMMARY_DATA = {"columns": ')
+            f.write(json.dumps(SUMMARY_COLUMNS))
+            f.write(', "rows": [\n')
+            for row in rows:
+                if count:
+                    f.write(",\n")
+                f.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+                count += 1
+            f.write("\n]};\n")
+
+        path = os.path.join(self.output_dir, "summary.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.templates['summary'].substitute(
+                stock_count=count,
+                generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                data_file=data_file
+            ))
+        return path
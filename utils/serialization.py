@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from analysts.indicator import Indicator
+
+
+def convert_numpy_types(obj):
+    """
+    Recursively convert numpy types and Indicator records to native Python types for JSON serialization.
+    """
+    if isinstance(obj, Indicator):
+        return convert_numpy_types(obj.to_dict())
+    elif isinstance(obj, dict):
+        return {key: convert_numpy_types(value) for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [convert_numpy_types(item) for item in obj]
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    else:
+        return obj
+
+
+def restore_indicators(result):
+    """
+    Inverse of convert_numpy_types for analysis results received as JSON:
+    indicator dicts become Indicator records again so the presentation layer can format them.
+    """
+    for analysis in result.get('analysis', []):
+        analysis['indicators'] = {
+            name: Indicator(**value) if isinstance(value, dict) else value
+            for name, value in analysis.get('indicators', {}).items()
+        }
+    return result
+
+
+def frame_to_records(df):
+    """DataFrame -> JSON-ready list of row dicts (None for a missing frame)."""
+    if df is None:
+        return None
+    return convert_numpy_types(df.to_dict(orient='records'))
@@ -2,92 +2,151 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+from analysts import kernels
 
 def calculate_rsi(prices, period=14):
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+    return pd.Series(kernels.rsi(prices.to_numpy(dtype=float), period, method="sma"), index=prices.index)
 
 def calculate_macd(prices):
-    exp1 = prices.ewm(span=12, adjust=False).mean()
-    exp2 = prices.ewm(span=26, adjust=False).mean()
-    macd = exp1 - exp2
-    signal = macd.ewm(span=9, adjust=False).mean()
-    hist = macd - signal
-    return macd, signal, hist
-
-def create_unified_chart(price_data, analysis_results, visible_analysts=None):
+    return tuple(pd.Series(a, index=prices.index) for a in kernels.macd(prices.to_numpy(dtype=float)))
+
+# 自動模式下依資料筆數決定 K 線週期：約 3 年內日線、約 10 年內週線，其餘月線
+RESOLUTION_THRESHOLDS = [(750, 'daily'), (2500, 'weekly')]
+RESAMPLE_PERIODS = {'weekly': 'W', 'monthly': 'M'}
+
+def choose_resolution(n_bars):
+    for limit, resolution in RESOLUTION_THRESHOLDS:
+        if n_bars <= limit:
+            return resolution
+    return 'monthly'
+
+def resample_ohlcv(df, resolution):
     """
-    建立整合圖表，包含 K 線、均線、RSI、MACD 與分析師預測標記。
+    將日 K 聚合為週 K 或月 K；date 取該期間最後一個交易日。
+    """
+    if resolution not in RESAMPLE_PERIODS:
+        return df
+    periods = pd.to_datetime(df['date']).dt.to_period(RESAMPLE_PERIODS[resolution])
+    return df.groupby(periods, sort=True).agg(
+        date=('date', 'last'),
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        vol=('vol', 'sum')
+    ).reset_index(drop=True)
+
+def lttb_indices(y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 降採樣，回傳保留點的位置索引。
+    交易日視為等距，以位置作為 x 軸；NaN (指標暖身期) 不參與取樣。
+    """
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if threshold >= n or threshold < 3:
+        return valid
+
+    x = valid.astype(float)
+    v = y[valid]
+    every = (n - 2) / (threshold - 2)
+    sampled = np.empty(threshold, dtype=np.int64)
+    sampled[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = v[avg_start:avg_end].mean()
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        area = np.abs((x[a] - avg_x) * (v[range_start:range_end] - v[a])
+                      - (x[a] - x[range_start:range_end]) * (avg_y - v[a]))
+        a = range_start + int(area.argmax())
+        sampled[i + 1] = a
+    sampled[-1] = n - 1
+    return valid[sampled]
+
+def _line(df, column, max_points, **kwargs):
+    """以 Scattergl 繪製指標線，超過 max_points 時以 LTTB 降採樣"""
+    idx = lttb_indices(df[column].to_numpy(), max_points) if max_points else np.arange(len(df))
+    return go.Scattergl(x=df['date'].to_numpy()[idx], y=df[column].to_numpy()[idx], **kwargs)
+
+def compute_indicator_frame(price_data):
+    """
+    計算圖表所需的指標欄位 (MA5、MA20、RSI、MACD)，可由呼叫端快取重複使用。
     """
     df = price_data.copy()
-    df['RSI'] = calculate_rsi(df['close'])
-    macd, signal, hist = calculate_macd(df['close'])
-    df['MACD'] = macd
-    df['MACD_Signal'] = signal
-    df['MACD_Hist'] = hist
-    
+    close = df['close'].to_numpy(dtype=float)
+    df['MA5'] = kernels.sma(close, 5)
+    df['MA20'] = kernels.sma(close, 20)
+    df['RSI'] = kernels.rsi(close, 14, method="sma")
+    df['MACD'], df['MACD_Signal'], df['MACD_Hist'] = kernels.macd(close)
+    return df
+
+def create_unified_chart(price_data, analysis_results, visible_analysts=None, indicator_frame=None,
+                         resolution='auto', max_points=1500):
+    """
+    建立整合圖表，包含 K 線、均線、RSI、MACD 與分析師預測標記。
+    indicator_frame 可傳入 compute_indicator_frame 的快取結果以省略重算。
+    """
+    df = indicator_frame if indicator_frame is not None else compute_indicator_frame(price_data)
+    fig = build_base_chart(df, resolution=resolution, max_points=max_points)
+    add_analyst_markers(fig, df, analysis_results)
+    set_visible_analysts(fig, visible_analysts)
+    return fig
+
+def build_base_chart(df, resolution='auto', max_points=1500):
+    """
+    建立不含分析師標記的四層子圖 (K 線、RSI、MACD、成交量)。
+
+    resolution 為 'daily'、'weekly'、'monthly' 或 'auto' (依 df 筆數決定)；
+    K 線與成交量依週期聚合，指標線維持日線計算結果並以 LTTB 降採樣至 max_points，
+    長歷史資料的 plotly 輸出因此維持在固定大小。
+    """
+    if resolution == 'auto':
+        resolution = choose_resolution(len(df))
+    bars = resample_ohlcv(df, resolution)
+
     fig = make_subplots(rows=4, cols=1, shared_xaxes=True, 
                        vertical_spacing=0.02, 
                        subplot_titles=('股價 K 線與分析預測', 'RSI 指標', 'MACD 指標', '成交量'), 
                        row_heights=[0.5, 0.15, 0.15, 0.2])
 
     # K 線圖
-    fig.add_trace(go.Candlestick(x=df['date'],
-                open=df['open'],
-                high=df['high'],
-                low=df['low'],
-                close=df['close'], name='K線'), row=1, col=1)
+    fig.add_trace(go.Candlestick(x=bars['date'],
+                open=bars['open'],
+                high=bars['high'],
+                low=bars['low'],
+                close=bars['close'], name='K線'), row=1, col=1)
 
     # 5日均線
-    ma5 = df['close'].rolling(5).mean()
-    fig.add_trace(go.Scatter(x=df['date'], y=ma5, line=dict(color='orange', width=1), name='MA5'), row=1, col=1)
+    fig.add_trace(_line(df, 'MA5', max_points, line=dict(color='orange', width=1), name='MA5'), row=1, col=1)
     
     # 20日均線
-    ma20 = df['close'].rolling(20).mean()
-    fig.add_trace(go.Scatter(x=df['date'], y=ma20, line=dict(color='cyan', width=1), name='MA20'), row=1, col=1)
-
-    # 分析師標記
-    last_date = df['date'].iloc[-1]
-    last_price = df['close'].iloc[-1]
-    
-    for a in analysis_results:
-        if visible_analysts and a['analyst'] not in visible_analysts:
-            continue
-            
-        color = 'green' if a['prediction'] == '看多' else ('red' if a['prediction'] == '看空' else 'gray')
-        symbol = 'triangle-up' if a['prediction'] == '看多' else ('triangle-down' if a['prediction'] == '看空' else 'circle')
-        
-        # 在最後一個交易日標記分析師觀點
-        fig.add_trace(go.Scatter(
-            x=[last_date], 
-            y=[last_price * (1.02 if a['prediction'] == '看多' else 0.98)],
-            mode='markers+text',
-            marker=dict(symbol=symbol, size=12, color=color),
-            text=[a['analyst']],
-            textposition="top center" if a['prediction'] == '看多' else "bottom center",
-            name=f"{a['analyst']} 訊號"
-        ), row=1, col=1)
+    fig.add_trace(_line(df, 'MA20', max_points, line=dict(color='cyan', width=1), name='MA20'), row=1, col=1)
 
     # RSI 子圖
-    fig.add_trace(go.Scatter(x=df['date'], y=df['RSI'], line=dict(color='purple', width=1.5), name='RSI'), row=2, col=1)
+    fig.add_trace(_line(df, 'RSI', max_points, line=dict(color='purple', width=1.5), name='RSI'), row=2, col=1)
     fig.add_shape(type="line", x0=df['date'].min(), y0=70, x1=df['date'].max(), y1=70, line=dict(color="red", dash="dash"), row=2, col=1)
     fig.add_shape(type="line", x0=df['date'].min(), y0=30, x1=df['date'].max(), y1=30, line=dict(color="green", dash="dash"), row=2, col=1)
 
     # MACD 子圖
-    fig.add_trace(go.Scatter(x=df['date'], y=df['MACD'], name='MACD', line=dict(color='white')), row=3, col=1)
-    fig.add_trace(go.Scatter(x=df['date'], y=df['MACD_Signal'], name='Signal', line=dict(color='yellow')), row=3, col=1)
-    fig.add_trace(go.Bar(x=df['date'], y=df['MACD_Hist'], name='Hist', marker_color='gray'), row=3, col=1)
+    fig.add_trace(_line(df, 'MACD', max_points, name='MACD', line=dict(color='white')), row=3, col=1)
+    fig.add_trace(_line(df, 'MACD_Signal', max_points, name='Signal', line=dict(color='yellow')), row=3, col=1)
+    hist_idx = lttb_indices(df['MACD_Hist'].to_numpy(), max_points) if max_points else np.arange(len(df))
+    fig.add_trace(go.Bar(x=df['date'].to_numpy()[hist_idx], y=df['MACD_Hist'].to_numpy()[hist_idx],
+                         name='Hist', marker_color='gray'), row=3, col=1)
 
-    # 成交量
-    colors = ['green' if df['close'].iloc[i] > df['open'].iloc[i] else 'red' for i in range(len(df))]
-    fig.add_trace(go.Bar(x=df['date'], y=df['vol'], name='成交量', marker_color=colors), row=4, col=1)
+    # 成交量 (顏色陣列以向量化方式產生)
+    colors = np.where(bars['close'].to_numpy() > bars['open'].to_numpy(), 'green', 'red')
+    fig.add_trace(go.Bar(x=bars['date'], y=bars['vol'], name='成交量', marker_color=colors), row=4, col=1)
 
     # 更新版面
+    resolution_label = {'daily': '日線', 'weekly': '週線', 'monthly': '月線'}[resolution]
     fig.update_layout(
-        title='綜合股票分析看板',
+        title=f'綜合股票分析看板 ({resolution_label})',
         yaxis_title='價格',
         xaxis_rangeslider_visible=False,
         height=1000,
@@ -96,3 +155,37 @@ def create_unified_chart(price_data, analysis_results, visible_analysts=None):
     )
     
     return fig
+
+def add_analyst_markers(fig, df, analysis_results):
+    """
+    在最後一個交易日為每位分析師加上觀點標記。
+    每個標記以 meta 記錄分析師名稱，之後可只切換顯示狀態而不重建圖表。
+    """
+    last_date = df['date'].iloc[-1]
+    last_price = df['close'].iloc[-1]
+    
+    for a in analysis_results:
+        color = 'green' if a['prediction'] == '看多' else ('red' if a['prediction'] == '看空' else 'gray')
+        symbol = 'triangle-up' if a['prediction'] == '看多' else ('triangle-down' if a['prediction'] == '看空' else 'circle')
+        
+        fig.add_trace(go.Scatter(
+            x=[last_date], 
+            y=[last_price * (1.02 if a['prediction'] == '看多' else 0.98)],
+            mode='markers+text',
+            marker=dict(symbol=symbol, size=12, color=color),
+            text=[a['analyst']],
+            textposition="top center" if a['prediction'] == '看多' else "bottom center",
+            name=f"{a['analyst']} 訊號",
+            meta={'analyst': a['analyst']}
+        ), row=1, col=1)
+    
+    return fig
+
+def set_visible_analysts(fig, visible_analysts=None):
+    """
+    只更新分析師標記的 visible 屬性；visible_analysts 為 None 或空白 (未選任何分析師) 時全部顯示。
+    """
+    for trace in fig.data:
+        if isinstance(trace.meta, dict) and 'analyst' in trace.meta:
+            trace.visible = not visible_analysts or trace.meta['analyst'] in visible_analysts
+    return fig